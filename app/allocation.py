@@ -0,0 +1,168 @@
+import heapq
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app import models
+from app.database import config
+
+
+class Applicant:
+    __slots__ = ("application_id", "student_id", "group_id", "faculty_id")
+
+    def __init__(self, application_id: int, student_id: int, group_id: Optional[int] = None,
+                 faculty_id: Optional[int] = None):
+        self.application_id = application_id
+        self.student_id = student_id
+        self.group_id = group_id
+        self.faculty_id = faculty_id
+
+
+class RoomSlot:
+    __slots__ = ("id", "dormitory_id", "floor_number", "capacity", "occupancy", "free_slots")
+
+    def __init__(self, id: int, dormitory_id: int, floor_number: int, capacity: int, occupancy: int):
+        self.id = id
+        self.dormitory_id = dormitory_id
+        self.floor_number = floor_number
+        self.capacity = capacity
+        self.occupancy = occupancy
+        self.free_slots = capacity - occupancy
+
+
+def load_room_slots(db_sqlite: Session) -> List[RoomSlot]:
+    rows = db_sqlite.query(
+        models.Room.id, models.Room.dormitory_id, models.Room.floor_number,
+        models.Room.capacity, models.Room.current_occupancy
+    ).filter(
+        models.Room.capacity > 0
+    ).order_by(models.Room.dormitory_id, models.Room.id).all()
+    return [RoomSlot(row.id, row.dormitory_id, row.floor_number, row.capacity, row.current_occupancy) for row in rows]
+
+
+class AllocationStrategy(ABC):
+    name = ""
+    uses_groups = False
+
+    @abstractmethod
+    def assign(self, applicants: List[Applicant], rooms: List[RoomSlot]) -> Dict[int, int]:
+        ...
+
+
+class FirstFitStrategy(AllocationStrategy):
+    name = "first_fit"
+
+    def assign(self, applicants: List[Applicant], rooms: List[RoomSlot]) -> Dict[int, int]:
+        assignments = {}
+        room_position = 0
+        for applicant in applicants:
+            while room_position < len(rooms) and rooms[room_position].free_slots <= 0:
+                room_position += 1
+            if room_position == len(rooms):
+                break
+            room = rooms[room_position]
+            room.free_slots -= 1
+            assignments[applicant.application_id] = room.id
+        return assignments
+
+
+class GroupedFloorFillStrategy(AllocationStrategy):
+    name = "grouped_floor_fill"
+    uses_groups = True
+
+    def assign(self, applicants: List[Applicant], rooms: List[RoomSlot]) -> Dict[int, int]:
+        cohorts = {}
+        for applicant in applicants:
+            cohorts.setdefault((applicant.faculty_id, applicant.group_id), []).append(applicant)
+
+        floors = {}
+        for room in rooms:
+            floors.setdefault((room.dormitory_id, room.floor_number), []).append(room)
+        opened_floors = {floor_key for floor_key, floor_rooms in floors.items()
+                         if any(room.occupancy > 0 for room in floor_rooms)}
+        floor_free_slots = {floor_key: sum(max(room.free_slots, 0) for room in floor_rooms)
+                            for floor_key, floor_rooms in floors.items()}
+
+        assignments = {}
+        for cohort in sorted(cohorts.values(), key=len, reverse=True):
+            position = 0
+            while position < len(cohort):
+                floor_key = self._choose_floor(len(cohort) - position, floor_free_slots, opened_floors)
+                if floor_key is None:
+                    return assignments
+                opened_floors.add(floor_key)
+                floor_rooms = sorted(floors[floor_key], key=lambda room: (room.free_slots == room.capacity, room.id))
+                for room in floor_rooms:
+                    while room.free_slots > 0 and position < len(cohort):
+                        room.free_slots -= 1
+                        floor_free_slots[floor_key] -= 1
+                        assignments[cohort[position].application_id] = room.id
+                        position += 1
+                    if position == len(cohort):
+                        break
+        return assignments
+
+    @staticmethod
+    def _choose_floor(cohort_size: int, floor_free_slots: Dict, opened_floors: set):
+        best_key = None
+        best_rank = None
+        for floor_key, free_slots in floor_free_slots.items():
+            if free_slots <= 0:
+                continue
+            fits = free_slots >= cohort_size
+            rank = (not fits, floor_key not in opened_floors, free_slots if fits else -free_slots, floor_key)
+            if best_rank is None or rank < best_rank:
+                best_key, best_rank = floor_key, rank
+        return best_key
+
+
+class BalancedDormitoryStrategy(AllocationStrategy):
+    name = "balanced_dormitories"
+
+    def assign(self, applicants: List[Applicant], rooms: List[RoomSlot]) -> Dict[int, int]:
+        dormitory_rooms = {}
+        dormitory_load = {}
+        for room in rooms:
+            dormitory_rooms.setdefault(room.dormitory_id, []).append(room)
+            capacity, occupancy = dormitory_load.get(room.dormitory_id, (0, 0))
+            dormitory_load[room.dormitory_id] = (capacity + room.capacity, occupancy + room.occupancy)
+        room_positions = dict.fromkeys(dormitory_rooms, 0)
+        least_loaded = [(occupancy / capacity, dormitory_id) for dormitory_id, (capacity, occupancy)
+                        in dormitory_load.items()]
+        heapq.heapify(least_loaded)
+
+        assignments = {}
+        for applicant in applicants:
+            room = None
+            while room is None:
+                if not least_loaded:
+                    return assignments
+                _, dormitory_id = least_loaded[0]
+                dorm_rooms = dormitory_rooms[dormitory_id]
+                while room_positions[dormitory_id] < len(dorm_rooms) and \
+                        dorm_rooms[room_positions[dormitory_id]].free_slots <= 0:
+                    room_positions[dormitory_id] += 1
+                if room_positions[dormitory_id] < len(dorm_rooms):
+                    room = dorm_rooms[room_positions[dormitory_id]]
+                else:
+                    heapq.heappop(least_loaded)
+
+            room.free_slots -= 1
+            capacity, occupancy = dormitory_load[room.dormitory_id]
+            dormitory_load[room.dormitory_id] = (capacity, occupancy + 1)
+            heapq.heapreplace(least_loaded, ((occupancy + 1) / capacity, room.dormitory_id))
+            assignments[applicant.application_id] = room.id
+        return assignments
+
+
+ALLOCATION_STRATEGIES = {
+    strategy.name: strategy for strategy in (FirstFitStrategy, GroupedFloorFillStrategy, BalancedDormitoryStrategy)
+}
+
+
+def get_allocation_strategy(name: Optional[str] = None) -> AllocationStrategy:
+    name = name or config.get("allocation", "strategy", fallback=FirstFitStrategy.name)
+    if name not in ALLOCATION_STRATEGIES:
+        raise ValueError(
+            f"Неизвестная стратегия распределения '{name}'. "
+            f"Доступные стратегии: {', '.join(ALLOCATION_STRATEGIES)}.")
+    return ALLOCATION_STRATEGIES[name]()
@@ -0,0 +1,138 @@
+import asyncio
+import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app import crud, models, schemas
+from app.database import begin_write_async
+from app.metrics import query_budget
+from app.student_cache import student_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+async def get_student_by_ticket_number_and_lastname(db_pg: AsyncSession, student_ticket_number: str,
+                                                    last_name: str) -> Optional[schemas.StudentInDB]:
+    cache_key = student_cache.ticket_key(student_ticket_number, last_name)
+    found, student = student_cache.get(cache_key)
+    if found:
+        return student
+
+    result = await db_pg.execute(
+        select(models.Student).where(*crud.student_ticket_criteria(student_ticket_number, last_name)).limit(1)
+    )
+    return crud.store_fetched_student_by_ticket(cache_key, result.scalars().first())
+
+
+async def get_students_by_ids_pg(db_pg: AsyncSession, student_ids: Iterable[int]) -> Dict[int, schemas.StudentInDB]:
+    students, missing_ids = crud.split_cached_students(student_ids)
+    for chunk_start in range(0, len(missing_ids), crud.STUDENT_LOOKUP_CHUNK_SIZE):
+        chunk = missing_ids[chunk_start:chunk_start + crud.STUDENT_LOOKUP_CHUNK_SIZE]
+        result = await db_pg.execute(select(models.Student).where(models.Student.id.in_(chunk)))
+        crud.store_fetched_students(students, chunk, result.scalars().all())
+    return students
+
+
+def _latest_application_query(student_id: int, active_only: bool):
+    query = select(models.Application).where(models.Application.student_id == student_id)
+    if active_only:
+        query = query.where(models.Application.status.in_(crud.ACTIVE_APPLICATION_STATUSES))
+    return query.order_by(models.Application.application_date.desc()).limit(1)
+
+
+@query_budget(sqlite=3, postgres=1)
+async def create_application(db_sqlite: AsyncSession, db_pg: AsyncSession,
+                             application_in: schemas.ApplicationCreate) -> models.Application:
+    student = await get_student_by_ticket_number_and_lastname(
+        db_pg,
+        application_in.student_ticket_number,
+        application_in.last_name
+    )
+    if not student:
+        raise ValueError("Студент с указанным номером студенческого билета и фамилией не найден.")
+
+    await begin_write_async(db_sqlite)
+    existing_application = (await db_sqlite.execute(_latest_application_query(student.id, True))).scalars().first()
+    if existing_application:
+        crud.raise_active_application_exists(existing_application)
+
+    db_application = models.Application(student_id=student.id)
+    db_sqlite.add(db_application)
+    await db_sqlite.commit()
+    await db_sqlite.refresh(db_application)
+    crud.publish_application_change(db_application, student)
+    return db_application
+
+
+@query_budget(sqlite=2, postgres=1)
+async def get_application_status_by_student_details(db_sqlite: AsyncSession, db_pg: AsyncSession,
+                                                    student_ticket_number: str,
+                                                    last_name: str) -> Optional[schemas.ApplicationStatusResponse]:
+    student = await get_student_by_ticket_number_and_lastname(db_pg, student_ticket_number, last_name)
+    if not student:
+        return None
+
+    room_loader = joinedload(models.Application.allocated_room_detail).joinedload(models.Room.dormitory)
+    application = (await db_sqlite.execute(
+        _latest_application_query(student.id, True).options(room_loader)
+    )).scalars().first()
+    if not application:
+        application = (await db_sqlite.execute(
+            _latest_application_query(student.id, False).options(room_loader)
+        )).scalars().first()
+    if not application:
+        return None
+    return crud.build_application_status_response(student, application)
+
+
+async def count_applications(db_count: AsyncSession, criteria: List, cursor: Optional[str]) -> Optional[int]:
+    if cursor:
+        return None
+    return await db_count.scalar(crud.count_applications_query(criteria))
+
+
+@query_budget(sqlite=2, postgres=2)
+async def get_staff_applications_page(db_sqlite: AsyncSession, db_count: AsyncSession, db_pg: AsyncSession,
+                                      skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                                      status: Optional[models.ApplicationStatus] = None,
+                                      dormitory_id: Optional[int] = None,
+                                      date_from: Optional[datetime.datetime] = None,
+                                      date_to: Optional[datetime.datetime] = None) -> Tuple[
+    List[schemas.StaffApplicationResponse], Optional[str], Optional[int]]:
+    criteria = crud.application_filter_criteria(status, dormitory_id, date_from, date_to)
+    query = select(models.Application).where(*criteria).options(
+        joinedload(models.Application.allocated_room_detail).joinedload(models.Room.dormitory)
+    ).order_by(models.Application.application_date.desc(), models.Application.id.desc()).limit(limit + 1)
+    if cursor:
+        query = query.where(crud.application_cursor_criterion(cursor))
+    elif skip:
+        query = query.offset(skip)
+
+    async def load_page():
+        applications, next_cursor = crud.paginate_applications((await db_sqlite.execute(query)).scalars().all(), limit)
+        students = await get_students_by_ids_pg(db_pg, (app.student_id for app in applications))
+        return [crud.build_staff_application_response(app, students.get(app.student_id))
+                for app in applications], next_cursor
+
+    (responses, next_cursor), total_count = await asyncio.gather(load_page(), count_applications(db_count, criteria,
+                                                                                                 cursor))
+    return responses, next_cursor, total_count
+
+
+@query_budget(sqlite=2, postgres=2)
+async def get_staff_application_rows_page(db_sqlite: AsyncSession, db_count: AsyncSession, db_pg: AsyncSession,
+                                          skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                                          status: Optional[models.ApplicationStatus] = None,
+                                          dormitory_id: Optional[int] = None,
+                                          date_from: Optional[datetime.datetime] = None,
+                                          date_to: Optional[datetime.datetime] = None) -> Tuple[
+    List[Dict], Optional[str], Optional[int]]:
+    criteria = crud.application_filter_criteria(status, dormitory_id, date_from, date_to)
+    query = crud.applications_page_query(crud.staff_application_rows_query(criteria), skip, limit, cursor)
+
+    async def load_page():
+        rows, next_cursor = crud.paginate_applications((await db_sqlite.execute(query)).all(), limit)
+        students = await get_students_by_ids_pg(db_pg, (row.student_id for row in rows))
+        return crud.build_staff_application_rows(rows, students), next_cursor
+
+    (rows, next_cursor), total_count = await asyncio.gather(load_page(), count_applications(db_count, criteria, cursor))
+    return rows, next_cursor, total_count
@@ -1,16 +1,79 @@
-from sqlalchemy.orm import Session, selectinload
+import base64
+import datetime
+import json
+import time
+from collections import Counter
+from sqlalchemy import and_, bindparam, case, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
 from app import models, schemas
-from typing import List, Optional
+from app.allocation import Applicant, AllocationStrategy, FirstFitStrategy, get_allocation_strategy, load_room_slots
+from app.database import begin_write
+from app.events import change_broker, queue_change, queue_occupancy_change
+from app.metrics import count_query_budget_chunk, query_budget
+from app.room_index import free_room_index, queue_free_slots
+from app.student_cache import normalize_last_name, student_cache
+from app.structure_io import iter_rows_from_structure, validate_rows_in_chunks
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+STUDENT_LOOKUP_CHUNK_SIZE = 500
+APPLICATION_COUNT_LIMIT = 10000
+EXPORT_FETCH_CHUNK_SIZE = 1000
+ROOM_WRITE_CHUNK_SIZE = 500
+APPLICATION_WRITE_CHUNK_SIZE = 500
+APPLICATION_EXPORT_FIELDS = (
+    "id", "application_date", "status", "rejection_reason", "student_id", "student_ticket_number",
+    "student_last_name", "student_first_name", "student_middle_name", "group_id", "allocated_room_id",
+    "dormitory_name", "floor_number", "room_number"
+)
+STAFF_APPLICATION_FIELDS = tuple(schemas.StaffApplicationResponse.model_fields)
+ROOM_ALLOCATION_RETRIES = 5
+# Every room claim lost to a concurrent writer costs the failed UPDATE plus a re-read of the rooms before retrying.
+ROOM_CLAIM_RETRY_STATEMENTS = 2 * ROOM_ALLOCATION_RETRIES
+ACTIVE_APPLICATION_STATUSES = (
+    models.ApplicationStatus.PENDING,
+    models.ApplicationStatus.APPROVED,
+    models.ApplicationStatus.ALLOCATED
+)
+
+ProgressCallback = Callable[[int, Optional[int]], None]
 
 
 def get_student_by_ticket_number_and_lastname(db_pg: Session, student_ticket_number: str, last_name: str) -> Optional[
-    models.Student]:
-    return db_pg.query(models.Student).filter(
-        models.Student.student_ticket_number == student_ticket_number,
-        models.Student.last_name.ilike(last_name)
+    schemas.StudentInDB]:
+    cache_key = student_cache.ticket_key(student_ticket_number, last_name)
+    found, student = student_cache.get(cache_key)
+    if found:
+        return student
+
+    student_orm = db_pg.query(models.Student).filter(
+        *student_ticket_criteria(student_ticket_number, last_name)
     ).first()
+    return store_fetched_student_by_ticket(cache_key, student_orm)
+
+
+def student_ticket_criteria(student_ticket_number: str, last_name: str) -> List:
+    return [
+        models.Student.student_ticket_number == student_ticket_number,
+        models.unicode_lower(models.Student.last_name) == normalize_last_name(last_name)
+    ]
+
 
+def store_fetched_student_by_ticket(cache_key: Tuple, student_orm: Optional[models.Student]) -> Optional[
+    schemas.StudentInDB]:
+    student = schemas.StudentInDB.from_orm(student_orm) if student_orm else None
+    if student:
+        student_cache.put_student(student)
+    student_cache.put(cache_key, student)
+    return student
 
+
+def raise_active_application_exists(existing_application: models.Application):
+    raise ValueError(
+        f"У студента уже есть активное заявление (номер заявления: {existing_application.id}, статус: {existing_application.status}).")
+
+
+@query_budget(sqlite=3, postgres=1)
 def create_application(db_sqlite: Session, db_pg: Session, application_in: schemas.ApplicationCreate) -> Optional[
     models.Application]:
     student = get_student_by_ticket_number_and_lastname(
@@ -21,22 +84,19 @@ def create_application(db_sqlite: Session, db_pg: Session, application_in: schem
     if not student:
         raise ValueError("Студент с указанным номером студенческого билета и фамилией не найден.")
 
+    begin_write(db_sqlite)
     existing_application = db_sqlite.query(models.Application).filter(
         models.Application.student_id == student.id,
-        models.Application.status.in_([
-            models.ApplicationStatus.PENDING,
-            models.ApplicationStatus.APPROVED,
-            models.ApplicationStatus.ALLOCATED
-        ])
+        models.Application.status.in_(ACTIVE_APPLICATION_STATUSES)
     ).order_by(models.Application.application_date.desc()).first()
     if existing_application:
-        raise ValueError(
-            f"У студента уже есть активное заявление (номер заявления: {existing_application.id}, статус: {existing_application.status}).")
+        raise_active_application_exists(existing_application)
 
     db_application = models.Application(student_id=student.id)
     db_sqlite.add(db_application)
     db_sqlite.commit()
     db_sqlite.refresh(db_application)
+    publish_application_change(db_application, student)
     return db_application
 
 
@@ -44,6 +104,7 @@ def get_student_by_ticket_number(db_pg: Session, student_ticket_number: str) ->
     return db_pg.query(models.Student).filter(models.Student.student_ticket_number == student_ticket_number).first()
 
 
+@query_budget(sqlite=2, postgres=1)
 def get_application_status_by_student_details(db_sqlite: Session, db_pg: Session, student_ticket_number: str,
                                               last_name: str) -> Optional[schemas.ApplicationStatusResponse]:
     student = get_student_by_ticket_number_and_lastname(db_pg, student_ticket_number, last_name)
@@ -51,16 +112,12 @@ def get_application_status_by_student_details(db_sqlite: Session, db_pg: Session
         return None
 
     application_query = db_sqlite.query(models.Application).options(
-        selectinload(models.Application.allocated_room_detail).selectinload(models.Room.dormitory)
+        joinedload(models.Application.allocated_room_detail).joinedload(models.Room.dormitory)
     )
 
     application = application_query.filter(
         models.Application.student_id == student.id,
-        models.Application.status.in_([
-            models.ApplicationStatus.PENDING,
-            models.ApplicationStatus.APPROVED,
-            models.ApplicationStatus.ALLOCATED
-        ])
+        models.Application.status.in_(ACTIVE_APPLICATION_STATUSES)
     ).order_by(models.Application.application_date.desc()).first()
 
     if not application:
@@ -70,7 +127,11 @@ def get_application_status_by_student_details(db_sqlite: Session, db_pg: Session
 
     if not application:
         return None
+    return build_application_status_response(student, application)
+
 
+def build_application_status_response(student: schemas.StudentInDB,
+                                      application: models.Application) -> schemas.ApplicationStatusResponse:
     response_data = {
         "application_id": application.id,
         "student_ticket_number": student.student_ticket_number,
@@ -92,21 +153,224 @@ def get_application_status_by_student_details(db_sqlite: Session, db_pg: Session
     return schemas.ApplicationStatusResponse(**response_data)
 
 
-def get_all_applications(db_sqlite: Session, skip: int = 0, limit: int = 100) -> List[models.Application]:
-    return db_sqlite.query(models.Application).options(
-        selectinload(models.Application.allocated_room_detail).selectinload(models.Room.dormitory)
-    ).order_by(models.Application.application_date.desc()).offset(skip).limit(limit).all()
-
+def encode_applications_cursor(application: models.Application) -> str:
+    payload = json.dumps({"id": application.id}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_applications_cursor(cursor: str) -> int:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return int(json.loads(payload)["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Некорректный курсор постраничной навигации.")
+
+
+@query_budget(sqlite=2)
+def get_all_applications(db_sqlite: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                         status: Optional[models.ApplicationStatus] = None, dormitory_id: Optional[int] = None,
+                         date_from: Optional[datetime.datetime] = None,
+                         date_to: Optional[datetime.datetime] = None) -> Tuple[
+    List[models.Application], Optional[str], Optional[int]]:
+    criteria = application_filter_criteria(status, dormitory_id, date_from, date_to)
+    query = db_sqlite.query(models.Application).filter(*criteria)
+    total_count = None if cursor else db_sqlite.scalar(count_applications_query(criteria))
+
+    if cursor:
+        query = query.filter(application_cursor_criterion(cursor))
+    elif skip:
+        query = query.offset(skip)
+
+    applications = query.options(
+        joinedload(models.Application.allocated_room_detail).joinedload(models.Room.dormitory)
+    ).order_by(models.Application.application_date.desc(), models.Application.id.desc()).limit(limit + 1).all()
+    return paginate_applications(applications, limit) + (total_count,)
+
+
+def staff_application_rows_query(criteria: List):
+    return select(
+        models.Application.id, models.Application.student_id, models.Application.application_date,
+        models.Application.status, models.Application.rejection_reason, models.Application.allocated_room_id,
+        models.Dormitory.name.label("allocated_dorm_name"), models.Dormitory.address.label("allocated_dorm_address"),
+        models.Room.room_number.label("allocated_room_number"), models.Room.floor_number.label("allocated_floor_number")
+    ).outerjoin(
+        models.Room, and_(
+            models.Room.id == models.Application.allocated_room_id,
+            models.Application.status == models.ApplicationStatus.ALLOCATED
+        )
+    ).outerjoin(
+        models.Dormitory, models.Dormitory.id == models.Room.dormitory_id
+    ).where(*criteria).order_by(models.Application.application_date.desc(), models.Application.id.desc())
+
+
+def applications_page_query(query, skip: int, limit: int, cursor: Optional[str]):
+    if cursor:
+        query = query.where(application_cursor_criterion(cursor))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def build_staff_application_rows(rows, students: Dict[int, schemas.StudentInDB]) -> List[Dict[str, Any]]:
+    student_rows = {student_id: student.model_dump() for student_id, student in students.items() if student}
+    staff_rows = []
+    for row in rows:
+        values = row._asdict()
+        values["student_info"] = student_rows.get(row.student_id)
+        staff_rows.append({field: values[field] for field in STAFF_APPLICATION_FIELDS})
+    return staff_rows
+
+
+@query_budget(sqlite=2, postgres=2)
+def get_staff_application_rows(db_sqlite: Session, db_pg: Session, skip: int = 0, limit: int = 100,
+                               cursor: Optional[str] = None, status: Optional[models.ApplicationStatus] = None,
+                               dormitory_id: Optional[int] = None, date_from: Optional[datetime.datetime] = None,
+                               date_to: Optional[datetime.datetime] = None) -> Tuple[
+    List[Dict[str, Any]], Optional[str], Optional[int]]:
+    criteria = application_filter_criteria(status, dormitory_id, date_from, date_to)
+    total_count = None if cursor else db_sqlite.scalar(count_applications_query(criteria))
+    rows, next_cursor = paginate_applications(
+        db_sqlite.execute(applications_page_query(staff_application_rows_query(criteria), skip, limit, cursor)).all(),
+        limit
+    )
+    students = get_students_by_ids_pg(db_pg, (row.student_id for row in rows))
+    return build_staff_application_rows(rows, students), next_cursor, total_count
+
+
+def application_filter_criteria(status: Optional[models.ApplicationStatus] = None, dormitory_id: Optional[int] = None,
+                                date_from: Optional[datetime.datetime] = None,
+                                date_to: Optional[datetime.datetime] = None) -> List:
+    criteria = []
+    if status is not None:
+        criteria.append(models.Application.status == status)
+    if dormitory_id is not None:
+        criteria.append(models.Application.allocated_room_id.in_(
+            select(models.Room.id).where(models.Room.dormitory_id == dormitory_id)
+        ))
+    if date_from is not None:
+        criteria.append(models.Application.application_date >= date_from)
+    if date_to is not None:
+        criteria.append(models.Application.application_date <= date_to)
+    return criteria
+
+
+def application_cursor_criterion(cursor: str):
+    anchor_id = decode_applications_cursor(cursor)
+    anchor_date = select(models.Application.application_date).where(
+        models.Application.id == anchor_id
+    ).scalar_subquery()
+    return tuple_(models.Application.application_date, models.Application.id) < tuple_(anchor_date, anchor_id)
+
+
+def count_applications_query(criteria: List):
+    # Counting stops after APPLICATION_COUNT_LIMIT + 1 rows; a larger result is reported as an estimate.
+    capped = select(models.Application.id).where(*criteria).limit(APPLICATION_COUNT_LIMIT + 1).subquery()
+    return select(func.count()).select_from(capped)
+
+
+def paginate_applications(applications: List[models.Application], limit: int) -> Tuple[
+    List[models.Application], Optional[str]]:
+    next_cursor = None
+    if len(applications) > limit:
+        applications = applications[:limit]
+        next_cursor = encode_applications_cursor(applications[-1])
+    return applications, next_cursor
+
+
+def build_staff_application_responses(db_pg: Session, applications: List[models.Application]) -> List[
+    schemas.StaffApplicationResponse]:
+    students = get_students_by_ids_pg(db_pg, (app.student_id for app in applications))
+    return [build_staff_application_response(app, students.get(app.student_id)) for app in applications]
+
+
+def build_staff_application_response(app: models.Application,
+                                     student: Optional[schemas.StudentInDB]) -> schemas.StaffApplicationResponse:
+    app_dict = {
+        "id": app.id,
+        "student_id": app.student_id,
+        "application_date": app.application_date,
+        "status": app.status,
+        "rejection_reason": app.rejection_reason,
+        "allocated_room_id": app.allocated_room_id,
+        "student_info": student
+    }
 
+    if app.status == models.ApplicationStatus.ALLOCATED and app.allocated_room_detail and app.allocated_room_detail.dormitory:
+        room = app.allocated_room_detail
+        dorm = room.dormitory
+        app_dict.update({
+            "allocated_dorm_name": dorm.name,
+            "allocated_dorm_address": dorm.address,
+            "allocated_room_number": room.room_number,
+            "allocated_floor_number": room.floor_number
+        })
+
+    return schemas.StaffApplicationResponse(**app_dict)
+
+
+def publish_application_change(app: models.Application, student: Optional[schemas.StudentInDB] = None):
+    if student is None:
+        _, student = student_cache.get(student_cache.id_key(app.student_id))
+    change_broker.publish("application", build_staff_application_response(app, student).model_dump(mode="json"))
+
+
+@query_budget(sqlite=1, postgres=0, per_chunk={"postgres": 1})
+def iter_application_export_rows(db_sqlite: Session, db_pg: Session,
+                                 status: Optional[models.ApplicationStatus] = None,
+                                 chunk_size: int = EXPORT_FETCH_CHUNK_SIZE) -> Iterator[Dict]:
+    query = select(
+        models.Application.id, models.Application.application_date, models.Application.status,
+        models.Application.rejection_reason, models.Application.student_id, models.Application.allocated_room_id,
+        models.Dormitory.name.label("dormitory_name"), models.Room.floor_number, models.Room.room_number
+    ).outerjoin(
+        models.Room, models.Room.id == models.Application.allocated_room_id
+    ).outerjoin(
+        models.Dormitory, models.Dormitory.id == models.Room.dormitory_id
+    )
+    if status is not None:
+        query = query.where(models.Application.status == status)
+    result = db_sqlite.execute(query.order_by(models.Application.id).execution_options(yield_per=chunk_size))
+
+    for partition in result.mappings().partitions():
+        student_ids = {row["student_id"] for row in partition}
+        students = {
+            student.id: student for student in db_pg.query(
+                models.Student.id, models.Student.student_ticket_number, models.Student.last_name,
+                models.Student.first_name, models.Student.middle_name, models.Student.group_id
+            ).filter(models.Student.id.in_(student_ids))
+        }
+        count_query_budget_chunk()
+        for row in partition:
+            student = students.get(row["student_id"])
+            yield {
+                **row,
+                "status": row["status"].value,
+                "student_ticket_number": student.student_ticket_number if student else None,
+                "student_last_name": student.last_name if student else None,
+                "student_first_name": student.first_name if student else None,
+                "student_middle_name": student.middle_name if student else None,
+                "group_id": student.group_id if student else None,
+            }
+
+
+@query_budget(sqlite=2)
 def create_dormitory(db_sqlite: Session, dormitory: schemas.DormitoryCreate) -> models.Dormitory:
+    begin_write(db_sqlite)
     db_dormitory = models.Dormitory(name=dormitory.name, address=dormitory.address)
     db_sqlite.add(db_dormitory)
+    db_sqlite.flush()
+    queue_change(db_sqlite, "dormitory", schemas.DormitorySummary(
+        id=db_dormitory.id, name=db_dormitory.name, address=db_dormitory.address,
+        room_count=0, capacity=0, occupancy=0
+    ).model_dump(mode="json"))
     db_sqlite.commit()
     db_sqlite.refresh(db_dormitory)
     return db_dormitory
 
 
+@query_budget(sqlite=9)
 def delete_dormitory(db_sqlite: Session, dormitory_id: int) -> Optional[models.Dormitory]:
+    begin_write(db_sqlite)
     dormitory = db_sqlite.query(models.Dormitory).filter(models.Dormitory.id == dormitory_id).first()
 
     if not dormitory:
@@ -127,102 +391,612 @@ def delete_dormitory(db_sqlite: Session, dormitory_id: int) -> Optional[models.D
         )
 
     db_sqlite.query(models.Room).filter(models.Room.dormitory_id == dormitory_id).delete(synchronize_session=False)
+    refresh_occupancy_summary(db_sqlite, [dormitory_id])
     db_sqlite.delete(dormitory)
+    queue_change(db_sqlite, "dormitory_deleted", {"id": dormitory_id})
     db_sqlite.commit()
+    free_room_index.refresh_dormitory(db_sqlite, dormitory_id)
     return dormitory
 
 
-def define_dormitory_structure(db_sqlite: Session, dormitory_id: int, rooms_data: List[schemas.RoomCreate]) -> Optional[
-    models.Dormitory]:
+def load_dormitory_rooms(db_sqlite: Session, dormitory_id: int) -> Dict[Tuple[int, str], Any]:
+    rows = db_sqlite.query(
+        models.Room.id, models.Room.floor_number, models.Room.room_number,
+        models.Room.capacity, models.Room.current_occupancy
+    ).filter(models.Room.dormitory_id == dormitory_id)
+    return {(row.floor_number, row.room_number): row for row in rows}
+
+
+def upsert_dormitory_rooms(db_sqlite: Session, dormitory_id: int, existing_rooms: Dict[Tuple[int, str], Any],
+                           seen_keys: set, rooms: Iterable[schemas.RoomBase]) -> Tuple[int, int]:
+    inserts = []
+    updates = []
+    for room in rooms:
+        key = (room.floor_number, room.room_number)
+        if key in seen_keys:
+            raise ValueError(f"Комната {room.room_number} на этаже {room.floor_number} указана несколько раз.")
+        seen_keys.add(key)
+        current = existing_rooms.get(key)
+        if current is None:
+            inserts.append({
+                "dormitory_id": dormitory_id,
+                "floor_number": room.floor_number,
+                "room_number": room.room_number,
+                "capacity": room.capacity,
+                "current_occupancy": 0
+            })
+        elif current.capacity != room.capacity:
+            if room.capacity < current.current_occupancy:
+                raise ValueError(
+                    f"Невозможно уменьшить вместимость комнаты {room.room_number} (этаж {room.floor_number}) "
+                    f"до {room.capacity}: в ней уже проживает {current.current_occupancy} чел."
+                )
+            updates.append({"room_id": current.id, "new_capacity": room.capacity})
+
+    if inserts:
+        try:
+            db_sqlite.execute(insert(models.Room), inserts)
+        except IntegrityError:
+            raise ValueError("Комнаты общежития были изменены во время обновления структуры. Повторите попытку.")
+    if updates:
+        room_table = models.Room.__table__
+        updated = db_sqlite.execute(
+            update(room_table).where(
+                room_table.c.id == bindparam("room_id"),
+                room_table.c.current_occupancy <= bindparam("new_capacity")
+            ).values(capacity=bindparam("new_capacity")),
+            updates
+        ).rowcount
+        if updated != len(updates):
+            raise ValueError("Заселенность комнат изменилась во время обновления структуры. Повторите попытку.")
+    return len(inserts), len(updates)
+
+
+def delete_missing_rooms(db_sqlite: Session, existing_rooms: Dict[Tuple[int, str], Any], seen_keys: set) -> int:
+    stale_rooms = [room for key, room in existing_rooms.items() if key not in seen_keys]
+    occupied_rooms = [room for room in stale_rooms if room.current_occupancy > 0]
+    if occupied_rooms:
+        raise ValueError(
+            f"Невозможно удалить комнаты с заселенными студентами: "
+            f"{', '.join(str(room.room_number) for room in occupied_rooms)}."
+        )
+
+    deleted = 0
+    stale_ids = [room.id for room in stale_rooms]
+    for chunk_start in range(0, len(stale_ids), ROOM_WRITE_CHUNK_SIZE):
+        chunk = stale_ids[chunk_start:chunk_start + ROOM_WRITE_CHUNK_SIZE]
+        if db_sqlite.query(models.Application.id).filter(
+                models.Application.allocated_room_id.in_(chunk),
+                models.Application.status == models.ApplicationStatus.ALLOCATED
+        ).first():
+            raise ValueError("Невозможно удалить комнаты, в которые распределены заявления.")
+        db_sqlite.query(models.Application).filter(
+            models.Application.allocated_room_id.in_(chunk)
+        ).update({"allocated_room_id": None}, synchronize_session=False)
+        deleted += db_sqlite.query(models.Room).filter(
+            models.Room.id.in_(chunk), models.Room.current_occupancy == 0
+        ).delete(synchronize_session=False)
+        count_query_budget_chunk()
+    if deleted != len(stale_ids):
+        raise ValueError("Заселенность комнат изменилась во время обновления структуры. Повторите попытку.")
+    return deleted
+
+
+def define_dormitory_structure(db_sqlite: Session, dormitory_id: int, rooms_data: List[schemas.RoomCreate],
+                               remove_missing: bool = True) -> Optional[models.Dormitory]:
+    begin_write(db_sqlite)
     dormitory = db_sqlite.query(models.Dormitory).filter(models.Dormitory.id == dormitory_id).first()
     if not dormitory:
         return None
 
-    db_sqlite.query(models.Room).filter(models.Room.dormitory_id == dormitory_id).delete()
-    db_sqlite.flush()
-
-    for room_data in rooms_data:
-        db_room = models.Room(**room_data.dict(), dormitory_id=dormitory_id, current_occupancy=0)
-        db_sqlite.add(db_room)
+    existing_rooms = load_dormitory_rooms(db_sqlite, dormitory_id)
+    seen_keys = set()
+    inserted, updated = upsert_dormitory_rooms(db_sqlite, dormitory_id, existing_rooms, seen_keys, rooms_data)
+    deleted = delete_missing_rooms(db_sqlite, existing_rooms, seen_keys) if remove_missing else 0
+    if inserted or updated or deleted:
+        refresh_occupancy_summary(db_sqlite, [dormitory_id])
+        queue_dormitory_changes(db_sqlite, [dormitory_id])
     db_sqlite.commit()
+    if inserted or updated or deleted:
+        free_room_index.refresh_dormitory(db_sqlite, dormitory_id)
     return db_sqlite.query(models.Dormitory).options(
         selectinload(models.Dormitory.rooms)
     ).filter(models.Dormitory.id == dormitory_id).first()
 
 
+def _dormitory_summaries_query(db_sqlite: Session, dormitory_ids: Optional[Iterable[int]] = None):
+    query = db_sqlite.query(
+        models.Dormitory.id, models.Dormitory.name, models.Dormitory.address,
+        func.coalesce(func.sum(models.OccupancySummary.rooms), 0).label("room_count"),
+        func.coalesce(func.sum(models.OccupancySummary.capacity), 0).label("capacity"),
+        func.coalesce(func.sum(models.OccupancySummary.occupancy), 0).label("occupancy")
+    ).outerjoin(
+        models.OccupancySummary, models.OccupancySummary.dormitory_id == models.Dormitory.id
+    )
+    if dormitory_ids is not None:
+        query = query.filter(models.Dormitory.id.in_(list(dormitory_ids)))
+    return query.group_by(models.Dormitory.id).order_by(models.Dormitory.id)
+
+
+@query_budget(sqlite=1)
+def get_dormitory_summaries(db_sqlite: Session,
+                            dormitory_ids: Optional[Iterable[int]] = None) -> List[schemas.DormitorySummary]:
+    return [schemas.DormitorySummary.model_validate(row)
+            for row in _dormitory_summaries_query(db_sqlite, dormitory_ids)]
+
+
+@query_budget(sqlite=1)
+def get_dormitory_summary_rows(db_sqlite: Session) -> List[Dict[str, Any]]:
+    return [row._asdict() for row in _dormitory_summaries_query(db_sqlite)]
+
+
+def queue_dormitory_changes(db_sqlite: Session, dormitory_ids: Iterable[int]):
+    for summary in get_dormitory_summaries(db_sqlite, dormitory_ids):
+        queue_change(db_sqlite, "dormitory", summary.model_dump(mode="json"))
+
+
+@query_budget(sqlite=1)
+def get_dormitory_rooms(db_sqlite: Session, dormitory_id: int) -> List[models.Room]:
+    return db_sqlite.query(models.Room).filter(
+        models.Room.dormitory_id == dormitory_id
+    ).order_by(models.Room.floor_number, models.Room.room_number, models.Room.id).all()
+
+
 def get_dormitories_structure(db_sqlite: Session) -> List[models.Dormitory]:
     return db_sqlite.query(models.Dormitory).options(
         selectinload(models.Dormitory.rooms)
     ).all()
 
 
-def import_dormitories_structure(db_sqlite: Session, structure_data: schemas.DormitoryStructureExport):
-    for dorm_data in structure_data.dormitories:
-        dormitory = db_sqlite.query(models.Dormitory).filter(models.Dormitory.name == dorm_data.name).first()
-        if not dormitory:
-            dormitory = models.Dormitory(name=dorm_data.name, address=dorm_data.address)
-            db_sqlite.add(dormitory)
-            db_sqlite.flush()
-        else:
-            dormitory.address = dorm_data.address
-            db_sqlite.query(models.Room).filter(models.Room.dormitory_id == dormitory.id).delete()
-            db_sqlite.flush()
-
-        for room_data in dorm_data.rooms:
-            db_room = models.Room(
-                dormitory_id=dormitory.id,
-                floor_number=room_data.floor_number,
-                room_number=room_data.room_number,
-                capacity=room_data.capacity,
-                current_occupancy=0
-            )
-            db_sqlite.add(db_room)
+@query_budget(sqlite=1)
+def get_structure_export_data(db_sqlite: Session) -> Dict[str, Any]:
+    rows = db_sqlite.execute(
+        select(
+            models.Dormitory.id, models.Dormitory.name, models.Dormitory.address,
+            models.Room.floor_number, models.Room.room_number, models.Room.capacity
+        ).outerjoin(
+            models.Room, models.Room.dormitory_id == models.Dormitory.id
+        ).order_by(models.Dormitory.id, models.Room.id)
+    ).all()
+    dormitories = {}
+    for dormitory_id, name, address, floor_number, room_number, capacity in rows:
+        dormitory = dormitories.get(dormitory_id)
+        if dormitory is None:
+            dormitory = dormitories[dormitory_id] = {"name": name, "address": address, "id": dormitory_id, "rooms": []}
+        if room_number is not None:
+            dormitory["rooms"].append({"floor_number": floor_number, "room_number": room_number, "capacity": capacity})
+    return {"dormitories": list(dormitories.values())}
+
+
+@query_budget(sqlite=1)
+def iter_structure_export_rows(db_sqlite: Session, chunk_size: int = EXPORT_FETCH_CHUNK_SIZE) -> Iterator[Dict]:
+    result = db_sqlite.execute(
+        select(
+            models.Dormitory.name.label("dormitory_name"), models.Dormitory.address.label("dormitory_address"),
+            models.Room.floor_number, models.Room.room_number, models.Room.capacity
+        ).outerjoin(
+            models.Room, models.Room.dormitory_id == models.Dormitory.id
+        ).order_by(
+            models.Dormitory.id, models.Room.floor_number, models.Room.room_number, models.Room.id
+        ).execution_options(yield_per=chunk_size)
+    )
+    for partition in result.mappings().partitions():
+        yield from (dict(row) for row in partition)
+
+
+def import_dormitories_structure(db_sqlite: Session, structure_data: schemas.DormitoryStructureExport,
+                                 progress: Optional[ProgressCallback] = None, remove_missing: bool = True):
+    return import_structure_rows(db_sqlite, validate_rows_in_chunks(iter_rows_from_structure(structure_data)), progress,
+                                 remove_missing)
+
+
+@query_budget(sqlite=3, per_chunk={"sqlite": 4})
+def import_structure_rows(db_sqlite: Session, row_chunks: Iterable[List[schemas.StructureImportRow]],
+                          progress: Optional[ProgressCallback] = None, remove_missing: bool = True):
+    begin_write(db_sqlite)
+    started = time.perf_counter()
+    dormitory_ids = {}
+    dormitory_rooms = {}
+    dormitory_seen_keys = {}
+    changed_dormitory_ids = set()
+    imported_rows = 0
+    imported_rooms = 0
+    inserted_rooms = 0
+    updated_rooms = 0
+    deleted_rooms = 0
+
+    for chunk in row_chunks:
+        chunk_rooms = {}
+        for row in chunk:
+            if row.dormitory_name not in dormitory_ids:
+                dormitory = db_sqlite.query(models.Dormitory).filter(models.Dormitory.name == row.dormitory_name).first()
+                if not dormitory:
+                    dormitory = models.Dormitory(name=row.dormitory_name, address=row.dormitory_address)
+                    db_sqlite.add(dormitory)
+                    db_sqlite.flush()
+                    dormitory_rooms[dormitory.id] = {}
+                    changed_dormitory_ids.add(dormitory.id)
+                else:
+                    if dormitory.address != row.dormitory_address:
+                        dormitory.address = row.dormitory_address
+                        changed_dormitory_ids.add(dormitory.id)
+                    dormitory_rooms[dormitory.id] = load_dormitory_rooms(db_sqlite, dormitory.id)
+                dormitory_ids[row.dormitory_name] = dormitory.id
+                dormitory_seen_keys[dormitory.id] = set()
+                count_query_budget_chunk()
+            if row.has_room:
+                chunk_rooms.setdefault(dormitory_ids[row.dormitory_name], []).append(row)
+
+        for dormitory_id, rooms in chunk_rooms.items():
+            inserted, updated = upsert_dormitory_rooms(db_sqlite, dormitory_id, dormitory_rooms[dormitory_id],
+                                                       dormitory_seen_keys[dormitory_id], rooms)
+            count_query_budget_chunk()
+            if inserted or updated:
+                changed_dormitory_ids.add(dormitory_id)
+            inserted_rooms += inserted
+            updated_rooms += updated
+            imported_rooms += len(rooms)
+
+        imported_rows += len(chunk)
+        if progress:
+            progress(imported_rows, None)
+
+    if remove_missing:
+        for dormitory_id, existing_rooms in dormitory_rooms.items():
+            deleted = delete_missing_rooms(db_sqlite, existing_rooms, dormitory_seen_keys[dormitory_id])
+            if deleted:
+                changed_dormitory_ids.add(dormitory_id)
+            deleted_rooms += deleted
+
+    if changed_dormitory_ids:
+        db_sqlite.flush()
+        refresh_occupancy_summary(db_sqlite, changed_dormitory_ids)
+        queue_dormitory_changes(db_sqlite, changed_dormitory_ids)
     db_sqlite.commit()
+    for dormitory_id in changed_dormitory_ids:
+        free_room_index.refresh_dormitory(db_sqlite, dormitory_id)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "message": "Структура общежитий успешно импортирована.",
+        "dormitories": len(dormitory_ids),
+        "rooms": imported_rooms,
+        "rooms_inserted": inserted_rooms,
+        "rooms_updated": updated_rooms,
+        "rooms_deleted": deleted_rooms,
+        "rows": imported_rows,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "rows_per_second": round(imported_rows / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def claim_room_slots(db_sqlite: Session, room_id: int, count: int = 1) -> bool:
+    claimed_room = db_sqlite.execute(
+        update(models.Room).where(
+            models.Room.id == room_id,
+            models.Room.current_occupancy + count <= models.Room.capacity
+        ).values(
+            current_occupancy=models.Room.current_occupancy + count
+        ).returning(
+            models.Room.dormitory_id, models.Room.capacity - models.Room.current_occupancy, models.Room.floor_number
+        ).execution_options(synchronize_session=False)
+    ).first()
+    if claimed_room is None:
+        return False
+    shift_occupancy_summary(db_sqlite, claimed_room[0], claimed_room[2], count)
+    queue_free_slots(db_sqlite, room_id, claimed_room[0], claimed_room[1])
+    return True
+
+
+def release_room_slot(db_sqlite: Session, room_id: int, count: int = 1):
+    released_room = db_sqlite.execute(
+        update(models.Room).where(
+            models.Room.id == room_id,
+            models.Room.current_occupancy >= count
+        ).values(
+            current_occupancy=models.Room.current_occupancy - count
+        ).returning(
+            models.Room.dormitory_id, models.Room.capacity - models.Room.current_occupancy, models.Room.floor_number
+        ).execution_options(synchronize_session=False)
+    ).first()
+    if released_room is not None:
+        shift_occupancy_summary(db_sqlite, released_room[0], released_room[2], -count)
+        queue_free_slots(db_sqlite, room_id, released_room[0], released_room[1])
+
+
+def shift_room_slots(db_sqlite: Session, room_deltas: Dict[int, int]) -> set:
+    shifted_ids = set()
+    room_ids = list(room_deltas)
+    for chunk_start in range(0, len(room_ids), ROOM_WRITE_CHUNK_SIZE):
+        chunk = room_ids[chunk_start:chunk_start + ROOM_WRITE_CHUNK_SIZE]
+        delta = case({room_id: room_deltas[room_id] for room_id in chunk}, value=models.Room.id)
+        shifted_rooms = db_sqlite.execute(
+            update(models.Room).where(
+                models.Room.id.in_(chunk),
+                models.Room.current_occupancy + delta <= models.Room.capacity,
+                models.Room.current_occupancy + delta >= 0
+            ).values(
+                current_occupancy=models.Room.current_occupancy + delta
+            ).returning(
+                models.Room.id, models.Room.dormitory_id, models.Room.floor_number,
+                models.Room.capacity - models.Room.current_occupancy
+            ).execution_options(synchronize_session=False)
+        ).all()
+        floor_deltas = Counter()
+        for room_id, dormitory_id, floor_number, free_slots in shifted_rooms:
+            shifted_ids.add(room_id)
+            floor_deltas[(dormitory_id, floor_number)] += room_deltas[room_id]
+            queue_free_slots(db_sqlite, room_id, dormitory_id, free_slots)
+        shift_occupancy_summaries(db_sqlite, floor_deltas)
+        count_query_budget_chunk()
+    return shifted_ids
+
+
+def shift_occupancy_summaries(db_sqlite: Session, floor_deltas: Dict[Tuple[int, int], int]):
+    if not floor_deltas:
+        return
+    summary = models.OccupancySummary
+    db_sqlite.execute(
+        update(summary).where(
+            tuple_(summary.dormitory_id, summary.floor_number).in_(list(floor_deltas))
+        ).values(
+            occupancy=summary.occupancy + case(*[
+                (and_(summary.dormitory_id == dormitory_id, summary.floor_number == floor_number), delta)
+                for (dormitory_id, floor_number), delta in floor_deltas.items()
+            ], else_=0)
+        ).execution_options(synchronize_session=False)
+    )
+    dormitory_deltas = Counter()
+    for (dormitory_id, _), delta in floor_deltas.items():
+        dormitory_deltas[dormitory_id] += delta
+    for dormitory_id, delta in dormitory_deltas.items():
+        queue_occupancy_change(db_sqlite, dormitory_id, delta)
+
+
+def shift_occupancy_summary(db_sqlite: Session, dormitory_id: int, floor_number: int, delta: int):
+    db_sqlite.execute(
+        update(models.OccupancySummary).where(
+            models.OccupancySummary.dormitory_id == dormitory_id,
+            models.OccupancySummary.floor_number == floor_number
+        ).values(
+            occupancy=models.OccupancySummary.occupancy + delta
+        ).execution_options(synchronize_session=False)
+    )
+    queue_occupancy_change(db_sqlite, dormitory_id, delta)
+
+
+def refresh_occupancy_summary(db_sqlite: Session, dormitory_ids: Optional[Iterable[int]] = None):
+    summary_delete = delete(models.OccupancySummary)
+    floor_totals = select(
+        models.Room.dormitory_id, models.Room.floor_number, func.count(models.Room.id),
+        func.coalesce(func.sum(models.Room.capacity), 0), func.coalesce(func.sum(models.Room.current_occupancy), 0)
+    ).group_by(models.Room.dormitory_id, models.Room.floor_number)
+    if dormitory_ids is not None:
+        dormitory_ids = list(dormitory_ids)
+        summary_delete = summary_delete.where(models.OccupancySummary.dormitory_id.in_(dormitory_ids))
+        floor_totals = floor_totals.where(models.Room.dormitory_id.in_(dormitory_ids))
+    db_sqlite.execute(summary_delete.execution_options(synchronize_session=False))
+    db_sqlite.execute(insert(models.OccupancySummary).from_select(
+        ["dormitory_id", "floor_number", "rooms", "capacity", "occupancy"], floor_totals
+    ))
+
+
+def ensure_occupancy_summary(db_sqlite: Session):
+    if db_sqlite.query(models.OccupancySummary.dormitory_id).first() or not db_sqlite.query(models.Room.id).first():
+        return
+    begin_write(db_sqlite)
+    try:
+        refresh_occupancy_summary(db_sqlite)
+        db_sqlite.commit()
+    except IntegrityError:
+        db_sqlite.rollback()
+
+
+@query_budget(sqlite=1)
+def get_occupancy_summary(db_sqlite: Session) -> schemas.OccupancySummaryResponse:
+    rows = db_sqlite.query(
+        models.Dormitory.id, models.Dormitory.name, models.OccupancySummary.floor_number,
+        models.OccupancySummary.rooms, models.OccupancySummary.capacity, models.OccupancySummary.occupancy
+    ).outerjoin(
+        models.OccupancySummary, models.OccupancySummary.dormitory_id == models.Dormitory.id
+    ).order_by(models.Dormitory.id, models.OccupancySummary.floor_number).all()
+
+    dormitories = {}
+    for row in rows:
+        dormitory = dormitories.get(row.id)
+        if dormitory is None:
+            dormitory = dormitories[row.id] = schemas.OccupancyDormitorySummary(
+                dormitory_id=row.id, dormitory_name=row.name, rooms=0, capacity=0, occupancy=0, free_beds=0, floors=[]
+            )
+        if row.floor_number is None:
+            continue
+        free_beds = max(row.capacity - row.occupancy, 0)
+        dormitory.floors.append(schemas.OccupancyFloorSummary(
+            floor_number=row.floor_number, rooms=row.rooms, capacity=row.capacity, occupancy=row.occupancy,
+            free_beds=free_beds
+        ))
+        dormitory.rooms += row.rooms
+        dormitory.capacity += row.capacity
+        dormitory.occupancy += row.occupancy
+        dormitory.free_beds += free_beds
+
+    summaries = list(dormitories.values())
+    return schemas.OccupancySummaryResponse(
+        rooms=sum(dormitory.rooms for dormitory in summaries),
+        capacity=sum(dormitory.capacity for dormitory in summaries),
+        occupancy=sum(dormitory.occupancy for dormitory in summaries),
+        free_beds=sum(dormitory.free_beds for dormitory in summaries),
+        dormitories=summaries
+    )
 
 
+@query_budget(sqlite=6)
+def reconcile_room_occupancy(db_sqlite: Session, fix: bool = False) -> schemas.OccupancyReconciliationResponse:
+    if fix:
+        begin_write(db_sqlite)
+    actual_occupancy = func.count(models.Application.id)
+    drifted_rooms = db_sqlite.query(
+        models.Room.id, models.Room.dormitory_id, models.Room.floor_number, models.Room.room_number,
+        models.Room.capacity, models.Room.current_occupancy, actual_occupancy.label("actual_occupancy")
+    ).outerjoin(
+        models.Application, and_(
+            models.Application.allocated_room_id == models.Room.id,
+            models.Application.status == models.ApplicationStatus.ALLOCATED
+        )
+    ).group_by(models.Room.id).having(
+        func.coalesce(models.Room.current_occupancy, 0) != actual_occupancy
+    ).all()
+
+    if fix and drifted_rooms:
+        db_sqlite.execute(update(models.Room), [
+            {"id": room.id, "current_occupancy": room.actual_occupancy} for room in drifted_rooms
+        ])
+        refresh_occupancy_summary(db_sqlite, {room.dormitory_id for room in drifted_rooms})
+        queue_dormitory_changes(db_sqlite, {room.dormitory_id for room in drifted_rooms})
+        db_sqlite.commit()
+        free_room_index.refresh_rooms(db_sqlite, [room.id for room in drifted_rooms])
+
+    return schemas.OccupancyReconciliationResponse(
+        drifted_rooms=len(drifted_rooms),
+        fixed=fix and bool(drifted_rooms),
+        rooms=[
+            schemas.RoomOccupancyDrift(
+                room_id=room.id, dormitory_id=room.dormitory_id, floor_number=room.floor_number,
+                room_number=room.room_number, capacity=room.capacity,
+                recorded_occupancy=room.current_occupancy or 0, actual_occupancy=room.actual_occupancy
+            ) for room in drifted_rooms
+        ]
+    )
+
+
+def first_free_room_id(db_sqlite: Session) -> Optional[int]:
+    if free_room_index.enabled:
+        free_room_index.ensure_built(db_sqlite)
+        return free_room_index.first()
+    return db_sqlite.scalar(
+        select(models.Room.id).where(
+            models.Room.current_occupancy < models.Room.capacity
+        ).order_by(models.Room.dormitory_id, models.Room.id).limit(1)
+    )
+
+
+def claim_first_free_room(db_sqlite: Session) -> Optional[int]:
+    for _ in range(ROOM_ALLOCATION_RETRIES):
+        room_id = first_free_room_id(db_sqlite)
+        if room_id is None:
+            return None
+        if claim_room_slots(db_sqlite, room_id):
+            return room_id
+        free_room_index.refresh_rooms(db_sqlite, [room_id])
+    return None
+
+
+def get_group_faculties_pg(db_pg: Session, group_ids: Iterable[int]) -> Dict[int, int]:
+    group_ids = list({group_id for group_id in group_ids if group_id is not None})
+    if not group_ids:
+        return {}
+    return dict(db_pg.query(models.Group.id, models.Group.faculty_id).filter(models.Group.id.in_(group_ids)).all())
+
+
+def build_applicants(db_pg: Session, applications: List[Tuple[int, int]], strategy: AllocationStrategy) -> List[
+    Applicant]:
+    if not strategy.uses_groups:
+        return [Applicant(application_id, student_id) for application_id, student_id in applications]
+
+    students = get_students_by_ids_pg(db_pg, (student_id for _, student_id in applications))
+    faculties = get_group_faculties_pg(db_pg, (student.group_id for student in students.values()))
+    applicants = []
+    for application_id, student_id in applications:
+        student = students.get(student_id)
+        group_id = student.group_id if student else None
+        applicants.append(Applicant(application_id, student_id, group_id, faculties.get(group_id)))
+    return applicants
+
+
+def allocate_applicants(db_sqlite: Session, applicants: List[Applicant], strategy: AllocationStrategy) -> Dict[int, int]:
+    allocations = {}
+    unplaced_applicants = applicants
+    for _ in range(ROOM_ALLOCATION_RETRIES):
+        planned_rooms = {}
+        for application_id, room_id in strategy.assign(unplaced_applicants, load_room_slots(db_sqlite)).items():
+            planned_rooms.setdefault(room_id, []).append(application_id)
+
+        claimed_ids = shift_room_slots(db_sqlite, {room_id: len(application_ids)
+                                                   for room_id, application_ids in planned_rooms.items()})
+        for room_id in claimed_ids:
+            for application_id in planned_rooms[room_id]:
+                allocations[application_id] = room_id
+
+        if len(claimed_ids) == len(planned_rooms):
+            break
+        unplaced_applicants = [applicant for applicant in unplaced_applicants
+                               if applicant.application_id not in allocations]
+    return allocations
+
+
+def transition_application(db_sqlite: Session, application: models.Application, **values) -> bool:
+    return db_sqlite.execute(
+        update(models.Application).where(
+            models.Application.id == application.id,
+            models.Application.status == application.status,
+            models.Application.allocated_room_id.is_not_distinct_from(application.allocated_room_id)
+        ).values(**values).returning(models.Application.id).execution_options(synchronize_session=False)
+    ).first() is not None
+
+
+def raise_application_changed(db_sqlite: Session, application_id: int):
+    db_sqlite.rollback()
+    raise ValueError(f"Заявление с номером {application_id} было изменено другим пользователем. "
+                     "Обновите данные и повторите действие.")
+
+
+@query_budget(sqlite=6 + ROOM_CLAIM_RETRY_STATEMENTS, postgres=3)
 def update_application_status(db_sqlite: Session, db_pg: Session, application_id: int,
                               status_update: schemas.ApplicationStatusUpdate) -> Optional[models.Application]:
-    application = db_sqlite.query(models.Application).options(
-        selectinload(models.Application.allocated_room_detail)
-    ).filter(models.Application.id == application_id).first()
+    begin_write(db_sqlite)
+    application = db_sqlite.query(models.Application).filter(models.Application.id == application_id).first()
     if not application:
         return None
 
+    allocated_room_id = application.allocated_room_id
     if application.status == models.ApplicationStatus.ALLOCATED and \
             status_update.status != models.ApplicationStatus.ALLOCATED and \
-            application.allocated_room_detail:
-        application.allocated_room_detail.current_occupancy = max(0,
-                                                                  application.allocated_room_detail.current_occupancy - 1)
-        application.allocated_room_id = None
-        application.rejection_reason = None
+            application.allocated_room_id:
+        release_room_slot(db_sqlite, application.allocated_room_id)
+        allocated_room_id = None
 
     if status_update.status == models.ApplicationStatus.APPROVED:
-        available_room = db_sqlite.query(models.Room).filter(
-            models.Room.current_occupancy < models.Room.capacity
-        ).order_by(models.Room.dormitory_id, models.Room.id).first()
+        strategy = get_allocation_strategy()
+        if isinstance(strategy, FirstFitStrategy):
+            allocated_room_id = claim_first_free_room(db_sqlite)
+        else:
+            applicants = build_applicants(db_pg, [(application.id, application.student_id)], strategy)
+            allocated_room_id = allocate_applicants(db_sqlite, applicants, strategy).get(application.id)
 
-        if available_room:
-            application.status = models.ApplicationStatus.ALLOCATED
-            application.allocated_room_id = available_room.id
-            available_room.current_occupancy += 1
-            application.rejection_reason = None
+        if allocated_room_id:
+            new_status, rejection_reason = models.ApplicationStatus.ALLOCATED, None
         else:
-            application.status = models.ApplicationStatus.APPROVED
-            application.rejection_reason = "Одобрено, но свободных комнат на данный момент нет. Ожидает распределения."
+            new_status = models.ApplicationStatus.APPROVED
+            rejection_reason = "Одобрено, но свободных комнат на данный момент нет. Ожидает распределения."
     else:
-        application.status = status_update.status
-        application.rejection_reason = status_update.rejection_reason
+        new_status, rejection_reason = status_update.status, status_update.rejection_reason
+
+    if not transition_application(db_sqlite, application, status=new_status, allocated_room_id=allocated_room_id,
+                                  rejection_reason=rejection_reason):
+        raise_application_changed(db_sqlite, application_id)
 
     db_sqlite.commit()
-    return db_sqlite.query(models.Application).options(
-        selectinload(models.Application.allocated_room_detail).selectinload(models.Room.dormitory)
+    application = db_sqlite.query(models.Application).options(
+        joinedload(models.Application.allocated_room_detail).joinedload(models.Room.dormitory)
     ).filter(models.Application.id == application_id).first()
+    publish_application_change(application, get_student_by_id_pg(db_pg, application.student_id))
+    return application
 
 
+@query_budget(sqlite=8)
 def allocate_student_to_room(db_sqlite: Session, application_id: int, room_id: int) -> Optional[models.Application]:
-    application = db_sqlite.query(models.Application).options(
-        selectinload(models.Application.allocated_room_detail)
-    ).filter(models.Application.id == application_id).first()
+    begin_write(db_sqlite)
+    application = db_sqlite.query(models.Application).filter(models.Application.id == application_id).first()
 
     if not application:
         return None
@@ -232,144 +1006,273 @@ def allocate_student_to_room(db_sqlite: Session, application_id: int, room_id: i
             f"Заявление с номером {application_id} не находится в статусе '{models.ApplicationStatus.ALLOCATED}'. "
             "Изменить место заселения можно только для уже заселенных студентов.")
 
-    new_room = db_sqlite.query(models.Room).filter(models.Room.id == room_id).first()
+    new_room = db_sqlite.query(models.Room).options(
+        joinedload(models.Room.dormitory)
+    ).filter(models.Room.id == room_id).first()
 
     if not new_room:
         raise ValueError(f"Комната с идентификатором {room_id} не найдена.")
 
-    if new_room.current_occupancy >= new_room.capacity:
-        raise ValueError(
-            f"Комната {new_room.dormitory.name} (эт.{new_room.floor_number}, к.{new_room.room_number}) уже полностью занята.")
+    if application.allocated_room_id != new_room.id:
+        if not claim_room_slots(db_sqlite, new_room.id):
+            db_sqlite.rollback()
+            raise ValueError(
+                f"Комната {new_room.dormitory.name} (эт.{new_room.floor_number}, к.{new_room.room_number}) уже полностью занята.")
+        if application.allocated_room_id:
+            release_room_slot(db_sqlite, application.allocated_room_id)
 
-    if application.allocated_room_id:
-        old_room = application.allocated_room_detail
-        if old_room and old_room.id != new_room.id:
-            old_room.current_occupancy = max(0, old_room.current_occupancy - 1)
-            db_sqlite.add(old_room)
+    if not transition_application(db_sqlite, application, allocated_room_id=new_room.id,
+                                  status=models.ApplicationStatus.ALLOCATED, rejection_reason=None):
+        raise_application_changed(db_sqlite, application_id)
 
-    application.allocated_room_id = new_room.id
-    new_room.current_occupancy += 1
-    application.status = models.ApplicationStatus.ALLOCATED
-    application.rejection_reason = None
-
-    db_sqlite.add(application)
-    db_sqlite.add(new_room)
     db_sqlite.commit()
 
-    return db_sqlite.query(models.Application).options(
-        selectinload(models.Application.allocated_room_detail).selectinload(models.Room.dormitory)
+    application = db_sqlite.query(models.Application).options(
+        joinedload(models.Application.allocated_room_detail).joinedload(models.Room.dormitory)
     ).filter(models.Application.id == application_id).first()
+    publish_application_change(application)
+    return application
 
 
+@query_budget(sqlite=1)
 def get_available_rooms(db_sqlite: Session) -> List[dict]:
-    rooms = db_sqlite.query(models.Room).options(
-        selectinload(models.Room.dormitory)
-    ).filter(
-        models.Room.current_occupancy < models.Room.capacity
-    ).order_by(
-        models.Room.dormitory_id, models.Room.floor_number, models.Room.room_number
+    rows = db_sqlite.execute(
+        select(
+            models.Room.id, models.Room.room_number, models.Room.floor_number, models.Room.capacity,
+            models.Room.current_occupancy, models.Room.dormitory_id,
+            models.Dormitory.name.label("dormitory_name"), models.Dormitory.address.label("dormitory_address")
+        ).outerjoin(
+            models.Dormitory, models.Dormitory.id == models.Room.dormitory_id
+        ).where(
+            models.Room.current_occupancy < models.Room.capacity
+        ).order_by(
+            models.Room.dormitory_id, models.Room.floor_number, models.Room.room_number
+        )
     ).all()
-
-    return [
-        {
-            "id": room.id,
-            "room_number": room.room_number,
-            "floor_number": room.floor_number,
-            "capacity": room.capacity,
-            "current_occupancy": room.current_occupancy,
-            "dormitory_id": room.dormitory_id,
-            "dormitory_name": room.dormitory.name if room.dormitory else None,
-            "dormitory_address": room.dormitory.address if room.dormitory else None,
-        }
-        for room in rooms
-    ]
+    return [row._asdict() for row in rows]
 
 
-def get_dormitory_details(db_sqlite: Session, db_pg: Session, dormitory_id: int) -> Optional[
-    schemas.DormitoryDetailsResponse]:
-    dormitory = db_sqlite.query(models.Dormitory).options(
-        selectinload(models.Dormitory.rooms).selectinload(models.Room.allocations)
-    ).filter(models.Dormitory.id == dormitory_id).first()
+@query_budget(sqlite=4)
+def get_dormitory_details_data(db_sqlite: Session, db_pg: Session, dormitory_id: int,
+                               floor: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    dormitory = db_sqlite.execute(
+        select(models.Dormitory.id, models.Dormitory.name, models.Dormitory.address).where(
+            models.Dormitory.id == dormitory_id
+        )
+    ).first()
 
     if not dormitory:
         return None
 
-    rooms_details = []
-    for room_orm in dormitory.rooms:
-        students_in_room = []
-        allocated_applications = [
-            app for app in room_orm.allocations
-            if app.status == models.ApplicationStatus.ALLOCATED and app.allocated_room_id == room_orm.id
-        ]
+    floors = db_sqlite.scalars(
+        select(models.Room.floor_number).where(
+            models.Room.dormitory_id == dormitory_id
+        ).distinct().order_by(models.Room.floor_number)
+    ).all()
 
-        student_ids = [app.student_id for app in allocated_applications]
-        if student_ids:
-            pg_students = db_pg.query(models.Student).filter(models.Student.id.in_(student_ids)).all()
-            pg_students_map = {student.id: student for student in pg_students}
-
-            for app in allocated_applications:
-                student_orm = pg_students_map.get(app.student_id)
-                if student_orm:
-                    students_in_room.append(schemas.StudentInDB.from_orm(student_orm))
-
-        rooms_details.append(schemas.RoomDetails(
-            id=room_orm.id,
-            floor_number=room_orm.floor_number,
-            room_number=room_orm.room_number,
-            capacity=room_orm.capacity,
-            current_occupancy=room_orm.current_occupancy,
-            occupants=students_in_room
-        ))
+    room_criteria = [models.Room.dormitory_id == dormitory_id]
+    if floor is not None:
+        room_criteria.append(models.Room.floor_number == floor)
+    rooms = db_sqlite.execute(
+        select(
+            models.Room.id, models.Room.floor_number, models.Room.room_number,
+            models.Room.capacity, models.Room.current_occupancy
+        ).where(*room_criteria).order_by(models.Room.floor_number, models.Room.room_number)
+    ).all()
 
-    rooms_details.sort(key=lambda x: (x.floor_number, x.room_number))
+    allocated_applications = db_sqlite.execute(
+        select(models.Application.allocated_room_id, models.Application.student_id).where(
+            models.Application.allocated_room_id.in_(select(models.Room.id).where(*room_criteria)),
+            models.Application.status == models.ApplicationStatus.ALLOCATED
+        ).order_by(models.Application.allocated_room_id, models.Application.id)
+    ).all()
 
-    return schemas.DormitoryDetailsResponse(
-        id=dormitory.id,
-        name=dormitory.name,
-        address=dormitory.address,
-        rooms=rooms_details
-    )
+    students = get_students_by_ids_pg(db_pg, (app.student_id for app in allocated_applications))
+    student_rows = {student_id: student.model_dump() for student_id, student in students.items() if student}
+
+    occupants_by_room = {}
+    for app in allocated_applications:
+        student_row = student_rows.get(app.student_id)
+        if student_row:
+            occupants_by_room.setdefault(app.allocated_room_id, []).append(student_row)
+
+    return {
+        "id": dormitory.id,
+        "name": dormitory.name,
+        "address": dormitory.address,
+        "floors": floors,
+        "rooms": [{**room._asdict(), "occupants": occupants_by_room.get(room.id, [])} for room in rooms]
+    }
 
 
-def process_applications_auto(db_sqlite: Session, db_pg: Session):
-    pending_applications = db_sqlite.query(models.Application).filter(
-        models.Application.status == models.ApplicationStatus.PENDING
-    ).options(
-        selectinload(models.Application.allocated_room_detail)
-    ).all()
+def get_dormitory_details(db_sqlite: Session, db_pg: Session, dormitory_id: int, floor: Optional[int] = None) -> Optional[
+    schemas.DormitoryDetailsResponse]:
+    details = get_dormitory_details_data(db_sqlite, db_pg, dormitory_id, floor)
+    return schemas.DormitoryDetailsResponse.model_validate(details) if details else None
 
-    processed_count = 0
 
+def classify_pending_applications(pending_applications, students: Dict[int, schemas.StudentInDB]):
+    rejections = []
+    foreign_applications = []
     for app in pending_applications:
-        student = get_student_by_id_pg(db_pg, student_id=app.student_id)
+        student = students.get(app.student_id)
         if not student:
-            app.status = models.ApplicationStatus.REJECTED
-            app.rejection_reason = "Запись о студенте не найдена во внешней БД."
-            processed_count += 1
-            continue
-
-        if student.is_foreign:
-            available_room = db_sqlite.query(models.Room).filter(
-                models.Room.current_occupancy < models.Room.capacity
-            ).order_by(models.Room.dormitory_id, models.Room.id).first()
-
-            if available_room:
-                app.status = models.ApplicationStatus.ALLOCATED
-                app.allocated_room_id = available_room.id
-                available_room.current_occupancy += 1
-                app.rejection_reason = None
-            else:
-                app.status = models.ApplicationStatus.APPROVED
-                app.rejection_reason = "Соответствует критериям и одобрено, но свободных комнат на данный момент нет. Ожидает распределения."
+            rejections.append({
+                "id": app.id,
+                "status": models.ApplicationStatus.REJECTED,
+                "rejection_reason": "Запись о студенте не найдена во внешней БД."
+            })
+        elif student.is_foreign:
+            foreign_applications.append(app)
         else:
-            app.status = models.ApplicationStatus.REJECTED
-            app.rejection_reason = "Студент не является иногородним."
+            rejections.append({
+                "id": app.id,
+                "status": models.ApplicationStatus.REJECTED,
+                "rejection_reason": "Студент не является иногородним."
+            })
+    return rejections, foreign_applications
+
+
+def get_pending_applications(db_sqlite: Session):
+    return db_sqlite.query(models.Application.id, models.Application.student_id).filter(
+        models.Application.status == models.ApplicationStatus.PENDING
+    ).order_by(models.Application.application_date, models.Application.id).all()
+
+
+def simulate_applications_auto(db_sqlite: Session, db_pg: Session, strategy_name: Optional[str] = None):
+    strategy = get_allocation_strategy(strategy_name)
+    timings = {}
+    phase_started = time.perf_counter()
+    pending_applications = get_pending_applications(db_sqlite)
+    rooms = load_room_slots(db_sqlite)
+    dormitory_names = dict(db_sqlite.query(models.Dormitory.id, models.Dormitory.name).all())
+    timings["load_snapshot"] = time.perf_counter() - phase_started
+
+    phase_started = time.perf_counter()
+    students = get_students_by_ids_pg(db_pg, {app.student_id for app in pending_applications})
+    rejections, foreign_applications = classify_pending_applications(pending_applications, students)
+    applicants = build_applicants(db_pg, [(app.id, app.student_id) for app in foreign_applications], strategy)
+    timings["check_students"] = time.perf_counter() - phase_started
+
+    phase_started = time.perf_counter()
+    allocations = strategy.assign(applicants, rooms)
+    timings["assign"] = time.perf_counter() - phase_started
+
+    dormitories = {}
+    for room in rooms:
+        fill = dormitories.setdefault(room.dormitory_id, {
+            "dormitory_id": room.dormitory_id,
+            "dormitory_name": dormitory_names.get(room.dormitory_id),
+            "capacity": 0,
+            "occupancy_before": 0,
+            "occupancy_after": 0
+        })
+        fill["capacity"] += room.capacity
+        fill["occupancy_before"] += room.occupancy
+        fill["occupancy_after"] += room.capacity - room.free_slots
+    for fill in dormitories.values():
+        fill["fill_ratio_after"] = round(fill["occupancy_after"] / fill["capacity"], 4) if fill["capacity"] else None
+
+    return {
+        "strategy": strategy.name,
+        "pending_count": len(pending_applications),
+        "allocated_count": len(allocations),
+        "waiting_count": len(foreign_applications) - len(allocations),
+        "rejected_count": len(rejections),
+        "allocations": [
+            {"application_id": application_id, "room_id": room_id} for application_id, room_id in allocations.items()
+        ],
+        "rejections": [
+            {"application_id": rejection["id"], "rejection_reason": rejection["rejection_reason"]}
+            for rejection in rejections
+        ],
+        "dormitories": list(dormitories.values()),
+        "timings_ms": {phase: round(seconds * 1000, 2) for phase, seconds in timings.items()}
+    }
+
 
-        processed_count += 1
+def update_pending_applications(db_sqlite: Session, application_updates: List[Dict[str, Any]],
+                                progress: Optional[ProgressCallback] = None) -> set:
+    updated_ids = set()
+    for chunk_start in range(0, len(application_updates), APPLICATION_WRITE_CHUNK_SIZE):
+        chunk = application_updates[chunk_start:chunk_start + APPLICATION_WRITE_CHUNK_SIZE]
+        values = {}
+        for column in (models.Application.status, models.Application.allocated_room_id,
+                       models.Application.rejection_reason):
+            values[column.key] = case(
+                {item["id"]: literal(item.get(column.key), column.type) for item in chunk},
+                value=models.Application.id
+            )
+        updated_ids.update(db_sqlite.scalars(
+            update(models.Application).where(
+                models.Application.id.in_([item["id"] for item in chunk]),
+                models.Application.status == models.ApplicationStatus.PENDING
+            ).values(**values).returning(models.Application.id).execution_options(synchronize_session=False)
+        ))
+        count_query_budget_chunk()
+        if progress:
+            progress(chunk_start + len(chunk), len(application_updates))
+    return updated_ids
+
+
+@query_budget(sqlite=1 + ROOM_ALLOCATION_RETRIES, postgres=1, per_chunk={"sqlite": 2, "postgres": 1})
+def process_applications_auto(db_sqlite: Session, db_pg: Session, strategy_name: Optional[str] = None,
+                              progress: Optional[ProgressCallback] = None):
+    begin_write(db_sqlite)
+    strategy = get_allocation_strategy(strategy_name)
+    timings = {}
+    phase_started = time.perf_counter()
+
+    pending_applications = get_pending_applications(db_sqlite)
+    timings["load_applications"] = time.perf_counter() - phase_started
+    if progress:
+        progress(0, len(pending_applications))
+
+    phase_started = time.perf_counter()
+    students = get_students_by_ids_pg(db_pg, {app.student_id for app in pending_applications})
+    timings["load_students"] = time.perf_counter() - phase_started
+
+    phase_started = time.perf_counter()
+    application_updates, foreign_applications = classify_pending_applications(pending_applications, students)
+    timings["check_students"] = time.perf_counter() - phase_started
+
+    phase_started = time.perf_counter()
+    applicants = build_applicants(db_pg, [(app.id, app.student_id) for app in foreign_applications], strategy)
+    allocations = allocate_applicants(db_sqlite, applicants, strategy)
+    timings["assign"] = time.perf_counter() - phase_started
+
+    phase_started = time.perf_counter()
+    for app in foreign_applications:
+        if app.id in allocations:
+            application_updates.append({
+                "id": app.id,
+                "status": models.ApplicationStatus.ALLOCATED,
+                "allocated_room_id": allocations[app.id],
+                "rejection_reason": None
+            })
+        else:
+            application_updates.append({
+                "id": app.id,
+                "status": models.ApplicationStatus.APPROVED,
+                "rejection_reason": "Соответствует критериям и одобрено, но свободных комнат на данный момент нет. Ожидает распределения."
+            })
+    updated_ids = update_pending_applications(db_sqlite, application_updates, progress)
+    shift_room_slots(db_sqlite, {room_id: -count for room_id, count in Counter(
+        room_id for application_id, room_id in allocations.items() if application_id not in updated_ids
+    ).items()})
+    if updated_ids:
+        queue_change(db_sqlite, "applications_reset", {"updated": len(updated_ids)})
     db_sqlite.commit()
-    return {"message": f"Обработано заявлений: {processed_count}."}
+    timings["write"] = time.perf_counter() - phase_started
+
+    return {
+        "message": f"Обработано заявлений: {len(updated_ids)}.",
+        "strategy": strategy.name,
+        "timings_ms": {phase: round(seconds * 1000, 2) for phase, seconds in timings.items()}
+    }
 
 
+@query_budget(sqlite=2)
 def get_dormitory_by_id(db_sqlite: Session, dormitory_id: int) -> Optional[models.Dormitory]:
     return db_sqlite.query(models.Dormitory).options(selectinload(models.Dormitory.rooms)).filter(
         models.Dormitory.id == dormitory_id).first()
@@ -380,5 +1283,57 @@ def get_dormitory_by_name(db: Session, name: str):
 
 
 def get_student_by_id_pg(db: Session,
-                         student_id: int) -> Optional[models.Student]:
-    return db.query(models.Student).filter(models.Student.id == student_id).first()
\ No newline at end of file
+                         student_id: int) -> Optional[schemas.StudentInDB]:
+    cache_key = student_cache.id_key(student_id)
+    found, student = student_cache.get(cache_key)
+    if found:
+        return student
+
+    student_orm = db.query(models.Student).filter(models.Student.id == student_id).first()
+    student = schemas.StudentInDB.from_orm(student_orm) if student_orm else None
+    if student:
+        student_cache.put_student(student)
+    else:
+        student_cache.put(cache_key, None)
+    return student
+
+
+def split_cached_students(student_ids: Iterable[int]) -> Tuple[Dict[int, schemas.StudentInDB], List[int]]:
+    students = {}
+    missing_ids = []
+    for student_id in {student_id for student_id in student_ids if student_id is not None}:
+        found, student = student_cache.get(student_cache.id_key(student_id))
+        if not found:
+            missing_ids.append(student_id)
+        elif student:
+            students[student_id] = student
+    return students, missing_ids
+
+
+def store_fetched_students(students: Dict[int, schemas.StudentInDB], requested_ids: List[int],
+                           student_orms: Iterable[models.Student]):
+    for student_orm in student_orms:
+        student = schemas.StudentInDB.from_orm(student_orm)
+        student_cache.put_student(student)
+        students[student.id] = student
+    for student_id in requested_ids:
+        if student_id not in students:
+            student_cache.put(student_cache.id_key(student_id), None)
+
+
+def get_students_by_ids_pg(db: Session, student_ids: Iterable[int]) -> Dict[int, schemas.StudentInDB]:
+    students, missing_ids = split_cached_students(student_ids)
+    for chunk_start in range(0, len(missing_ids), STUDENT_LOOKUP_CHUNK_SIZE):
+        chunk = missing_ids[chunk_start:chunk_start + STUDENT_LOOKUP_CHUNK_SIZE]
+        store_fetched_students(students, chunk, db.query(models.Student).filter(models.Student.id.in_(chunk)).all())
+        count_query_budget_chunk()
+    return students
+
+
+def warm_student_cache(db_pg: Session) -> int:
+    student_cache.clear()
+    warmed_count = 0
+    for student_orm in db_pg.query(models.Student).yield_per(STUDENT_LOOKUP_CHUNK_SIZE):
+        student_cache.put_student(schemas.StudentInDB.from_orm(student_orm))
+        warmed_count += 1
+    return warmed_count
@@ -1,6 +1,9 @@
 import configparser
 import os
-from sqlalchemy import create_engine
+import threading
+from typing import List
+from sqlalchemy import UniqueConstraint, create_engine, event, inspect
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 config_path = os.path.join(os.path.dirname(__file__), 'config.txt')
@@ -13,30 +16,281 @@ config.read(config_path)
 
 if 'sqlite' not in config:
     raise KeyError("Section 'sqlite' not found in config file")
-if 'postgres' not in config:
-    raise KeyError("Section 'postgres' not found in config file")
 
 sqlite_db_name = config['sqlite']['database_name']
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{sqlite_db_name}"
-
-POSTGRES_DATABASE_URL = (
-    f"postgresql://{config['postgres']['username']}:"
-    f"{config['postgres']['password']}@"
-    f"{config['postgres']['host']}:"
-    f"{config['postgres']['port']}/"
-    f"{config['postgres']['database']}"
-)
-
-engine_sqlite = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal_sqlite = sessionmaker(autocommit=False, autoflush=False, bind=engine_sqlite)
+SQLALCHEMY_DATABASE_URL = config.get("database", "url", fallback="") or f"sqlite:///{sqlite_db_name}"
+
+SQLITE_JOURNAL_MODE = config.get("sqlite", "journal_mode", fallback="wal")
+SQLITE_SYNCHRONOUS = config.get("sqlite", "synchronous", fallback="normal")
+SQLITE_BUSY_TIMEOUT_MS = config.getint("sqlite", "busy_timeout_ms", fallback=5000)
+SQLITE_CACHE_SIZE_KIB = config.getint("sqlite", "cache_size_kib", fallback=20000)
+SQLITE_BEGIN_MODE = config.get("sqlite", "begin_mode", fallback="deferred").lower()
+WRITE_TRANSACTION_OPTION = "dormitory_write_transaction"
+
+
+def postgres_database_url(driver: str = "postgresql") -> str:
+    if 'postgres' not in config:
+        raise KeyError("Section 'postgres' not found in config file")
+    database_url = config.get("postgres", "url", fallback="")
+    if database_url:
+        return database_url if driver == "postgresql" else async_database_url(database_url)
+    return (
+        f"{driver}://{config['postgres']['username']}:"
+        f"{config['postgres']['password']}@"
+        f"{config['postgres']['host']}:"
+        f"{config['postgres']['port']}/"
+        f"{config['postgres']['database']}"
+    )
+
+
+def server_pool_options(section: str) -> dict:
+    return {
+        "pool_size": config.getint(section, "pool_size", fallback=5),
+        "max_overflow": config.getint(section, "max_overflow", fallback=10),
+        "pool_timeout": config.getfloat(section, "pool_timeout", fallback=30),
+        "pool_recycle": config.getint(section, "pool_recycle", fallback=1800),
+        "pool_pre_ping": config.getboolean(section, "pool_pre_ping", fallback=True),
+    }
+
+
+def async_database_url(database_url: str) -> str:
+    for sync_prefix, async_prefix in (("sqlite://", "sqlite+aiosqlite://"), ("postgresql://", "postgresql+asyncpg://")):
+        if database_url.startswith(sync_prefix):
+            return async_prefix + database_url[len(sync_prefix):]
+    return database_url
+
+
+def _unicode_lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def register_standin_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function("unicode_lower", 1, _unicode_lower, deterministic=True)
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+    cursor.close()
+
+
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+def _begin_sqlite_transaction(connection):
+    if connection.get_execution_options().get(WRITE_TRANSACTION_OPTION):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        connection.exec_driver_sql("BEGIN")
+
+
+def configure_sqlite_engine(engine):
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    if SQLITE_BEGIN_MODE == "immediate":
+        event.listen(engine, "connect", _disable_driver_transactions)
+        event.listen(engine, "begin", _begin_sqlite_transaction)
+
+
+def begin_write(db):
+    # With begin_mode = immediate only transactions opened here take the SQLite write lock up front;
+    # a read transaction already open on the session is finished first so it is not upgraded mid-way.
+    if db.in_transaction():
+        if db.connection().get_execution_options().get(WRITE_TRANSACTION_OPTION):
+            return
+        db.commit()
+    db.connection(execution_options={WRITE_TRANSACTION_OPTION: True})
+
+
+async def begin_write_async(db):
+    if db.in_transaction():
+        if (await db.connection()).sync_connection.get_execution_options().get(WRITE_TRANSACTION_OPTION):
+            return
+        await db.commit()
+    await db.connection(execution_options={WRITE_TRANSACTION_OPTION: True})
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _get_engine(name: str, factory):
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = factory()
+    return engine
+
+
+def _create_sqlite_file_engine(database_url: str):
+    engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    )
+    configure_sqlite_engine(engine)
+    return engine
+
+
+def _create_engine_sqlite():
+    if not SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+        return create_engine(SQLALCHEMY_DATABASE_URL, **server_pool_options("database"))
+    return _create_sqlite_file_engine(SQLALCHEMY_DATABASE_URL)
+
+
+def create_postgres_standin_engine(database_url: str):
+    engine = _create_sqlite_file_engine(database_url)
+    event.listen(engine, "connect", register_standin_functions)
+    return engine
+
+
+def _create_engine_postgres():
+    database_url = postgres_database_url()
+    if database_url.startswith("sqlite"):
+        return create_postgres_standin_engine(database_url)
+    return create_engine(database_url, **server_pool_options("postgres"))
+
+
+def is_postgres_standin() -> bool:
+    return config.get("postgres", "url", fallback="").startswith("sqlite")
+
+
+def get_engine_sqlite():
+    return _get_engine("sqlite", _create_engine_sqlite)
+
+
+def get_engine_postgres():
+    return _get_engine("postgres", _create_engine_postgres)
+
+
+class LazySessionmaker:
+    def __init__(self, get_engine):
+        self.get_engine = get_engine
+        self._sessionmaker = None
+
+    def __call__(self, **kwargs):
+        if self._sessionmaker is None:
+            self._sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=self.get_engine())
+        return self._sessionmaker(**kwargs)
+
+
+SessionLocal_sqlite = LazySessionmaker(get_engine_sqlite)
 Base_sqlite = declarative_base()
 
-engine_postgres = create_engine(POSTGRES_DATABASE_URL)
-SessionLocal_postgres = sessionmaker(autocommit=False, autoflush=False, bind=engine_postgres)
+SessionLocal_postgres = LazySessionmaker(get_engine_postgres)
 Base_postgres = declarative_base()
 
+
+ASYNC_DB_ENABLED = config.getboolean("database", "async_mode", fallback=False)
+ASYNC_SQLITE_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
+
+_async_sessionmakers = {}
+
+
+def get_async_sessionmaker(database_url: str):
+    if database_url not in _async_sessionmakers:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        if database_url.startswith("sqlite"):
+            async_engine = create_async_engine(database_url, connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000})
+            configure_sqlite_engine(async_engine.sync_engine)
+            if database_url != ASYNC_SQLITE_DATABASE_URL:
+                event.listen(async_engine.sync_engine, "connect", register_standin_functions)
+        else:
+            section = "postgres" if database_url != ASYNC_SQLITE_DATABASE_URL else "database"
+            async_engine = create_async_engine(database_url, **server_pool_options(section))
+        _engines["async_sqlite" if database_url == ASYNC_SQLITE_DATABASE_URL else "async_postgres"] = async_engine.sync_engine
+        _async_sessionmakers[database_url] = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmakers[database_url]
+
+
+def engine_name(engine) -> str:
+    for name, registered_engine in list(_engines.items()):
+        if registered_engine is engine:
+            return name
+    return engine.url.get_backend_name()
+
+
+def get_pool_stats() -> dict:
+    stats = {}
+    for name, engine in list(_engines.items()):
+        pool = engine.pool
+        pool_stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+        for metric in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, metric):
+                pool_stats[metric] = getattr(pool, metric)()
+        stats[name] = pool_stats
+    return stats
+
+
+def check_deployment_safety(workers: int) -> List[str]:
+    if workers <= 1:
+        return []
+    warnings = []
+    if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+        if SQLALCHEMY_DATABASE_URL == "sqlite://" or SQLALCHEMY_DATABASE_URL.endswith(":memory:"):
+            raise RuntimeError("In-memory SQLite database cannot be shared between several workers.")
+        if SQLITE_BEGIN_MODE != "immediate":
+            warnings.append(
+                f"{workers} workers share the SQLite file with begin_mode={SQLITE_BEGIN_MODE}: check-then-write "
+                f"sequences (duplicate application checks, structure updates) are not serialized between workers. "
+                f"Set [sqlite] begin_mode = immediate or point [database] url to a server database."
+            )
+        if SQLITE_JOURNAL_MODE.lower() != "wal":
+            warnings.append(
+                f"{workers} workers share the SQLite file with journal_mode={SQLITE_JOURNAL_MODE}: "
+                f"readers will block writers. Set [sqlite] journal_mode = wal."
+            )
+    warnings.append(
+        f"{workers} workers: the student cache, change feed and live job progress are kept per process; "
+        f"job progress from other workers is visible only after the job finishes. "
+        f"ETag and response caching and the in-memory free room index are disabled because they would go stale "
+        f"between processes; free rooms are looked up in the database instead."
+    )
+    return warnings
+
+
+def create_missing_indexes(engine, metadata) -> List[str]:
+    warnings = []
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+        warnings.extend(_create_missing_unique_indexes(engine, table))
+    return warnings
+
+
+def _create_missing_unique_indexes(engine, table) -> List[str]:
+    constraints = [constraint for constraint in table.constraints
+                   if isinstance(constraint, UniqueConstraint) and constraint.name]
+    if not constraints:
+        return []
+    inspector = inspect(engine)
+    existing = {tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table.name)}
+    existing.update(tuple(index["column_names"]) for index in inspector.get_indexes(table.name) if index["unique"])
+
+    warnings = []
+    quote = engine.dialect.identifier_preparer.quote
+    for constraint in constraints:
+        columns = tuple(column.name for column in constraint.columns)
+        if columns in existing:
+            continue
+        try:
+            with engine.begin() as connection:
+                connection.exec_driver_sql(
+                    f"CREATE UNIQUE INDEX {quote(constraint.name)} ON {quote(table.name)} "
+                    f"({', '.join(quote(column) for column in columns)})"
+                )
+        except IntegrityError:
+            warnings.append(
+                f"Table {table.name} has duplicate ({', '.join(columns)}) rows, so {constraint.name} was not created. "
+                f"Remove the duplicates and restart."
+            )
+    return warnings
+
+
 def get_db_sqlite():
     db = SessionLocal_sqlite()
     try:
@@ -50,3 +304,11 @@ def get_db_postgres():
         yield db
     finally:
         db.close()
+
+async def get_async_db_sqlite():
+    async with get_async_sessionmaker(ASYNC_SQLITE_DATABASE_URL)() as db:
+        yield db
+
+async def get_async_db_postgres():
+    async with get_async_sessionmaker(postgres_database_url("postgresql+asyncpg"))() as db:
+        yield db
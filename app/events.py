@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.database import config
+
+EVENT_HISTORY_SIZE = config.getint("events", "history_size", fallback=1000)
+EVENT_QUEUE_SIZE = config.getint("events", "subscriber_queue_size", fallback=1000)
+EVENT_KEEPALIVE_SECONDS = config.getfloat("events", "keepalive_seconds", fallback=15)
+
+RESYNC_EVENT = "resync"
+_PENDING_CHANGES_KEY = "pending_changes"
+_PENDING_OCCUPANCY_KEY = "pending_occupancy"
+
+Change = Tuple[int, str, Dict[str, Any]]
+
+
+class ChangeSubscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.start_id = 0
+
+    def deliver(self, change: Change):
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((change[0], RESYNC_EVENT, {}))
+
+
+class ChangeBroker:
+    def __init__(self, history_size: int, queue_size: int):
+        # Event ids carry this token so a client reconnecting after a restart is resynced instead of being matched
+        # against a new, unrelated sequence of ids.
+        self.instance = os.urandom(4).hex()
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history_size)
+        self._subscriptions = set()
+        self._listeners = []
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            self._last_id += 1
+            change = (self._last_id, event_type, data)
+            self._history.append(change)
+            subscriptions = list(self._subscriptions)
+        for listener in self._listeners:
+            listener(event_type, data)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, change)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+        return change[0]
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        self._listeners.append(listener)
+
+    def event_id(self, change_id: int) -> str:
+        return f"{self.instance}-{change_id}"
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[ChangeSubscription, List[Change]]:
+        subscription = ChangeSubscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            subscription.start_id = self._last_id
+            if last_event_id is None:
+                return subscription, []
+            resync = [(self._last_id, RESYNC_EVENT, {})]
+            instance, _, change_id = last_event_id.rpartition("-")
+            if instance != self.instance or not change_id.isdigit():
+                return subscription, resync
+            last_change_id = int(change_id)
+            if last_change_id == self._last_id:
+                return subscription, []
+            if last_change_id > self._last_id or not self._history or self._history[0][0] > last_change_id + 1:
+                return subscription, resync
+            return subscription, [change for change in self._history if change[0] > last_change_id]
+
+    def unsubscribe(self, subscription: ChangeSubscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"last_event_id": self._last_id, "subscribers": len(self._subscriptions),
+                    "history_size": len(self._history)}
+
+
+def format_sse(change: Change) -> str:
+    change_id, event_type, data = change
+    return f"id: {change_broker.event_id(change_id)}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _sync_session(db) -> Session:
+    return getattr(db, "sync_session", db)
+
+
+def queue_change(db, event_type: str, data: Dict[str, Any]):
+    _sync_session(db).info.setdefault(_PENDING_CHANGES_KEY, []).append((event_type, data))
+
+
+def queue_occupancy_change(db, dormitory_id: int, delta: int):
+    pending = _sync_session(db).info.setdefault(_PENDING_OCCUPANCY_KEY, {})
+    pending[dormitory_id] = pending.get(dormitory_id, 0) + delta
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_changes(session: Session):
+    for event_type, data in session.info.pop(_PENDING_CHANGES_KEY, ()):
+        change_broker.publish(event_type, data)
+    # A move inside one dormitory nets to zero but still changes which rooms are free, so it is published too.
+    for dormitory_id, delta in session.info.pop(_PENDING_OCCUPANCY_KEY, {}).items():
+        change_broker.publish("dormitory_occupancy", {"dormitory_id": dormitory_id, "occupancy_delta": delta})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session: Session):
+    session.info.pop(_PENDING_CHANGES_KEY, None)
+    session.info.pop(_PENDING_OCCUPANCY_KEY, None)
+
+
+change_broker = ChangeBroker(EVENT_HISTORY_SIZE, EVENT_QUEUE_SIZE)
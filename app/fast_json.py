@@ -0,0 +1,37 @@
+import datetime
+import enum
+import json
+import time
+from typing import Any
+from fastapi.responses import JSONResponse
+from app.database import config
+from app.metrics import record_serialization
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_JSON_ENABLED = config.getboolean("json", "fast_path", fallback=True)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = dumps(content)
+        record_serialization(time.perf_counter() - started)
+        return body
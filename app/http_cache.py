@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from app.database import config
+from app.events import change_broker
+from app.fast_json import FAST_JSON_ENABLED, dumps
+from app.metrics import record_serialization
+
+RESOURCE_APPLICATIONS = "applications"
+RESOURCE_DORMITORIES = "dormitories"
+RESOURCE_OCCUPANCY = "occupancy"
+RESOURCE_STUDENTS = "students"
+
+EVENT_RESOURCES = {
+    "application": (RESOURCE_APPLICATIONS,),
+    "applications_reset": (RESOURCE_APPLICATIONS,),
+    "dormitory": (RESOURCE_DORMITORIES, RESOURCE_OCCUPANCY),
+    "dormitory_occupancy": (RESOURCE_OCCUPANCY,),
+    "dormitory_deleted": (RESOURCE_DORMITORIES, RESOURCE_OCCUPANCY),
+}
+
+
+class ResourceVersions:
+    def __init__(self, instance: str):
+        self.instance = instance
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def bump(self, *resources: str):
+        with self._lock:
+            for resource in resources:
+                self._versions[resource] = self._versions.get(resource, 0) + 1
+
+    def bump_for_event(self, event_type: str, data: Dict[str, Any]):
+        self.bump(*EVENT_RESOURCES.get(event_type, ()))
+
+    def snapshot(self, resources: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(resource, 0) for resource in resources)
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._versions)
+
+    def etag(self, versions: Tuple[int, ...]) -> str:
+        return f'"{self.instance}-{".".join(map(str, versions))}"'
+
+
+class ResponseCache:
+    def __init__(self, enabled: bool, max_entries: int):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def disable(self):
+        self.enabled = False
+        self.clear()
+
+    def get(self, key: Hashable, versions: Tuple[int, ...]) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, versions: Tuple[int, ...], body: bytes):
+        with self._lock:
+            self._entries[key] = (versions, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": sum(len(body) for _, body in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+
+_type_adapters = {}
+
+
+def serialize_json(response_type: Any, data: Any) -> bytes:
+    started = time.perf_counter()
+    if FAST_JSON_ENABLED:
+        body = dumps(data)
+    else:
+        adapter = _type_adapters.get(response_type)
+        if adapter is None:
+            adapter = _type_adapters[response_type] = TypeAdapter(response_type)
+        body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    record_serialization(time.perf_counter() - started)
+    return body
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def cached_json_response(request: Request, key: Hashable, resources: Tuple[str, ...], response_type: Any,
+                         build: Callable[[], Any]) -> Response:
+    if not response_cache.enabled:
+        return Response(serialize_json(response_type, build()), media_type="application/json")
+
+    versions = resource_versions.snapshot(resources)
+    etag = resource_versions.etag(versions)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, versions)
+    if body is None:
+        body = serialize_json(response_type, build())
+        response_cache.put(key, versions, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+resource_versions = ResourceVersions(change_broker.instance)
+response_cache = ResponseCache(
+    enabled=config.getboolean("http_cache", "enabled", fallback=True),
+    max_entries=config.getint("http_cache", "max_entries", fallback=64),
+)
+change_broker.add_listener(resource_versions.bump_for_event)
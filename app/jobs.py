@@ -0,0 +1,142 @@
+import datetime
+import json
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.crud import ProgressCallback
+from app.database import SessionLocal_sqlite, SessionLocal_postgres, begin_write, config
+
+JobWork = Callable[[Session, Session, ProgressCallback], Dict[str, Any]]
+
+JOB_MAX_WORKERS = config.getint("jobs", "max_workers", fallback=2)
+JOB_RECOVERY_LOCK = "job_recovery"
+
+_executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix="dormitory-job")
+_live_progress = {}
+_live_progress_lock = threading.Lock()
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _set_job_state(job_id: int, **values):
+    with SessionLocal_sqlite() as db_sqlite:
+        begin_write(db_sqlite)
+        db_sqlite.query(models.Job).filter(models.Job.id == job_id).update(values, synchronize_session=False)
+        db_sqlite.commit()
+
+
+def _run_job(job_id: int, work: JobWork):
+    _set_job_state(job_id, status=models.JobStatus.RUNNING, started_at=_utcnow())
+
+    def report_progress(processed: int, total: Optional[int] = None):
+        with _live_progress_lock:
+            _live_progress[job_id] = (processed, total)
+
+    db_sqlite = SessionLocal_sqlite()
+    db_pg = SessionLocal_postgres()
+    try:
+        result = work(db_sqlite, db_pg, report_progress)
+    except Exception as e:
+        db_sqlite.rollback()
+        processed, total = _live_progress.get(job_id, (0, None))
+        _set_job_state(job_id, status=models.JobStatus.FAILED, error=str(e), processed=processed, total=total,
+                       finished_at=_utcnow())
+    else:
+        processed, total = _live_progress.get(job_id, (0, None))
+        _set_job_state(job_id, status=models.JobStatus.SUCCEEDED, result=json.dumps(result, default=str),
+                       processed=total if total is not None else processed, total=total, finished_at=_utcnow())
+    finally:
+        db_sqlite.close()
+        db_pg.close()
+        with _live_progress_lock:
+            _live_progress.pop(job_id, None)
+
+
+def submit_job(db_sqlite: Session, kind: str, work: JobWork) -> schemas.JobResponse:
+    job = models.Job(kind=kind, status=models.JobStatus.QUEUED, processed=0)
+    begin_write(db_sqlite)
+    db_sqlite.add(job)
+    db_sqlite.commit()
+    db_sqlite.refresh(job)
+    _executor.submit(_run_job, job.id, work)
+    return schemas.JobResponse.from_orm(job)
+
+
+def get_job(db_sqlite: Session, job_id: int) -> Optional[schemas.JobResponse]:
+    job = db_sqlite.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        return None
+    response = schemas.JobResponse.from_orm(job)
+    with _live_progress_lock:
+        live_progress = _live_progress.get(job_id)
+    if live_progress and response.status == models.JobStatus.RUNNING:
+        response.processed, response.total = live_progress
+    return response
+
+
+def get_job_result(db_sqlite: Session, job_id: int) -> Optional[Tuple[schemas.JobResponse, Optional[Dict[str, Any]]]]:
+    job = db_sqlite.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        return None
+    return schemas.JobResponse.from_orm(job), json.loads(job.result) if job.result else None
+
+
+def _process_start_time(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return ""
+
+
+def new_server_run_id(inherited_from_launcher: bool) -> str:
+    # Workers started by a launcher that did not import the app (uvicorn --workers) share its pid and start time;
+    # the start time keeps the id unique across container restarts, where the launcher pid is the same every time.
+    if inherited_from_launcher:
+        launcher_pid = os.getppid()
+        return f"{socket.gethostname()}:{launcher_pid}:{_process_start_time(launcher_pid)}"
+    return uuid.uuid4().hex
+
+
+def fail_interrupted_jobs(db_sqlite: Session, server_run_id: str) -> bool:
+    begin_write(db_sqlite)
+    if not claim_startup_lock(db_sqlite, JOB_RECOVERY_LOCK, server_run_id):
+        db_sqlite.rollback()
+        return False
+    db_sqlite.query(models.Job).filter(
+        models.Job.status.in_([models.JobStatus.QUEUED, models.JobStatus.RUNNING])
+    ).update({
+        "status": models.JobStatus.FAILED,
+        "error": "Задача прервана перезапуском сервера.",
+        "finished_at": _utcnow()
+    }, synchronize_session=False)
+    db_sqlite.commit()
+    return True
+
+
+def claim_startup_lock(db_sqlite: Session, name: str, server_run_id: str) -> bool:
+    claimed = db_sqlite.execute(
+        update(models.AppLock).where(
+            models.AppLock.name == name,
+            models.AppLock.owner != server_run_id
+        ).values(owner=server_run_id, acquired_at=_utcnow())
+    ).rowcount
+    if claimed:
+        return True
+    if db_sqlite.get(models.AppLock, name) is not None:
+        return False
+    db_sqlite.add(models.AppLock(name=name, owner=server_run_id, acquired_at=_utcnow()))
+    try:
+        db_sqlite.flush()
+    except IntegrityError:
+        return False
+    return True
@@ -0,0 +1,393 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.database import config, engine_name
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = config.getboolean("metrics", "enabled", fallback=True)
+SLOW_REQUEST_MS = config.getfloat("metrics", "slow_request_ms", fallback=0)
+SLOW_REQUEST_MAX_QUERIES = config.getint("metrics", "slow_request_max_queries", fallback=50)
+QUERY_BUDGET_MODE = config.get("metrics", "query_budgets", fallback="warn").lower()
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+_current_request = contextvars.ContextVar("current_request_metrics", default=None)
+_budget_frames = contextvars.ContextVar("query_budget_frames", default=())
+
+QUERY_BUDGETS = {}
+QUERY_CHUNK_BUDGETS = {}
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class EngineUsage:
+    __slots__ = ("statements", "seconds", "rows")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self.rows = 0
+
+
+class RequestMetrics:
+    def __init__(self, record_queries: bool):
+        self.engines = {}
+        self.serialization_seconds = 0.0
+        self.queries = [] if record_queries else None
+        self.started = time.perf_counter()
+
+    def engine(self, name: str) -> EngineUsage:
+        usage = self.engines.get(name)
+        if usage is None:
+            usage = self.engines[name] = EngineUsage()
+        return usage
+
+    def record_statement(self, name: str, statement: str, seconds: float):
+        usage = self.engine(name)
+        usage.statements += 1
+        usage.seconds += seconds
+        if self.queries is not None and len(self.queries) < SLOW_REQUEST_MAX_QUERIES:
+            self.queries.append((name, seconds, statement))
+
+
+class _CountingCursor:
+    def __init__(self, cursor, usage: EngineUsage):
+        self._cursor = cursor
+        self._usage = usage
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._usage.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._usage.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._usage.rows += len(rows)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    return _current_request.get()
+
+
+def record_serialization(seconds: float):
+    request_metrics = _current_request.get()
+    if request_metrics is not None:
+        request_metrics.serialization_seconds += seconds
+
+
+def _budget_engine(name: str) -> str:
+    return name.removeprefix("async_")
+
+
+class _BudgetFrame:
+    __slots__ = ("function_name", "limits", "per_chunk", "chunks", "statements", "reported")
+
+    def __init__(self, function_name: str, limits: Dict[str, int], per_chunk: Dict[str, int]):
+        self.function_name = function_name
+        self.limits = limits
+        self.per_chunk = per_chunk
+        self.chunks = 0
+        self.statements = {}
+        self.reported = False
+
+    def limit(self, name: str) -> Optional[int]:
+        if name not in self.limits and name not in self.per_chunk:
+            return None
+        return self.limits.get(name, 0) + self.chunks * self.per_chunk.get(name, 0)
+
+
+def _check_query_budget(frame: _BudgetFrame):
+    if frame.reported:
+        return
+    exceeded = {name: (count, frame.limit(name)) for name, count in frame.statements.items()
+                if frame.limit(name) is not None and count > frame.limit(name)}
+    if not exceeded:
+        return
+    frame.reported = True
+    metrics_registry.record_budget_violation(frame.function_name)
+    message = f"{frame.function_name} exceeded its query budget: " + ", ".join(
+        f"{name} {count} statements (budget {limit})" for name, (count, limit) in exceeded.items()
+    )
+    if QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def count_query_budget_chunk():
+    # Batch paths call this once per chunk they process; the enclosing budget then allows its per_chunk statements again.
+    budget_frames = _budget_frames.get()
+    if budget_frames and budget_frames[-1].per_chunk:
+        budget_frames[-1].chunks += 1
+
+
+def query_budget(per_chunk: Optional[Dict[str, int]] = None, **limits: int):
+    per_chunk = per_chunk or {}
+
+    def decorate(function):
+        function_name = f"{function.__module__}.{function.__qualname__}"
+        QUERY_BUDGETS[function_name] = limits
+        if per_chunk:
+            QUERY_CHUNK_BUDGETS[function_name] = per_chunk
+        if QUERY_BUDGET_MODE == "off":
+            return function
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                frame = _BudgetFrame(function_name, limits, per_chunk)
+                token = _budget_frames.set(_budget_frames.get() + (frame,))
+                try:
+                    result = await function(*args, **kwargs)
+                finally:
+                    _budget_frames.reset(token)
+                _check_query_budget(frame)
+                return result
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator_wrapper(*args, **kwargs):
+                # Streaming responses resume the generator from threadpool calls with their own contexts, so the
+                # frame is pushed around every step instead of once for the whole iteration.
+                frame = _BudgetFrame(function_name, limits, per_chunk)
+                iterator = function(*args, **kwargs)
+                try:
+                    while True:
+                        token = _budget_frames.set(_budget_frames.get() + (frame,))
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            break
+                        finally:
+                            _budget_frames.reset(token)
+                        yield item
+                finally:
+                    iterator.close()
+                _check_query_budget(frame)
+            return generator_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            frame = _BudgetFrame(function_name, limits, per_chunk)
+            token = _budget_frames.set(_budget_frames.get() + (frame,))
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                _budget_frames.reset(token)
+            _check_query_budget(frame)
+            return result
+        return wrapper
+    return decorate
+
+
+@event.listens_for(Session, "before_commit")
+def _check_query_budgets_before_commit(session: Session):
+    # A write that blew its budget is stopped here, while it can still be rolled back, rather than after it is durable.
+    for frame in _budget_frames.get():
+        _check_query_budget(frame)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    budget_frames = _budget_frames.get()
+    if budget_frames and not statement.startswith("BEGIN"):
+        budget_engine = _budget_engine(engine_name(conn.engine))
+        for frame in budget_frames:
+            frame.statements[budget_engine] = frame.statements.get(budget_engine, 0) + 1
+    request_metrics = _current_request.get()
+    if request_metrics is None or not conn.info.get("query_started"):
+        return
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    name = engine_name(conn.engine)
+    request_metrics.record_statement(name, statement, seconds)
+    usage = request_metrics.engine(name)
+    if context is not None and cursor.description is not None:
+        context.cursor = _CountingCursor(cursor, usage)
+    elif cursor.rowcount > 0:
+        usage.rows += cursor.rowcount
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute, so its start time is dropped here instead of being
+    # paired with the next statement on the pooled connection.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._latency = {}
+        self._responses = {}
+        self._engines = {}
+        self._serialization = {}
+        self._budget_violations = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float, request_metrics: RequestMetrics):
+        with self._lock:
+            histogram = self._latency.get((method, route))
+            if histogram is None:
+                histogram = self._latency[(method, route)] = _Histogram()
+            histogram.observe(seconds)
+            status_key = (method, route, str(status_code))
+            self._responses[status_key] = self._responses.get(status_key, 0) + 1
+            for name, usage in request_metrics.engines.items():
+                totals = self._engines.get((method, route, name))
+                if totals is None:
+                    totals = self._engines[(method, route, name)] = EngineUsage()
+                totals.statements += usage.statements
+                totals.seconds += usage.seconds
+                totals.rows += usage.rows
+            if request_metrics.serialization_seconds:
+                serialization_key = (method, route)
+                self._serialization[serialization_key] = (self._serialization.get(serialization_key, 0.0)
+                                                          + request_metrics.serialization_seconds)
+
+    def record_budget_violation(self, function_name: str):
+        with self._lock:
+            self._budget_violations[function_name] = self._budget_violations.get(function_name, 0) + 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines.append("# HELP dormitory_http_request_duration_seconds Request latency by route.")
+            lines.append("# TYPE dormitory_http_request_duration_seconds histogram")
+            for (method, route), histogram in sorted(self._latency.items()):
+                labels = _labels(method=method, route=route)
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), histogram.buckets):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"dormitory_http_request_duration_seconds_bucket{{{labels},le=\"{le}\"}} {cumulative}")
+                lines.append(f"dormitory_http_request_duration_seconds_sum{{{labels}}} {histogram.total}")
+                lines.append(f"dormitory_http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+            lines.append("# HELP dormitory_http_responses_total Responses by route and status code.")
+            lines.append("# TYPE dormitory_http_responses_total counter")
+            for (method, route, status_code), count in sorted(self._responses.items()):
+                lines.append(f"dormitory_http_responses_total{{{_labels(method=method, route=route, status=status_code)}}} {count}")
+
+            for metric, attribute, description in (
+                    ("dormitory_db_statements_total", "statements", "SQL statements executed by method, route and engine."),
+                    ("dormitory_db_statement_seconds_total", "seconds", "Time spent executing SQL by method, route and engine."),
+                    ("dormitory_db_rows_total", "rows", "Rows returned or affected by method, route and engine.")):
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} counter")
+                for (method, route, name), totals in sorted(self._engines.items()):
+                    lines.append(f"{metric}{{{_labels(method=method, route=route, engine=name)}}} "
+                                 f"{getattr(totals, attribute)}")
+
+            lines.append("# HELP dormitory_serialization_seconds_total Time spent encoding JSON responses by method and route.")
+            lines.append("# TYPE dormitory_serialization_seconds_total counter")
+            for (method, route), seconds in sorted(self._serialization.items()):
+                lines.append(f"dormitory_serialization_seconds_total{{{_labels(method=method, route=route)}}} {seconds}")
+
+            lines.append("# HELP dormitory_query_budget_violations_total Calls that executed more SQL than their declared budget.")
+            lines.append("# TYPE dormitory_query_budget_violations_total counter")
+            for function_name, count in sorted(self._budget_violations.items()):
+                lines.append(f"dormitory_query_budget_violations_total{{{_labels(function=function_name)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f"{key}=\"{_escape_label(value)}\"" for key, value in labels.items())
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+def _log_slow_request(method: str, path: str, status_code: int, seconds: float, request_metrics: RequestMetrics):
+    engines = ", ".join(
+        f"{name}: {usage.statements} statements / {usage.seconds * 1000:.1f} ms / {usage.rows} rows"
+        for name, usage in request_metrics.engines.items()
+    ) or "no SQL"
+    queries = "".join(
+        f"\n  [{name}] {query_seconds * 1000:.1f} ms {' '.join(statement.split())[:300]}"
+        for name, query_seconds, statement in request_metrics.queries
+    )
+    logger.warning("Slow request %s %s -> %s in %.1f ms (%s; serialization %.1f ms)%s",
+                   method, path, status_code, seconds * 1000, engines,
+                   request_metrics.serialization_seconds * 1000, queries)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request_metrics = RequestMetrics(record_queries=SLOW_REQUEST_MS > 0)
+        token = _current_request.set(request_metrics)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_request.reset(token)
+            seconds = time.perf_counter() - request_metrics.started
+            route = _route_label(scope)
+            metrics_registry.observe(scope["method"], route, status_code, seconds, request_metrics)
+            if SLOW_REQUEST_MS > 0 and seconds * 1000 >= SLOW_REQUEST_MS:
+                _log_slow_request(scope["method"], scope["path"], status_code, seconds, request_metrics)
+
+
+metrics_registry = MetricsRegistry()
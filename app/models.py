@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, Enum as SQLEnum, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, Enum as SQLEnum, DateTime, Index, Text, \
+    UniqueConstraint
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import GenericFunction
 import enum
 from app.database import Base_sqlite
 
@@ -15,6 +18,13 @@ class ApplicationStatus(str, enum.Enum):
     ALLOCATED = "allocated"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class Dormitory(Base_sqlite):
     __tablename__ = "dormitories"
     id = Column(Integer, primary_key=True, index=True)
@@ -34,6 +44,20 @@ class Room(Base_sqlite):
     dormitory = relationship("Dormitory", back_populates="rooms")
     allocations = relationship("Application", back_populates="allocated_room_detail")
 
+    __table_args__ = (
+        UniqueConstraint(dormitory_id, floor_number, room_number, name="uq_rooms_dormitory_floor_room"),
+        Index(
+            "ix_rooms_free_dormitory_id_id", dormitory_id, id,
+            sqlite_where=current_occupancy < capacity,
+            postgresql_where=current_occupancy < capacity
+        ),
+        Index(
+            "ix_rooms_free_dormitory_floor_room", dormitory_id, floor_number, room_number,
+            sqlite_where=current_occupancy < capacity,
+            postgresql_where=current_occupancy < capacity
+        ),
+    )
+
 
 class Application(Base_sqlite):
     __tablename__ = "applications"
@@ -45,6 +69,59 @@ class Application(Base_sqlite):
     allocated_room_id = Column(Integer, ForeignKey("rooms.id"), nullable=True)
     allocated_room_detail = relationship("Room", back_populates="allocations")
 
+    __table_args__ = (
+        Index("ix_applications_student_status_date", student_id, status, application_date),
+        Index("ix_applications_status_date_id", status, application_date, id),
+        Index("ix_applications_date_id", application_date, id),
+        Index("ix_applications_room_status", allocated_room_id, status),
+    )
+
+
+class Job(Base_sqlite):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(SQLEnum(JobStatus), default=JobStatus.QUEUED, nullable=False, index=True)
+    processed = Column(Integer, default=0, nullable=False)
+    total = Column(Integer, nullable=True)
+    result = Column(Text, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class AppLock(Base_sqlite):
+    __tablename__ = "app_locks"
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    acquired_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class OccupancySummary(Base_sqlite):
+    __tablename__ = "occupancy_summary"
+    dormitory_id = Column(Integer, ForeignKey("dormitories.id"), primary_key=True)
+    floor_number = Column(Integer, primary_key=True)
+    rooms = Column(Integer, default=0, nullable=False)
+    capacity = Column(Integer, default=0, nullable=False)
+    occupancy = Column(Integer, default=0, nullable=False)
+
+
+class unicode_lower(GenericFunction):
+    type = String()
+    inherit_cache = True
+
+
+@compiles(unicode_lower)
+def _compile_unicode_lower(element, compiler, **kw):
+    return f"lower({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(unicode_lower, "sqlite")
+def _compile_unicode_lower_sqlite(element, compiler, **kw):
+    # SQLite's built-in lower() folds ASCII only; the stand-in engine registers unicode_lower() on connect.
+    return f"unicode_lower({compiler.process(element.clauses, **kw)})"
+
 
 class Faculty(Base_postgres):
     __tablename__ = "faculties"
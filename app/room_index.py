@@ -0,0 +1,124 @@
+import bisect
+import threading
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import models
+
+_PENDING_FREE_SLOTS_KEY = "pending_free_slots"
+
+
+class FreeRoomIndex:
+    def __init__(self):
+        self._keys = []
+        self._free_slots = {}
+        self._room_dormitory = {}
+        self._lock = threading.Lock()
+        self.is_built = False
+        self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            self.is_built = False
+            self._keys, self._free_slots, self._room_dormitory = [], {}, {}
+
+    def rebuild(self, db_sqlite: Session):
+        if not self.enabled:
+            return
+        rows = db_sqlite.query(
+            models.Room.id, models.Room.dormitory_id,
+            (models.Room.capacity - models.Room.current_occupancy).label("free_slots")
+        ).all()
+        with self._lock:
+            self._room_dormitory = {row.id: row.dormitory_id for row in rows}
+            self._free_slots = {row.id: row.free_slots for row in rows if row.free_slots > 0}
+            self._keys = sorted((self._room_dormitory[room_id], room_id) for room_id in self._free_slots)
+            self.is_built = True
+
+    def ensure_built(self, db_sqlite: Session):
+        if not self.is_built:
+            self.rebuild(db_sqlite)
+
+    def set_free_slots(self, room_id: int, dormitory_id: int, free_slots: int):
+        with self._lock:
+            if self.enabled:
+                self._set_free_slots(room_id, dormitory_id, free_slots)
+
+    def _set_free_slots(self, room_id: int, dormitory_id: int, free_slots: int):
+        old_dormitory_id = self._room_dormitory.get(room_id)
+        if room_id in self._free_slots:
+            self._remove_key((old_dormitory_id, room_id))
+            del self._free_slots[room_id]
+        self._room_dormitory[room_id] = dormitory_id
+        if free_slots > 0:
+            self._free_slots[room_id] = free_slots
+            bisect.insort(self._keys, (dormitory_id, room_id))
+
+    def _remove_key(self, key: Tuple[int, int]):
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def discard_rooms(self, room_ids: Iterable[int]):
+        with self._lock:
+            for room_id in room_ids:
+                if room_id in self._free_slots:
+                    self._remove_key((self._room_dormitory[room_id], room_id))
+                    del self._free_slots[room_id]
+                self._room_dormitory.pop(room_id, None)
+
+    def refresh_rooms(self, db_sqlite: Session, room_ids: Iterable[int]):
+        if not self.enabled:
+            return
+        room_ids = list(room_ids)
+        rows = db_sqlite.query(
+            models.Room.id, models.Room.dormitory_id,
+            (models.Room.capacity - models.Room.current_occupancy).label("free_slots")
+        ).filter(models.Room.id.in_(room_ids)).all()
+        found_ids = {row.id for row in rows}
+        with self._lock:
+            for row in rows:
+                self._set_free_slots(row.id, row.dormitory_id, row.free_slots)
+        self.discard_rooms(room_id for room_id in room_ids if room_id not in found_ids)
+
+    def refresh_dormitory(self, db_sqlite: Session, dormitory_id: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            stale_ids = [room_id for room_id, room_dormitory_id in self._room_dormitory.items()
+                         if room_dormitory_id == dormitory_id]
+        self.discard_rooms(stale_ids)
+        room_ids = [room_id for (room_id,) in
+                    db_sqlite.query(models.Room.id).filter(models.Room.dormitory_id == dormitory_id)]
+        self.refresh_rooms(db_sqlite, room_ids)
+
+    def first(self) -> Optional[int]:
+        with self._lock:
+            return self._keys[0][1] if self._keys else None
+
+    def free_slots(self, room_id: int) -> int:
+        with self._lock:
+            return self._free_slots.get(room_id, 0)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+
+free_room_index = FreeRoomIndex()
+
+
+def queue_free_slots(db_sqlite: Session, room_id: int, dormitory_id: int, free_slots: int):
+    db_sqlite.info.setdefault(_PENDING_FREE_SLOTS_KEY, {})[room_id] = (dormitory_id, free_slots)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_free_slots(session: Session):
+    for room_id, (dormitory_id, free_slots) in session.info.pop(_PENDING_FREE_SLOTS_KEY, {}).items():
+        free_room_index.set_free_slots(room_id, dormitory_id, free_slots)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_free_slots(session: Session):
+    session.info.pop(_PENDING_FREE_SLOTS_KEY, None)
@@ -1,11 +1,23 @@
+import asyncio
 import configparser
+import contextlib
 import os
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
+import shutil
+import tempfile
+from fastapi import APIRouter, Depends, Header, HTTPException, status, UploadFile, File, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app import crud, schemas, models
-from app.database import get_db_sqlite, get_db_postgres
-from typing import List
-import json
+from app import async_crud, crud, jobs, schemas, models, structure_io
+from app.database import get_db_sqlite, get_db_postgres, SessionLocal_sqlite, SessionLocal_postgres, \
+    ASYNC_DB_ENABLED, get_async_db_sqlite, get_async_db_postgres, get_pool_stats
+from app.events import EVENT_KEEPALIVE_SECONDS, change_broker, format_sse
+from app.fast_json import FAST_JSON_ENABLED, FastJSONResponse
+from app.http_cache import RESOURCE_APPLICATIONS, RESOURCE_DORMITORIES, RESOURCE_OCCUPANCY, RESOURCE_STUDENTS, \
+    cached_json_response, resource_versions, response_cache
+from app.student_cache import student_cache
+from typing import List, Optional
+import datetime
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
@@ -52,105 +64,153 @@ def delete_dormitory_by_id(dormitory_id: int, db_sqlite: Session = Depends(get_d
     return
 
 @router.post("/dormitories/{dormitory_id}/structure/", response_model=schemas.DormitoryResponse)
-def define_dorm_structure(dormitory_id: int, rooms_data: List[schemas.RoomCreate], db_sqlite: Session = Depends(get_db_sqlite)):
-    dormitory_orm = crud.define_dormitory_structure(db_sqlite=db_sqlite, dormitory_id=dormitory_id, rooms_data=rooms_data)
+def define_dorm_structure(dormitory_id: int, rooms_data: List[schemas.RoomCreate], remove_missing: bool = True, db_sqlite: Session = Depends(get_db_sqlite)):
+    try:
+        dormitory_orm = crud.define_dormitory_structure(db_sqlite=db_sqlite, dormitory_id=dormitory_id, rooms_data=rooms_data, remove_missing=remove_missing)
+    except ValueError as e:
+        db_sqlite.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     if not dormitory_orm:
         raise HTTPException(status_code=404, detail="Общежитие не найдено.")
     rooms = [schemas.RoomResponse.from_orm(r) for r in dormitory_orm.rooms] if dormitory_orm.rooms else []
     return schemas.DormitoryResponse(id=dormitory_orm.id, name=dormitory_orm.name, address=dormitory_orm.address, rooms=rooms)
 
 @router.get("/dormitories/structure/export/", response_model=schemas.DormitoryStructureExport)
-def export_dormitories_structure(db_sqlite: Session = Depends(get_db_sqlite)):
-    dormitories_orm = crud.get_dormitories_structure(db_sqlite=db_sqlite)
-    dorms = []
-    for dorm in dormitories_orm:
-        rooms = [schemas.RoomCreate(floor_number=r.floor_number, room_number=r.room_number, capacity=r.capacity) for r in dorm.rooms] if dorm.rooms else []
-        dorms.append(schemas.DormitoryStructure(id=dorm.id, name=dorm.name, address=dorm.address, rooms=rooms))
-    return schemas.DormitoryStructureExport(dormitories=dorms)
+def export_dormitories_structure(request: Request, db_sqlite: Session = Depends(get_db_sqlite)):
+    return cached_json_response(request, ("structure_export",), (RESOURCE_DORMITORIES,),
+                                schemas.DormitoryStructureExport, lambda: crud.get_structure_export_data(db_sqlite))
+
+def _streaming_export(export_format: str, filename: str, fields, iter_rows,
+                      with_students: bool = False) -> StreamingResponse:
+    if export_format not in structure_io.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Неподдерживаемый формат экспорта. Доступны форматы NDJSON и CSV.")
+
+    def generate():
+        with contextlib.ExitStack() as sessions:
+            db_sessions = [sessions.enter_context(SessionLocal_sqlite())]
+            if with_students:
+                db_sessions.append(sessions.enter_context(SessionLocal_postgres()))
+            yield from structure_io.iter_export_chunks(iter_rows(*db_sessions), export_format, fields)
+
+    return StreamingResponse(
+        generate(),
+        media_type=structure_io.EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}_{datetime.date.today().isoformat()}.{export_format}"'}
+    )
+
+@router.get("/dormitories/structure/export/stream/")
+def stream_dormitories_structure_export(export_format: str = Query("ndjson", alias="format")):
+    return _streaming_export(export_format, "dormitories_structure", structure_io.STRUCTURE_ROW_FIELDS,
+                             crud.iter_structure_export_rows)
+
+def _detect_structure_import_format(file: UploadFile, requested_format: Optional[str]) -> str:
+    import_format = structure_io.detect_import_format(file.content_type, file.filename, requested_format)
+    if not import_format:
+        raise HTTPException(status_code=400, detail="Неверный тип файла. Принимаются только файлы форматов JSON, NDJSON и CSV.")
+    return import_format
 
 @router.post("/dormitories/structure/import/", status_code=status.HTTP_201_CREATED)
-async def import_dormitories_structure_file(file: UploadFile = File(...), db_sqlite: Session = Depends(get_db_sqlite)):
-    if file.content_type != "application/json":
-        raise HTTPException(status_code=400, detail="Неверный тип файла. Принимаются только файлы формата JSON.")
-    contents = await file.read()
+def import_dormitories_structure_file(file: UploadFile = File(...), import_format: Optional[str] = Query(None, alias="format"), remove_missing: bool = True, db_sqlite: Session = Depends(get_db_sqlite)):
+    import_format = _detect_structure_import_format(file, import_format)
     try:
-        data = json.loads(contents)
-        structure_data = schemas.DormitoryStructureExport(**data)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Неверный формат JSON.")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Неверная структура данных: {e}")
-    crud.import_dormitories_structure(db_sqlite=db_sqlite, structure_data=structure_data)
-    return {"message": "Структура общежитий успешно импортирована."}
+        row_chunks = structure_io.validate_rows_in_chunks(structure_io.iter_structure_rows(file.file, import_format))
+        return crud.import_structure_rows(db_sqlite=db_sqlite, row_chunks=row_chunks, remove_missing=remove_missing)
+    except ValueError as e:
+        db_sqlite.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/dormitories/{dormitory_id}/details/", response_model=schemas.DormitoryDetailsResponse)
-def get_dormitory_details_endpoint(dormitory_id: int, db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
-    details = crud.get_dormitory_details(db_sqlite, db_pg, dormitory_id)
-    if not details:
-        raise HTTPException(status_code=404, detail="Общежитие не найдено.")
-    return details
-
-@router.get("/applications/", response_model=List[schemas.StaffApplicationResponse])
-def view_all_applications(skip: int = 0, limit: int = 100, db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
-    applications = crud.get_all_applications(db_sqlite=db_sqlite, skip=skip, limit=limit)
-    response = []
-    for app in applications:
-        student_info = crud.get_student_by_id_pg(db_pg, student_id=app.student_id) if app.student_id else None
-        student_data = schemas.StudentInDB.from_orm(student_info) if student_info else None
-
-        app_dict = {
-            "id": app.id,
-            "student_id": app.student_id,
-            "application_date": app.application_date,
-            "status": app.status,
-            "rejection_reason": app.rejection_reason,
-            "allocated_room_id": app.allocated_room_id,
-            "student_info": student_data
-        }
-
-        if app.status == models.ApplicationStatus.ALLOCATED and app.allocated_room_detail and app.allocated_room_detail.dormitory:
-            room = app.allocated_room_detail
-            dorm = room.dormitory
-            app_dict.update({
-                "allocated_dorm_name": dorm.name,
-                "allocated_dorm_address": dorm.address,
-                "allocated_room_number": room.room_number,
-                "allocated_floor_number": room.floor_number
-            })
-
-        response.append(schemas.StaffApplicationResponse(**app_dict))
-    return response
+def get_dormitory_details_endpoint(request: Request, dormitory_id: int, floor: Optional[int] = None, db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
+    def build():
+        details = crud.get_dormitory_details_data(db_sqlite, db_pg, dormitory_id, floor=floor)
+        if not details:
+            raise HTTPException(status_code=404, detail="Общежитие не найдено.")
+        return details
+
+    return cached_json_response(request, ("dormitory_details", dormitory_id, floor),
+                                (RESOURCE_DORMITORIES, RESOURCE_OCCUPANCY, RESOURCE_APPLICATIONS, RESOURCE_STUDENTS),
+                                schemas.DormitoryDetailsResponse, build)
+
+def _pagination_headers(next_cursor: Optional[str], total_count: Optional[int]) -> dict:
+    headers = {}
+    if total_count is not None:
+        headers["X-Total-Count"] = str(min(total_count, crud.APPLICATION_COUNT_LIMIT))
+        if total_count > crud.APPLICATION_COUNT_LIMIT:
+            headers["X-Total-Count-Exact"] = "false"
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return headers
+
+def _applications_page_response(rows, next_cursor: Optional[str], total_count: Optional[int]) -> FastJSONResponse:
+    return FastJSONResponse(rows, headers=_pagination_headers(next_cursor, total_count))
+
+def view_all_applications(response: Response, skip: int = 0, limit: int = Query(100, ge=1, le=1000),
+                          cursor: Optional[str] = None,
+                          status_filter: Optional[models.ApplicationStatus] = Query(None, alias="status"),
+                          dormitory_id: Optional[int] = None,
+                          date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+                          db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
+    try:
+        if FAST_JSON_ENABLED:
+            rows, next_cursor, total_count = crud.get_staff_application_rows(
+                db_sqlite=db_sqlite, db_pg=db_pg, skip=skip, limit=limit, cursor=cursor, status=status_filter,
+                dormitory_id=dormitory_id, date_from=date_from, date_to=date_to
+            )
+            return _applications_page_response(rows, next_cursor, total_count)
+        applications, next_cursor, total_count = crud.get_all_applications(
+            db_sqlite=db_sqlite, skip=skip, limit=limit, cursor=cursor, status=status_filter,
+            dormitory_id=dormitory_id, date_from=date_from, date_to=date_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers.update(_pagination_headers(next_cursor, total_count))
+    return crud.build_staff_application_responses(db_pg, applications)
+
+async def view_all_applications_async(response: Response, skip: int = 0, limit: int = Query(100, ge=1, le=1000),
+                                      cursor: Optional[str] = None,
+                                      status_filter: Optional[models.ApplicationStatus] = Query(None, alias="status"),
+                                      dormitory_id: Optional[int] = None,
+                                      date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+                                      db_sqlite: AsyncSession = Depends(get_async_db_sqlite),
+                                      db_count: AsyncSession = Depends(get_async_db_sqlite, use_cache=False),
+                                      db_pg: AsyncSession = Depends(get_async_db_postgres)):
+    try:
+        if FAST_JSON_ENABLED:
+            rows, next_cursor, total_count = await async_crud.get_staff_application_rows_page(
+                db_sqlite=db_sqlite, db_count=db_count, db_pg=db_pg, skip=skip, limit=limit, cursor=cursor,
+                status=status_filter, dormitory_id=dormitory_id, date_from=date_from, date_to=date_to
+            )
+            return _applications_page_response(rows, next_cursor, total_count)
+        applications, next_cursor, total_count = await async_crud.get_staff_applications_page(
+            db_sqlite=db_sqlite, db_count=db_count, db_pg=db_pg, skip=skip, limit=limit, cursor=cursor,
+            status=status_filter, dormitory_id=dormitory_id, date_from=date_from, date_to=date_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers.update(_pagination_headers(next_cursor, total_count))
+    return applications
+
+router.add_api_route(
+    "/applications/", view_all_applications_async if ASYNC_DB_ENABLED else view_all_applications,
+    methods=["GET"], response_model=List[schemas.StaffApplicationResponse], name="view_all_applications"
+)
+
+@router.get("/applications/export/")
+def stream_applications_export(export_format: str = Query("ndjson", alias="format"),
+                               status_filter: Optional[models.ApplicationStatus] = Query(None, alias="status")):
+    return _streaming_export(export_format, "applications", crud.APPLICATION_EXPORT_FIELDS,
+                             lambda db_sqlite, db_pg: crud.iter_application_export_rows(db_sqlite, db_pg, status=status_filter),
+                             with_students=True)
 
 @router.put("/applications/{application_id}/status/", response_model=schemas.StaffApplicationResponse)
 def update_application_status_manual(application_id: int, status_update: schemas.ApplicationStatusUpdate, db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
-    application = crud.update_application_status(db_sqlite=db_sqlite, db_pg=db_pg, application_id=application_id, status_update=status_update)
+    try:
+        application = crud.update_application_status(db_sqlite=db_sqlite, db_pg=db_pg, application_id=application_id, status_update=status_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not application:
         raise HTTPException(status_code=404, detail="Заявление не найдено.")
-
-    student_info = crud.get_student_by_id_pg(db_pg, student_id=application.student_id) if application.student_id else None
-    student_data = schemas.StudentInDB.from_orm(student_info) if student_info else None
-
-    app_dict = {
-        "id": application.id,
-        "student_id": application.student_id,
-        "application_date": application.application_date,
-        "status": application.status,
-        "rejection_reason": application.rejection_reason,
-        "allocated_room_id": application.allocated_room_id,
-        "student_info": student_data
-    }
-
-    if application.status == models.ApplicationStatus.ALLOCATED and application.allocated_room_detail and application.allocated_room_detail.dormitory:
-        room = application.allocated_room_detail
-        dorm = room.dormitory
-        app_dict.update({
-            "allocated_dorm_name": dorm.name,
-            "allocated_dorm_address": dorm.address,
-            "allocated_room_number": room.room_number,
-            "allocated_floor_number": room.floor_number
-        })
-
-    return schemas.StaffApplicationResponse(**app_dict)
+    return crud.build_staff_application_responses(db_pg, [application])[0]
 
 @router.put("/applications/{application_id}/allocate/", response_model=schemas.StaffApplicationResponse)
 def update_application_allocation(application_id: int, allocation_update: schemas.ApplicationAllocationUpdate, db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
@@ -161,45 +221,139 @@ def update_application_allocation(application_id: int, allocation_update: schema
 
     if not application:
         raise HTTPException(status_code=404, detail="Заявление или комната не найдены, или студент уже не в статусе «Заселен».")
-
-    student_info = crud.get_student_by_id_pg(db_pg, student_id=application.student_id) if application.student_id else None
-    student_data = schemas.StudentInDB.from_orm(student_info) if student_info else None
-
-    app_dict = {
-        "id": application.id,
-        "student_id": application.student_id,
-        "application_date": application.application_date,
-        "status": application.status,
-        "rejection_reason": application.rejection_reason,
-        "allocated_room_id": application.allocated_room_id,
-        "student_info": student_data
-    }
-
-    if application.status == models.ApplicationStatus.ALLOCATED and application.allocated_room_detail and application.allocated_room_detail.dormitory:
-        room = application.allocated_room_detail
-        dorm = room.dormitory
-        app_dict.update({
-            "allocated_dorm_name": dorm.name,
-            "allocated_dorm_address": dorm.address,
-            "allocated_room_number": room.room_number,
-            "allocated_floor_number": room.floor_number
-        })
-
-    return schemas.StaffApplicationResponse(**app_dict)
+    return crud.build_staff_application_responses(db_pg, [application])[0]
 
 @router.get("/applications/available_rooms/", response_model=List[schemas.RoomResponseWithDormitory])
-def get_available_rooms_for_allocation(db_sqlite: Session = Depends(get_db_sqlite)):
-    return crud.get_available_rooms(db_sqlite)
+def get_available_rooms_for_allocation(request: Request, db_sqlite: Session = Depends(get_db_sqlite)):
+    return cached_json_response(request, ("available_rooms",), (RESOURCE_DORMITORIES, RESOURCE_OCCUPANCY),
+                                List[schemas.RoomResponseWithDormitory], lambda: crud.get_available_rooms(db_sqlite))
 
 @router.post("/applications/process_auto/")
-def trigger_automatic_application_processing(db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
-    return crud.process_applications_auto(db_sqlite=db_sqlite, db_pg=db_pg)
-
-@router.get("/dormitories/", response_model=List[schemas.DormitoryResponse])
-def get_all_dormitories(db_sqlite: Session = Depends(get_db_sqlite)):
-    dormitories_orm = crud.get_dormitories_structure(db_sqlite=db_sqlite)
-    response = []
-    for dorm in dormitories_orm:
-        rooms = [schemas.RoomResponse.from_orm(r) for r in dorm.rooms] if dorm.rooms else []
-        response.append(schemas.DormitoryResponse(id=dorm.id, name=dorm.name, address=dorm.address, rooms=rooms))
-    return response
\ No newline at end of file
+def trigger_automatic_application_processing(strategy: Optional[str] = None, db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
+    try:
+        return crud.process_applications_auto(db_sqlite=db_sqlite, db_pg=db_pg, strategy_name=strategy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/applications/process_auto/simulate/")
+def simulate_automatic_application_processing(strategy: Optional[str] = None, db_sqlite: Session = Depends(get_db_sqlite), db_pg: Session = Depends(get_db_postgres)):
+    try:
+        return crud.simulate_applications_auto(db_sqlite=db_sqlite, db_pg=db_pg, strategy_name=strategy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/dormitories/", response_model=List[schemas.DormitorySummary])
+def get_all_dormitories(request: Request, db_sqlite: Session = Depends(get_db_sqlite)):
+    return cached_json_response(request, ("dormitories",), (RESOURCE_DORMITORIES, RESOURCE_OCCUPANCY),
+                                List[schemas.DormitorySummary], lambda: crud.get_dormitory_summary_rows(db_sqlite))
+
+@router.get("/dormitories/{dormitory_id}/rooms/", response_model=List[schemas.RoomResponse])
+def get_dormitory_rooms(dormitory_id: int, db_sqlite: Session = Depends(get_db_sqlite)):
+    rooms = crud.get_dormitory_rooms(db_sqlite=db_sqlite, dormitory_id=dormitory_id)
+    if not rooms and not crud.get_dormitory_by_id(db_sqlite, dormitory_id):
+        raise HTTPException(status_code=404, detail="Общежитие не найдено.")
+    return rooms
+
+@router.get("/events/")
+async def stream_changes(request: Request, last_event_id: Optional[str] = Header(None)):
+    subscription, backlog = change_broker.subscribe(last_event_id)
+
+    async def generate():
+        try:
+            yield f"retry: 3000\nid: {change_broker.event_id(subscription.start_id)}\n\n"
+            for change in backlog:
+                yield format_sse(change)
+            while not await request.is_disconnected():
+                try:
+                    change = await asyncio.wait_for(subscription.queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(change)
+        finally:
+            change_broker.unsubscribe(subscription)
+
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/events/stats/")
+def get_change_feed_stats():
+    return change_broker.get_stats()
+
+@router.get("/http_cache/stats/")
+def get_http_cache_stats():
+    return {**response_cache.stats(), "versions": resource_versions.as_dict()}
+
+@router.get("/student_cache/stats/")
+def get_student_cache_stats():
+    return student_cache.stats()
+
+@router.get("/occupancy/summary/", response_model=schemas.OccupancySummaryResponse)
+def get_occupancy_summary(db_sqlite: Session = Depends(get_db_sqlite)):
+    return crud.get_occupancy_summary(db_sqlite)
+
+@router.post("/occupancy/reconcile/", response_model=schemas.OccupancyReconciliationResponse)
+def reconcile_room_occupancy(fix: bool = False, db_sqlite: Session = Depends(get_db_sqlite)):
+    return crud.reconcile_room_occupancy(db_sqlite, fix=fix)
+
+@router.get("/database/pool_stats/")
+def get_database_pool_stats():
+    return get_pool_stats()
+
+@router.post("/student_cache/invalidate/")
+def invalidate_student_cache():
+    student_cache.clear()
+    resource_versions.bump(RESOURCE_STUDENTS)
+    return {"message": "Кэш студентов очищен.", **student_cache.stats()}
+
+@router.post("/student_cache/warm/")
+def warm_student_cache(db_pg: Session = Depends(get_db_postgres)):
+    warmed_count = crud.warm_student_cache(db_pg)
+    resource_versions.bump(RESOURCE_STUDENTS)
+    return {"message": f"Кэш студентов заполнен: загружено записей {warmed_count}.", **student_cache.stats()}
+
+def _import_structure_from_file(path: str, import_format: str, remove_missing: bool):
+    def work(db_sqlite: Session, db_pg: Session, progress: crud.ProgressCallback):
+        try:
+            with open(path, "rb") as upload:
+                row_chunks = structure_io.validate_rows_in_chunks(structure_io.iter_structure_rows(upload, import_format))
+                return crud.import_structure_rows(db_sqlite=db_sqlite, row_chunks=row_chunks, progress=progress,
+                                                  remove_missing=remove_missing)
+        finally:
+            os.remove(path)
+    return work
+
+@router.post("/jobs/process_auto/", response_model=schemas.JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_automatic_processing_job(strategy: Optional[str] = None, db_sqlite: Session = Depends(get_db_sqlite)):
+    return jobs.submit_job(
+        db_sqlite, "process_auto",
+        lambda job_db_sqlite, job_db_pg, progress: crud.process_applications_auto(
+            db_sqlite=job_db_sqlite, db_pg=job_db_pg, strategy_name=strategy, progress=progress
+        )
+    )
+
+@router.post("/jobs/structure_import/", response_model=schemas.JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_structure_import_job(file: UploadFile = File(...), import_format: Optional[str] = Query(None, alias="format"), remove_missing: bool = True, db_sqlite: Session = Depends(get_db_sqlite)):
+    import_format = _detect_structure_import_format(file, import_format)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{import_format}") as upload_copy:
+        shutil.copyfileobj(file.file, upload_copy)
+    return jobs.submit_job(db_sqlite, "structure_import", _import_structure_from_file(upload_copy.name, import_format, remove_missing))
+
+@router.get("/jobs/{job_id}/", response_model=schemas.JobResponse)
+def get_job_status(job_id: int, db_sqlite: Session = Depends(get_db_sqlite)):
+    job = jobs.get_job(db_sqlite, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача не найдена.")
+    return job
+
+@router.get("/jobs/{job_id}/result/")
+def get_job_result(job_id: int, db_sqlite: Session = Depends(get_db_sqlite)):
+    job_result = jobs.get_job_result(db_sqlite, job_id)
+    if not job_result:
+        raise HTTPException(status_code=404, detail="Задача не найдена.")
+    job, result = job_result
+    if job.status == models.JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Задача завершилась с ошибкой: {job.error}")
+    if job.status != models.JobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail="Задача еще не завершена.")
+    return result
\ No newline at end of file
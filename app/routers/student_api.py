@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app import crud, schemas
-from app.database import get_db_sqlite, get_db_postgres
+from app import async_crud, crud, schemas
+from app.database import ASYNC_DB_ENABLED, get_async_db_postgres, get_async_db_sqlite, get_db_sqlite, get_db_postgres
 
 router = APIRouter(
     prefix="/student",
     tags=["student"],
 )
 
-@router.post("/applications/", response_model=schemas.ApplicationResponse, status_code=status.HTTP_201_CREATED)
 def create_student_application(
     application_in: schemas.ApplicationCreate,
     db_sqlite: Session = Depends(get_db_sqlite),
@@ -21,7 +21,6 @@ def create_student_application(
     return application
 
 
-@router.post("/applications/status_by_details/", response_model=schemas.ApplicationStatusResponse)
 def check_application_status_by_details(
     status_request: schemas.ApplicationStatusCheckByTicketRequest,
     db_sqlite: Session = Depends(get_db_sqlite),
@@ -38,4 +37,49 @@ def check_application_status_by_details(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Заявление для указанных данных студента не найдено."
         )
-    return application_status
\ No newline at end of file
+    return application_status
+
+
+async def create_student_application_async(
+    application_in: schemas.ApplicationCreate,
+    db_sqlite: AsyncSession = Depends(get_async_db_sqlite),
+    db_pg: AsyncSession = Depends(get_async_db_postgres)
+):
+    try:
+        application = await async_crud.create_application(db_sqlite=db_sqlite, db_pg=db_pg, application_in=application_in)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return application
+
+
+async def check_application_status_by_details_async(
+    status_request: schemas.ApplicationStatusCheckByTicketRequest,
+    db_sqlite: AsyncSession = Depends(get_async_db_sqlite),
+    db_pg: AsyncSession = Depends(get_async_db_postgres)
+):
+    application_status = await async_crud.get_application_status_by_student_details(
+        db_sqlite=db_sqlite,
+        db_pg=db_pg,
+        student_ticket_number=status_request.student_ticket_number,
+        last_name=status_request.last_name
+    )
+    if not application_status:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Заявление для указанных данных студента не найдено."
+        )
+    return application_status
+
+
+router.add_api_route(
+    "/applications/",
+    create_student_application_async if ASYNC_DB_ENABLED else create_student_application,
+    methods=["POST"], response_model=schemas.ApplicationResponse, status_code=status.HTTP_201_CREATED,
+    name="create_student_application"
+)
+router.add_api_route(
+    "/applications/status_by_details/",
+    check_application_status_by_details_async if ASYNC_DB_ENABLED else check_application_status_by_details,
+    methods=["POST"], response_model=schemas.ApplicationStatusResponse,
+    name="check_application_status_by_details"
+)
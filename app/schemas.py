@@ -1,7 +1,7 @@
 import datetime
 from typing import List, Optional
-from pydantic import BaseModel, ConfigDict
-from app.models import ApplicationStatus
+from pydantic import BaseModel, ConfigDict, model_validator
+from app.models import ApplicationStatus, JobStatus
 
 
 class AppBaseModel(BaseModel):
@@ -98,6 +98,13 @@ class DormitoryResponse(DormitoryBase):
     rooms: List[RoomResponse] = ()
 
 
+class DormitorySummary(DormitoryBase):
+    id: int
+    room_count: int
+    capacity: int
+    occupancy: int
+
+
 class DormitoryStructure(DormitoryBase):
     id: Optional[int] = None
     rooms: List[RoomCreate] = ()
@@ -107,6 +114,25 @@ class DormitoryStructureExport(AppBaseModel):
     dormitories: List[DormitoryStructure]
 
 
+class StructureImportRow(AppBaseModel):
+    dormitory_name: str
+    dormitory_address: str
+    floor_number: Optional[int] = None
+    room_number: Optional[str] = None
+    capacity: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_room_fields(self):
+        room_fields = (self.floor_number, self.room_number, self.capacity)
+        if any(value is not None for value in room_fields) and any(value is None for value in room_fields):
+            raise ValueError("floor_number, room_number и capacity должны быть заданы вместе.")
+        return self
+
+    @property
+    def has_room(self) -> bool:
+        return self.room_number is not None
+
+
 class ApplicationStatusUpdate(AppBaseModel):
     status: ApplicationStatus
     rejection_reason: Optional[str] = None
@@ -140,4 +166,59 @@ class DormitoryDetailsResponse(AppBaseModel):
     id: int
     name: str
     address: str
+    floors: List[int] = ()
     rooms: List[RoomDetails] = ()
+
+
+class JobResponse(AppBaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    processed: int
+    total: Optional[int] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime.datetime] = None
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+
+
+class OccupancyFloorSummary(AppBaseModel):
+    floor_number: int
+    rooms: int
+    capacity: int
+    occupancy: int
+    free_beds: int
+
+
+class OccupancyDormitorySummary(AppBaseModel):
+    dormitory_id: int
+    dormitory_name: str
+    rooms: int
+    capacity: int
+    occupancy: int
+    free_beds: int
+    floors: List[OccupancyFloorSummary] = ()
+
+
+class OccupancySummaryResponse(AppBaseModel):
+    rooms: int
+    capacity: int
+    occupancy: int
+    free_beds: int
+    dormitories: List[OccupancyDormitorySummary] = ()
+
+
+class RoomOccupancyDrift(AppBaseModel):
+    room_id: int
+    dormitory_id: int
+    floor_number: int
+    room_number: str
+    capacity: int
+    recorded_occupancy: int
+    actual_occupancy: int
+
+
+class OccupancyReconciliationResponse(AppBaseModel):
+    drifted_rooms: int
+    fixed: bool
+    rooms: List[RoomOccupancyDrift] = ()
@@ -0,0 +1,222 @@
+import csv
+import io
+import json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+from pydantic import ValidationError
+from app import schemas
+
+STRUCTURE_IMPORT_FORMATS = ("json", "ndjson", "csv")
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+STRUCTURE_ROW_FIELDS = ("dormitory_name", "dormitory_address", "floor_number", "room_number", "capacity")
+STRUCTURE_VALIDATION_CHUNK_SIZE = 1000
+JSON_READ_CHUNK_SIZE = 64 * 1024
+EXPORT_WRITE_CHUNK_SIZE = 1000
+
+_CONTENT_TYPE_FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonlines": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv",
+}
+_EXTENSION_FORMATS = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+}
+
+
+def detect_import_format(content_type: Optional[str], filename: Optional[str],
+                         requested_format: Optional[str] = None) -> Optional[str]:
+    if requested_format:
+        return requested_format if requested_format in STRUCTURE_IMPORT_FORMATS else None
+    if content_type in _CONTENT_TYPE_FORMATS:
+        return _CONTENT_TYPE_FORMATS[content_type]
+    for extension, import_format in _EXTENSION_FORMATS.items():
+        if filename and filename.lower().endswith(extension):
+            return import_format
+    return None
+
+
+class _JsonStreamReader:
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.buffer = ""
+        self.position = 0
+        self.exhausted = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.exhausted:
+            return False
+        chunk = self.stream.read(max(JSON_READ_CHUNK_SIZE, len(self.buffer) - self.position))
+        if not chunk:
+            self.exhausted = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+
+    def expect(self, token: str):
+        if self.peek() != token:
+            raise ValueError(f"Неверный формат JSON: ожидался символ '{token}'.")
+        self.position += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.exhausted:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise ValueError("Неверный формат JSON.")
+            self._fill()
+
+
+def iter_json_dormitories(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    reader = _JsonStreamReader(stream)
+    reader.expect("{")
+    if reader.peek() != "}":
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == "dormitories":
+                reader.expect("[")
+                if reader.peek() != "]":
+                    while True:
+                        yield reader.value()
+                        if reader.peek() != ",":
+                            break
+                        reader.expect(",")
+                reader.expect("]")
+            else:
+                reader.value()
+            if reader.peek() != ",":
+                break
+            reader.expect(",")
+    reader.expect("}")
+    if reader.peek() != "":
+        raise ValueError("Неверный формат JSON: лишние данные после конца документа.")
+
+
+def _rows_from_json(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    for dormitory in iter_json_dormitories(stream):
+        if not isinstance(dormitory, dict):
+            raise ValueError("Неверная структура данных: общежитие должно быть объектом.")
+        dormitory_row = {"dormitory_name": dormitory.get("name"), "dormitory_address": dormitory.get("address")}
+        yield dormitory_row
+        for room in dormitory.get("rooms") or ():
+            if not isinstance(room, dict):
+                raise ValueError("Неверная структура данных: комната должна быть объектом.")
+            yield {**dormitory_row, **room}
+
+
+def _rows_from_ndjson(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                raise ValueError(f"Неверный формат NDJSON в строке {line_number}.")
+
+
+def _rows_from_csv(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    reader = csv.DictReader(stream)
+    missing_columns = {"dormitory_name", "dormitory_address"} - set(reader.fieldnames or ())
+    if missing_columns:
+        raise ValueError(f"В CSV отсутствуют обязательные столбцы: {', '.join(sorted(missing_columns))}.")
+    for row in reader:
+        yield {key: (value if value != "" else None) for key, value in row.items() if key}
+
+
+def iter_structure_rows(upload: BinaryIO, import_format: str) -> Iterator[Dict[str, Any]]:
+    stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    try:
+        if import_format == "json":
+            yield from _rows_from_json(stream)
+        elif import_format == "ndjson":
+            yield from _rows_from_ndjson(stream)
+        elif import_format == "csv":
+            yield from _rows_from_csv(stream)
+        else:
+            raise ValueError(f"Неподдерживаемый формат импорта: {import_format}.")
+    finally:
+        if not stream.closed:
+            stream.detach()
+
+
+def iter_rows_from_structure(structure_data: schemas.DormitoryStructureExport) -> Iterator[Dict[str, Any]]:
+    for dormitory in structure_data.dormitories:
+        dormitory_row = {"dormitory_name": dormitory.name, "dormitory_address": dormitory.address}
+        yield dormitory_row
+        for room in dormitory.rooms:
+            yield {**dormitory_row, "floor_number": room.floor_number, "room_number": room.room_number,
+                   "capacity": room.capacity}
+
+
+def validate_rows_in_chunks(rows: Iterable[Dict[str, Any]],
+                            chunk_size: int = STRUCTURE_VALIDATION_CHUNK_SIZE) -> Iterator[
+    List[schemas.StructureImportRow]]:
+    chunk = []
+    for row_number, row in enumerate(rows, start=1):
+        try:
+            chunk.append(schemas.StructureImportRow.model_validate(row))
+        except ValidationError as e:
+            raise ValueError(f"Неверная структура данных в записи {row_number}: {e}")
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_ndjson_chunks(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _iter_csv_chunks(rows: Iterable[Dict[str, Any]], fields: Sequence[str], chunk_size: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+    buffer.write("\ufeff")
+    writer.writeheader()
+    buffered_rows = 0
+    for row in rows:
+        writer.writerow(row)
+        buffered_rows += 1
+        if buffered_rows >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            buffered_rows = 0
+    yield buffer.getvalue()
+
+
+def iter_export_chunks(rows: Iterable[Dict[str, Any]], export_format: str, fields: Sequence[str],
+                       chunk_size: int = EXPORT_WRITE_CHUNK_SIZE) -> Iterator[str]:
+    if export_format == "ndjson":
+        return _iter_ndjson_chunks(rows, chunk_size)
+    if export_format == "csv":
+        return _iter_csv_chunks(rows, fields, chunk_size)
+    raise ValueError(f"Неподдерживаемый формат экспорта: {export_format}.")
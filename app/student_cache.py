@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from app import schemas
+from app.database import config
+
+
+def normalize_last_name(last_name: str) -> str:
+    return last_name.strip().lower()
+
+
+class StudentDirectoryCache:
+    def __init__(self, max_size: int, ttl_seconds: float, negative_ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def id_key(student_id: int) -> Tuple:
+        return "id", student_id
+
+    @staticmethod
+    def ticket_key(student_ticket_number: str, last_name: str) -> Tuple:
+        return "ticket", student_ticket_number, normalize_last_name(last_name)
+
+    def get(self, key: Hashable) -> Tuple[bool, Optional[schemas.StudentInDB]]:
+        if not self.enabled:
+            return False, None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, value: Optional[schemas.StudentInDB]):
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put_student(self, student: schemas.StudentInDB):
+        self.put(self.id_key(student.id), student)
+        self.put(self.ticket_key(student.student_ticket_number, student.last_name), student)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "negative_ttl_seconds": self.negative_ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+student_cache = StudentDirectoryCache(
+    max_size=config.getint("student_cache", "max_size", fallback=50000),
+    ttl_seconds=config.getfloat("student_cache", "ttl_seconds", fallback=3600),
+    negative_ttl_seconds=config.getfloat("student_cache", "negative_ttl_seconds", fallback=60),
+)
@@ -0,0 +1,64 @@
+# Compares the allocation strategies on synthetic rooms and applicants.
+# Run from the repository root: python -m benchmarks.allocation_strategies --sizes 1000 10000 50000
+import argparse
+import time
+from collections import Counter
+from app.allocation import ALLOCATION_STRATEGIES, Applicant, RoomSlot
+
+
+def build_rooms(applicant_count: int, capacity: int = 3, rooms_per_floor: int = 20, floors: int = 5) -> list:
+    rooms = []
+    room_count = applicant_count * 3 // (2 * capacity) + 1
+    for index in range(room_count):
+        floor_index = index // rooms_per_floor
+        occupancy = capacity - 1 if index % 7 == 0 else 0
+        rooms.append(RoomSlot(index + 1, 1 + floor_index // floors, 1 + floor_index % floors, capacity, occupancy))
+    return rooms
+
+
+def build_applicants(count: int, groups: int = 200, faculties: int = 10) -> list:
+    return [Applicant(application_id, application_id, 1 + application_id % groups,
+                      1 + application_id % groups % faculties) for application_id in range(1, count + 1)]
+
+
+def describe(assignments: dict, applicants: list, rooms: list) -> dict:
+    rooms_by_id = {room.id: room for room in rooms}
+    group_floors = {}
+    for applicant in applicants:
+        room_id = assignments.get(applicant.application_id)
+        if room_id is not None:
+            room = rooms_by_id[room_id]
+            group_floors.setdefault(applicant.group_id, set()).add((room.dormitory_id, room.floor_number))
+    capacity = Counter()
+    load = Counter()
+    for room in rooms:
+        capacity[room.dormitory_id] += room.capacity
+        load[room.dormitory_id] += room.occupancy
+    for room_id in assignments.values():
+        load[rooms_by_id[room_id].dormitory_id] += 1
+    ratios = [load[dormitory_id] / capacity[dormitory_id] for dormitory_id in capacity]
+    return {
+        "placed": len(assignments),
+        "floors_per_group": round(sum(map(len, group_floors.values())) / max(len(group_floors), 1), 2),
+        "load_spread": round(max(ratios) - min(ratios), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        applicants = build_applicants(size)
+        print(f"applicants: {size}, rooms: {len(build_rooms(size))}")
+        for name, strategy_class in ALLOCATION_STRATEGIES.items():
+            rooms = build_rooms(size)
+            started = time.perf_counter()
+            assignments = strategy_class().assign(applicants, rooms)
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            print(f"  {name:<22} {elapsed_ms:>9} ms  {describe(assignments, applicants, build_rooms(size))}")
+
+
+if __name__ == "__main__":
+    main()
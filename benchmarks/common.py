@@ -0,0 +1,97 @@
+import contextlib
+import datetime
+import math
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+from sqlalchemy import insert
+from app import crud, database, models
+
+
+@contextlib.contextmanager
+def temporary_databases():
+    saved_engines = dict(database._engines)
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_engine = database._create_sqlite_file_engine(f"sqlite:///{directory}/dormitory.db")
+        postgres_engine = database.create_postgres_standin_engine(f"sqlite:///{directory}/students.db")
+        models.Base_sqlite.metadata.create_all(sqlite_engine)
+        models.Base_postgres.metadata.create_all(postgres_engine)
+        database._engines.update(sqlite=sqlite_engine, postgres=postgres_engine)
+        database.SessionLocal_sqlite._sessionmaker = None
+        database.SessionLocal_postgres._sessionmaker = None
+        try:
+            yield sqlite_engine, postgres_engine
+        finally:
+            sqlite_engine.dispose()
+            postgres_engine.dispose()
+            database._engines.clear()
+            database._engines.update(saved_engines)
+            database.SessionLocal_sqlite._sessionmaker = None
+            database.SessionLocal_postgres._sessionmaker = None
+
+
+def seed_students(postgres_engine, count: int, groups: int = 50, faculties: int = 5):
+    with postgres_engine.begin() as connection:
+        connection.execute(insert(models.Faculty), [
+            {"id": faculty_id, "name": f"Факультет {faculty_id}"} for faculty_id in range(1, faculties + 1)
+        ])
+        connection.execute(insert(models.Group), [
+            {"id": group_id, "name": f"Группа {group_id}", "faculty_id": 1 + group_id % faculties}
+            for group_id in range(1, groups + 1)
+        ])
+        connection.execute(insert(models.Student), [
+            {"id": student_id, "student_ticket_number": f"T{student_id:07d}", "last_name": f"Иванов{student_id}",
+             "first_name": "Иван", "birth_date": datetime.date(2004, 1, 1), "is_foreign": student_id % 4 != 0,
+             "city_of_residence": "Город", "group_id": 1 + student_id % groups}
+            for student_id in range(1, count + 1)
+        ])
+
+
+def seed_campus(sqlite_engine, applications: int, dormitories: int = 5, floors: int = 5, rooms_per_floor: int = 40,
+                capacity: int = 3, allocated_share: float = 0.5):
+    started = datetime.datetime(2024, 6, 1, 9, 0)
+    rooms_per_dormitory = floors * rooms_per_floor
+    allocated = min(int(applications * allocated_share), dormitories * rooms_per_dormitory * capacity)
+    with sqlite_engine.begin() as connection:
+        connection.execute(insert(models.Dormitory), [
+            {"id": dormitory_id, "name": f"Общежитие {dormitory_id}", "address": f"Улица {dormitory_id}"}
+            for dormitory_id in range(1, dormitories + 1)
+        ])
+        connection.execute(insert(models.Room), [
+            {"id": (dormitory_id - 1) * rooms_per_dormitory + (floor - 1) * rooms_per_floor + room,
+             "dormitory_id": dormitory_id, "floor_number": floor, "room_number": f"{floor}{room:02d}",
+             "capacity": capacity, "current_occupancy": 0}
+            for dormitory_id in range(1, dormitories + 1) for floor in range(1, floors + 1)
+            for room in range(1, rooms_per_floor + 1)
+        ])
+        connection.execute(insert(models.Application), [
+            {"id": application_id, "student_id": application_id,
+             "application_date": started + datetime.timedelta(minutes=application_id),
+             "status": models.ApplicationStatus.ALLOCATED if application_id <= allocated
+             else models.ApplicationStatus.PENDING,
+             "allocated_room_id": 1 + (application_id - 1) // capacity if application_id <= allocated else None}
+            for application_id in range(1, applications + 1)
+        ])
+    with database.SessionLocal_sqlite() as db_sqlite:
+        crud.reconcile_room_occupancy(db_sqlite, fix=True)
+        crud.refresh_occupancy_summary(db_sqlite)
+        db_sqlite.commit()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[max(math.ceil(len(samples) * 0.5) - 1, 0)], 3),
+        "p95_ms": round(samples[max(math.ceil(len(samples) * 0.95) - 1, 0)], 3),
+    }
+
+
+def measure(call: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
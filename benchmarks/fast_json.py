@@ -0,0 +1,60 @@
+# Compares serializing a page of staff application rows through the response model and through FastJSONResponse.
+# Run from the repository root: python -m benchmarks.fast_json --rows 10000
+import argparse
+import datetime
+from typing import List
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from app import fast_json, models, schemas
+from benchmarks.common import measure
+
+
+def build_rows(count: int) -> list:
+    started = datetime.datetime(2024, 5, 6, 7, 8, 9, 123456)
+    rows = []
+    for application_id in range(1, count + 1):
+        allocated = application_id % 3 != 0
+        rows.append({
+            "id": application_id,
+            "student_id": application_id,
+            "application_date": started + datetime.timedelta(minutes=application_id),
+            "status": models.ApplicationStatus.ALLOCATED if allocated else models.ApplicationStatus.PENDING,
+            "rejection_reason": None,
+            "allocated_room_id": application_id // 2 if allocated else None,
+            "student_info": {
+                "student_ticket_number": f"T{application_id:07d}", "last_name": f"Иванов{application_id}",
+                "first_name": "Иван", "middle_name": None, "birth_date": datetime.date(2004, 1, 1),
+                "is_foreign": application_id % 4 != 0, "city_of_residence": "Город",
+                "group_id": 1 + application_id % 50, "id": application_id,
+            },
+            "allocated_dorm_name": "Общежитие №1" if allocated else None,
+            "allocated_dorm_address": "ул. Ленина, 1" if allocated else None,
+            "allocated_room_number": str(100 + application_id % 40) if allocated else None,
+            "allocated_floor_number": 1 + application_id % 5 if allocated else None,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    adapter = TypeAdapter(List[schemas.StaffApplicationResponse])
+
+    def response_model():
+        return JSONResponse(adapter.dump_python(adapter.validate_python(rows), mode="json")).body
+
+    def fast_response():
+        return fast_json.FastJSONResponse(rows).body
+
+    assert response_model() == fast_response(), "fast path output differs from the response model"
+    print(f"rows: {args.rows}, orjson: {fast_json.orjson is not None}")
+    print(f"  response_model       {measure(response_model, args.repeat)}")
+    print(f"  fast_json_response   {measure(fast_response, args.repeat)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Drives the sync and the asyncio staff application reads with concurrent clients and compares throughput.
+# Run from the repository root: python -m benchmarks.sync_vs_async --clients 1 10 50 --requests 2000
+import argparse
+import asyncio
+import time
+from typing import List
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app import database, schemas
+from app.routers import staff_api
+from app.student_cache import student_cache
+from benchmarks.common import seed_campus, seed_students, summarize, temporary_databases
+
+
+def build_app(sqlite_url: str, postgres_url: str):
+    sqlite_engine = create_async_engine(database.async_database_url(sqlite_url))
+    postgres_engine = create_async_engine(database.async_database_url(postgres_url))
+    database.configure_sqlite_engine(sqlite_engine.sync_engine)
+    database.configure_sqlite_engine(postgres_engine.sync_engine)
+    event.listen(postgres_engine.sync_engine, "connect", database.register_standin_functions)
+    database._engines.update(async_sqlite=sqlite_engine.sync_engine, async_postgres=postgres_engine.sync_engine)
+    sqlite_sessions = async_sessionmaker(sqlite_engine, autoflush=False, expire_on_commit=False)
+    postgres_sessions = async_sessionmaker(postgres_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_async_db_sqlite():
+        async with sqlite_sessions() as db:
+            yield db
+
+    async def get_async_db_postgres():
+        async with postgres_sessions() as db:
+            yield db
+
+    app = FastAPI()
+    response_model = List[schemas.StaffApplicationResponse]
+    app.add_api_route("/sync/applications/", staff_api.view_all_applications, methods=["GET"],
+                      response_model=response_model)
+    app.add_api_route("/async/applications/", staff_api.view_all_applications_async, methods=["GET"],
+                      response_model=response_model)
+    app.dependency_overrides[database.get_async_db_sqlite] = get_async_db_sqlite
+    app.dependency_overrides[database.get_async_db_postgres] = get_async_db_postgres
+    return app, (sqlite_engine, postgres_engine)
+
+
+async def run_clients(app, path: str, clients: int, requests: int, limit: int) -> dict:
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def client(http):
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await http.get(path, params={"limit": limit})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return {"requests_per_s": round(len(latencies) / elapsed, 1), **summarize(latencies)}
+
+
+async def compare(app, engines, args):
+    for clients in args.clients:
+        print(f"clients: {clients}")
+        for name in ("sync", "async"):
+            student_cache.clear()
+            result = await run_clients(app, f"/{name}/applications/", clients, args.requests, args.limit)
+            print(f"  {name:<6} {result}")
+    for engine in engines:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--applications", type=int, default=20000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with temporary_databases() as (sqlite_engine, postgres_engine):
+        seed_students(postgres_engine, args.students)
+        seed_campus(sqlite_engine, args.applications)
+        app, engines = build_app(str(sqlite_engine.url), str(postgres_engine.url))
+        print(f"students: {args.students}, applications: {args.applications}, page size: {args.limit}")
+        asyncio.run(compare(app, engines, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Runs the same request mix against one SQLite file with 1, 2 and 4 worker processes and reports requests/s.
+# Each worker serves its own copy of the app, like a uvicorn worker, and is driven by in-process concurrent clients.
+# Run from the repository root: python -m benchmarks.worker_scaling --workers 1 2 4 --seconds 10
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+import httpx
+from fastapi import FastAPI
+from app import database
+from benchmarks.common import seed_campus, seed_students, summarize, temporary_databases
+
+STUDENT_PAGE_SHARE = 0.5
+
+
+def build_app():
+    from app.http_cache import response_cache
+    from app.room_index import free_room_index
+    from app.routers import staff_api, student_api
+    app = FastAPI()
+    app.include_router(student_api.router)
+    app.include_router(staff_api.router)
+    app.dependency_overrides[staff_api.verify_ip] = lambda: None
+    response_cache.disable()
+    free_room_index.disable()
+    return app
+
+
+async def drive(app, worker_index: int, clients: int, seconds: float, args) -> tuple:
+    latencies = []
+    failures = 0
+    new_students = iter(range(args.students - worker_index, args.applications, -args.max_workers))
+    pending_ids = list(range(args.applications // 2 + 1, args.applications + 1))[worker_index::args.max_workers]
+    random.shuffle(pending_ids)
+    pending_ids = iter(pending_ids)
+    deadline = time.perf_counter() + seconds
+
+    def next_request():
+        student_id = random.randint(1, args.applications)
+        choice = random.random()
+        if choice < STUDENT_PAGE_SHARE:
+            return "POST", "/student/applications/status_by_details/", {
+                "student_ticket_number": f"T{student_id:07d}", "last_name": f"Иванов{student_id}"}
+        if choice < 0.7:
+            return "GET", "/staff/applications/?limit=50", None
+        if choice < 0.8:
+            return "GET", "/staff/dormitories/", None
+        if choice < 0.9:
+            student_id = next(new_students, student_id)
+            return "POST", "/student/applications/", {
+                "student_ticket_number": f"T{student_id:07d}", "last_name": f"Иванов{student_id}"}
+        return "PUT", f"/staff/applications/{next(pending_ids, student_id)}/status/", {"status": "approved"}
+
+    async def client(http):
+        nonlocal failures
+        while time.perf_counter() < deadline:
+            method, url, body = next_request()
+            started = time.perf_counter()
+            response = await http.request(method, url, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 500:
+                failures += 1
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as http:
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+    return latencies, failures
+
+
+def run_worker(directory: str, worker_index: int, clients: int, seconds: float, args, barrier, results):
+    database.SQLITE_BEGIN_MODE = "immediate"
+    database._engines.update(
+        sqlite=database._create_sqlite_file_engine(f"sqlite:///{directory}/dormitory.db"),
+        postgres=database.create_postgres_standin_engine(f"sqlite:///{directory}/students.db"),
+    )
+    app = build_app()
+    barrier.wait()
+    results.put(asyncio.run(drive(app, worker_index, clients, seconds, args)))
+
+
+def run(seed_directory: str, workers: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("dormitory.db", "students.db"):
+            shutil.copy(os.path.join(seed_directory, name), directory)
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [context.Process(target=run_worker, args=(directory, worker_index, args.clients, args.seconds,
+                                                              args, barrier, results))
+                     for worker_index in range(workers)]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    latencies = [latency for worker_latencies, _ in outcomes for latency in worker_latencies]
+    return {"requests_per_s": round(len(latencies) / args.seconds, 1),
+            "server_errors": sum(failures for _, failures in outcomes), **summarize(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients per worker")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--applications", type=int, default=10000)
+    args = parser.parse_args()
+    args.max_workers = max(args.workers)
+
+    with temporary_databases() as (sqlite_engine, postgres_engine):
+        seed_students(postgres_engine, args.students)
+        seed_campus(sqlite_engine, args.applications)
+        sqlite_engine.dispose()
+        postgres_engine.dispose()
+        seed_directory = os.path.dirname(sqlite_engine.url.database)
+        print(f"students: {args.students}, applications: {args.applications}, cpus: {os.cpu_count()}, "
+              f"clients per worker: {args.clients}")
+        for workers in args.workers:
+            print(f"  workers: {workers:<3} {run(seed_directory, workers, args)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,27 @@
 from fastapi import FastAPI, Request, HTTPException, status, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from app.database import Base_sqlite, engine_sqlite
+from app.database import Base_sqlite, get_engine_sqlite, create_missing_indexes, SessionLocal_sqlite, check_deployment_safety
+from app.database import get_engine_postgres, is_postgres_standin
+from app.models import Base_postgres
+from app.crud import ensure_occupancy_summary
+from app.room_index import free_room_index
+from app.jobs import fail_interrupted_jobs, new_server_run_id
+from app.http_cache import response_cache
+from app.metrics import MetricsMiddleware, metrics_registry
 from app.routers import student_api, staff_api
 import os
 import configparser
+import logging
 
-Base_sqlite.metadata.create_all(bind=engine_sqlite)
+logger = logging.getLogger(__name__)
+
+Base_sqlite.metadata.create_all(bind=get_engine_sqlite())
+for index_warning in create_missing_indexes(get_engine_sqlite(), Base_sqlite.metadata):
+    print(f"[WARNING] {index_warning}")
+if is_postgres_standin():
+    Base_postgres.metadata.create_all(bind=get_engine_postgres())
 
 app = FastAPI(
     title="Dormitory Management API",
@@ -26,6 +41,8 @@ if not os.path.exists(STATIC_FILES_DIR):
 if not os.path.exists(TEMPLATES_DIR):
     raise RuntimeError(f"Templates directory not found at: {TEMPLATES_DIR}. Please ensure 'templates' folder exists.")
 
+app.add_middleware(MetricsMiddleware)
+
 app.mount("/static", StaticFiles(directory=STATIC_FILES_DIR), name="static")
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
@@ -44,9 +61,29 @@ except (configparser.NoSectionError, configparser.NoOptionError):
 
 print(f"[INFO] Allowed IPs: {ALLOWED_IPS}")
 
+SERVER_WORKERS = int(os.environ.get("WEB_CONCURRENCY") or config.getint("server", "workers", fallback=1))
+
+for deployment_warning in check_deployment_safety(SERVER_WORKERS):
+    print(f"[WARNING] {deployment_warning}")
+
+if SERVER_WORKERS > 1:
+    response_cache.disable()
+    free_room_index.disable()
+
+# The id is generated once per launch and inherited by the workers through the environment, so interrupted jobs are
+# failed once per server start, not per worker, and again after every restart.
+SERVER_RUN_ID = os.environ.setdefault(
+    "DORMITORY_SERVER_RUN_ID", new_server_run_id(SERVER_WORKERS > 1 and __name__ != "__main__")
+)
+
+with SessionLocal_sqlite() as startup_db:
+    free_room_index.rebuild(startup_db)
+    ensure_occupancy_summary(startup_db)
+    fail_interrupted_jobs(startup_db, SERVER_RUN_ID)
+
 def verify_ip(request: Request):
     client_host = request.client.host.split(":")[0]
-    print(f"[DEBUG] Incoming IP (cleaned): {client_host}")
+    logger.debug("Incoming IP (cleaned): %s", client_host)
 
     if len(ALLOWED_IPS) > 0 and client_host not in ALLOWED_IPS:
         raise HTTPException(
@@ -54,6 +91,10 @@ def verify_ip(request: Request):
             detail=f"Access forbidden: your IP {client_host} is not allowed"
         )
 
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_ip)])
+def prometheus_metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/", include_in_schema=False)
 async def student_portal_root(request: Request):
     return templates.TemplateResponse("student_portal.html", {"request": request})
@@ -68,6 +109,7 @@ if __name__ == "__main__":
                 "main:app",
                 host="0.0.0.0",
                 port=8443,
+                workers=SERVER_WORKERS,
                 ssl_keyfile="key.pem",
                 ssl_certfile="cert.pem"
         )
\ No newline at end of file
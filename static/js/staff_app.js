@@ -66,7 +66,7 @@ document.addEventListener('DOMContentLoaded', function() {
             data = { detail: `Ошибка парсинга ответа сервера. Статус: ${response.status}` };
         }
 
-        return { ok: response.ok, status: response.status, data };
+        return { ok: response.ok, status: response.status, data, headers: response.headers };
     }
 
     const addDormForm = document.getElementById('addDormitoryForm');
@@ -88,6 +88,16 @@ document.addEventListener('DOMContentLoaded', function() {
 
     const viewAppsBtn = document.getElementById('viewApplicationsBtn');
     const appsTableBody = document.getElementById('applicationsTableBody');
+    const appsStatusFilter = document.getElementById('applicationsStatusFilter');
+    const appsCounter = document.getElementById('applicationsCounter');
+    const loadMoreAppsBtn = document.getElementById('loadMoreApplicationsBtn');
+    const APPLICATIONS_PAGE_SIZE = 100;
+    let applicationsNextCursor = null;
+    let applicationsShownCount = 0;
+    let applicationsTotalCount = null;
+    let applicationsTotalExact = true;
+    let applicationsLoaded = false;
+    const applicationsById = new Map();
     const processAppsBtn = document.getElementById('processApplicationsBtn');
     const processAppsResultDiv = document.getElementById('processResult');
     const updateAppStatusForm = document.getElementById('updateStatusForm');
@@ -113,6 +123,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const dormDetailsContent = document.getElementById('dormDetailsContent');
 
     let roomFieldIndex = 0;
+    let dormitoriesLoaded = false;
+    const dormitoriesById = new Map();
+    let liveUpdatesConnected = false;
 
     async function loadDormitoriesForSelect() {
         if (!structureDormIdSelect) return;
@@ -149,8 +162,10 @@ document.addEventListener('DOMContentLoaded', function() {
 
         if (ok && (status === 204 || status === 200) ) {
             displayAlert(addDormResultDiv, data.message || `Общежитие "${dormName}" успешно удалено.`, 'success', true, true);
-            loadAndDisplayDormitories();
-            loadDormitoriesForSelect();
+            if (!liveUpdatesConnected) {
+                loadAndDisplayDormitories();
+                loadDormitoriesForSelect();
+            }
         } else {
             displayError(addDormResultDiv, data.detail ? data : { detail: `Ошибка при удалении общежития "${dormName}". Статус: ${status}` });
         }
@@ -238,43 +253,47 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    async function loadAndDisplayDormitories() {
-        if (!currentDormsListDiv) return;
-        currentDormsListDiv.innerHTML = '<div class="col"><div class="alert alert-info">Загрузка списка общежитий...</div></div>';
-        const { ok, data } = await fetchAPI('/staff/dormitories/');
-        if (ok && Array.isArray(data)) {
-            if (data.length === 0) {
-                currentDormsListDiv.innerHTML = '<div class="col"><div class="alert alert-secondary">Общежития еще не добавлены.</div></div>';
-                return;
-            }
-            currentDormsListDiv.innerHTML = '';
-            data.forEach(dorm => {
-                let totalCapacity = 0;
-                let totalOccupancy = 0;
-                let roomsHtml = '<p class="card-text small text-muted"><em>Комнаты не определены.</em></p>';
-                if (dorm.rooms && dorm.rooms.length > 0) {
-                    roomsHtml = '<ul class="list-group list-group-flush small">';
-                    dorm.rooms.forEach(room => {
-                        totalCapacity += room.capacity;
-                        totalOccupancy += room.current_occupancy;
-                        const occupancyClass = getOccupancyClass(room.current_occupancy, room.capacity);
-                        roomsHtml += `<li class="list-group-item d-flex justify-content-between align-items-center py-1 px-2">
-                                    <span>Этаж: ${room.floor_number}, комната: ${room.room_number}</span>
-                                    <span class="badge ${room.current_occupancy === room.capacity ? 'bg-danger' : 'bg-success'} rounded-pill ${occupancyClass}">
-                                        ${room.current_occupancy} / ${room.capacity}
-                                    </span>
-                                  </li>`;
-                    });
-                    roomsHtml += '</ul>';
-                }
+    async function toggleDormitoryRooms(dormitoryId) {
+        const container = document.getElementById(`dormRooms-${dormitoryId}`);
+        if (!container) return;
+        container.classList.toggle('d-none');
+        if (container.classList.contains('d-none') || container.dataset.loaded) return;
 
-                const overallOccupancyPercent = totalCapacity > 0 ? Math.round((totalOccupancy / totalCapacity) * 100) : 0;
-                let progressBarClass = 'bg-success';
-                if (overallOccupancyPercent >= 100) progressBarClass = 'bg-danger';
-                else if (overallOccupancyPercent >= 75) progressBarClass = 'bg-warning text-dark';
+        container.innerHTML = '<p class="card-text small text-muted mb-0">Загрузка...</p>';
+        const { ok, data } = await fetchAPI(`/staff/dormitories/${dormitoryId}/rooms/`);
+        if (!ok) {
+            displayError(container, data);
+            return;
+        }
+        container.dataset.loaded = 'true';
+        if (data.length === 0) {
+            container.innerHTML = '<p class="card-text small text-muted mb-0"><em>Комнаты не определены.</em></p>';
+            return;
+        }
+        let roomsHtml = '<ul class="list-group list-group-flush small">';
+        data.forEach(room => {
+            const occupancyClass = getOccupancyClass(room.current_occupancy, room.capacity);
+            roomsHtml += `<li class="list-group-item d-flex justify-content-between align-items-center py-1 px-2">
+                        <span>Этаж: ${room.floor_number}, комната: ${room.room_number}</span>
+                        <span class="badge ${room.current_occupancy === room.capacity ? 'bg-danger' : 'bg-success'} rounded-pill ${occupancyClass}">
+                            ${room.current_occupancy} / ${room.capacity}
+                        </span>
+                      </li>`;
+        });
+        roomsHtml += '</ul>';
+        container.innerHTML = roomsHtml;
+    }
 
-                const cardHtml = `
-                <div class="col">
+    function renderDormitoryCard(dorm) {
+        const totalCapacity = dorm.capacity;
+        const totalOccupancy = dorm.occupancy;
+        const overallOccupancyPercent = totalCapacity > 0 ? Math.round((totalOccupancy / totalCapacity) * 100) : 0;
+        let progressBarClass = 'bg-success';
+        if (overallOccupancyPercent >= 100) progressBarClass = 'bg-danger';
+        else if (overallOccupancyPercent >= 75) progressBarClass = 'bg-warning text-dark';
+
+        return `
+                <div class="col" data-dorm-id="${dorm.id}">
                     <div class="card h-100 shadow-sm card-dormitory">
                         <div class="card-header bg-light py-2 d-flex justify-content-between align-items-center">
                             <span><i class="bi bi-building"></i> ${dorm.name}</span>
@@ -290,10 +309,10 @@ document.addEventListener('DOMContentLoaded', function() {
                                 <span class="progress-bar-text text-white">${overallOccupancyPercent}%</span>
                             </div>
                             <div class="mt-2">
-                                <h6 class="card-subtitle my-1 text-muted small">Комнаты:</h6>
-                                <div style="max-height: 120px; overflow-y: auto; border: 1px solid #eee; padding: 5px; border-radius: .25rem;">
-                                    ${roomsHtml}
-                                </div>
+                                <button class="btn btn-sm btn-link p-0 toggle-dorm-rooms-btn" data-dorm-id="${dorm.id}" ${dorm.room_count === 0 ? 'disabled' : ''}>
+                                    <i class="bi bi-chevron-down"></i> Комнаты (${dorm.room_count})
+                                </button>
+                                <div class="dorm-rooms-container d-none" id="dormRooms-${dorm.id}" style="max-height: 120px; overflow-y: auto; border: 1px solid #eee; padding: 5px; border-radius: .25rem;"></div>
                             </div>
                         </div>
                         <div class="card-footer bg-transparent border-top-0 pt-0 pb-2 text-end">
@@ -303,29 +322,69 @@ document.addEventListener('DOMContentLoaded', function() {
                         </div>
                     </div>
                 </div>`;
-                currentDormsListDiv.insertAdjacentHTML('beforeend', cardHtml);
-            });
-
-            document.querySelectorAll('#currentDormitoriesList .delete-dorm-btn').forEach(button => {
-                button.addEventListener('click', function() {
-                    const dormId = this.dataset.dormId;
-                    const dormName = this.dataset.dormName;
-                    handleDeleteDormitory(dormId, dormName);
-                });
-            });
+    }
 
-            document.querySelectorAll('.view-dorm-details-btn').forEach(button => {
-                button.addEventListener('click', function() {
-                    const dormId = this.dataset.dormId;
-                    showDormitoryDetails(dormId);
-                });
+    async function loadAndDisplayDormitories() {
+        if (!currentDormsListDiv) return;
+        currentDormsListDiv.innerHTML = '<div class="col"><div class="alert alert-info">Загрузка списка общежитий...</div></div>';
+        const { ok, data } = await fetchAPI('/staff/dormitories/');
+        dormitoriesById.clear();
+        if (ok && Array.isArray(data)) {
+            dormitoriesLoaded = true;
+            if (data.length === 0) {
+                currentDormsListDiv.innerHTML = '<div class="col"><div class="alert alert-secondary">Общежития еще не добавлены.</div></div>';
+                return;
+            }
+            currentDormsListDiv.innerHTML = '';
+            data.forEach(dorm => {
+                dormitoriesById.set(dorm.id, dorm);
+                currentDormsListDiv.insertAdjacentHTML('beforeend', renderDormitoryCard(dorm));
             });
-
         } else {
+            dormitoriesLoaded = false;
             currentDormsListDiv.innerHTML = `<div class="col"><div class="alert alert-danger">Ошибка загрузки общежитий: ${data.detail || 'Неизвестная ошибка'}</div></div>`;
         }
     }
 
+    function upsertDormitoryCard(dorm) {
+        if (!currentDormsListDiv || !dormitoriesLoaded) return;
+        const existingCard = currentDormsListDiv.querySelector(`[data-dorm-id="${dorm.id}"].col`);
+        if (existingCard) {
+            const roomsContainer = existingCard.querySelector('.dorm-rooms-container');
+            const roomsExpanded = roomsContainer && !roomsContainer.classList.contains('d-none');
+            existingCard.outerHTML = renderDormitoryCard(dorm);
+            if (roomsExpanded) toggleDormitoryRooms(dorm.id);
+        } else {
+            if (dormitoriesById.size === 0) currentDormsListDiv.innerHTML = '';
+            currentDormsListDiv.insertAdjacentHTML('beforeend', renderDormitoryCard(dorm));
+        }
+        dormitoriesById.set(dorm.id, dorm);
+    }
+
+    function removeDormitoryCard(dormitoryId) {
+        if (!currentDormsListDiv || !dormitoriesLoaded) return;
+        const card = currentDormsListDiv.querySelector(`[data-dorm-id="${dormitoryId}"].col`);
+        if (card) card.remove();
+        dormitoriesById.delete(dormitoryId);
+        if (dormitoriesById.size === 0) {
+            currentDormsListDiv.innerHTML = '<div class="col"><div class="alert alert-secondary">Общежития еще не добавлены.</div></div>';
+        }
+    }
+
+    if (currentDormsListDiv) {
+        currentDormsListDiv.addEventListener('click', function(e) {
+            const button = e.target.closest('button[data-dorm-id]');
+            if (!button) return;
+            if (button.classList.contains('delete-dorm-btn')) {
+                handleDeleteDormitory(button.dataset.dormId, button.dataset.dormName);
+            } else if (button.classList.contains('toggle-dorm-rooms-btn')) {
+                toggleDormitoryRooms(button.dataset.dormId);
+            } else if (button.classList.contains('view-dorm-details-btn')) {
+                showDormitoryDetails(button.dataset.dormId);
+            }
+        });
+    }
+
     if (addDormForm) {
         addDormForm.addEventListener('submit', async function(e) {
             e.preventDefault();
@@ -335,8 +394,10 @@ document.addEventListener('DOMContentLoaded', function() {
             if (ok) {
                 displayAlert(addDormResultDiv, `Общежитие "<strong>${data.name}</strong>" успешно добавлено!`, 'success', true, true);
                 addDormForm.reset();
-                loadDormitoriesForSelect();
-                loadAndDisplayDormitories();
+                if (!liveUpdatesConnected) {
+                    loadDormitoriesForSelect();
+                    loadAndDisplayDormitories();
+                }
             } else {
                 displayError(addDormResultDiv, data);
             }
@@ -428,7 +489,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 displayAlert(defineStructureResultDiv, `Структура для общежития успешно обновлена.`, 'success');
                 if(roomsContainer) roomsContainer.innerHTML = '';
                 roomFieldIndex = 0;
-                loadAndDisplayDormitories();
+                if (!liveUpdatesConnected) loadAndDisplayDormitories();
             } else {
                 displayError(defineStructureResultDiv, data);
             }
@@ -469,8 +530,10 @@ document.addEventListener('DOMContentLoaded', function() {
             if (ok) {
                 displayAlert(importResultDiv, data.message || 'Структура успешно импортирована.', 'success');
                 fileInput.value = '';
-                loadDormitoriesForSelect();
-                loadAndDisplayDormitories();
+                if (!liveUpdatesConnected) {
+                    loadDormitoriesForSelect();
+                    loadAndDisplayDormitories();
+                }
             } else {
                 displayError(importResultDiv, data);
             }
@@ -501,44 +564,32 @@ document.addEventListener('DOMContentLoaded', function() {
         return { text, className };
     }
 
-    async function loadApplications() {
-        if (!appsTableBody) return;
-        appsTableBody.innerHTML = '<tr><td colspan="7" class="text-center"><div class="spinner-border spinner-border-sm" role="status"><span class="visually-hidden">Загрузка...</span></div> Загрузка заявлений...</td></tr>';
-        const { ok, data } = await fetchAPI('/staff/applications/');
-        if (ok && Array.isArray(data)) {
-            if (data.length === 0) {
-                appsTableBody.innerHTML = '<tr><td colspan="7" class="text-center">Поданных заявлений нет.</td></tr>';
-                return;
+    function renderApplicationRow(row, app) {
+        let studentName = "N/A";
+        let studentIdNum = "N/A";
+        if (app.student_info) {
+            studentName = `${app.student_info.last_name || ''} ${app.student_info.first_name || ''} ${app.student_info.middle_name || ''}`.trim();
+            studentIdNum = app.student_info.student_ticket_number || "N/A";
+        }
+        const appDate = new Date(app.application_date).toLocaleDateString('ru-RU', { year: '2-digit', month: '2-digit', day: '2-digit', hour: '2-digit', minute: '2-digit' });
+
+        let allocationInfo = '-';
+        let changeAllocationBtn = '';
+        if (app.status.toLowerCase() === 'allocated') {
+            if (app.allocated_dorm_name && app.allocated_floor_number !== undefined && app.allocated_room_number !== undefined) {
+                allocationInfo = `${app.allocated_dorm_name}, эт.${app.allocated_floor_number}, к.${app.allocated_room_number}`;
+            } else {
+                allocationInfo = `Комната не определена`;
             }
-            appsTableBody.innerHTML = '';
-            data.sort((a, b) => a.id - b.id);
-
-            data.forEach(app => {
-                let studentName = "N/A";
-                let studentIdNum = "N/A";
-                if (app.student_info) {
-                    studentName = `${app.student_info.last_name || ''} ${app.student_info.first_name || ''} ${app.student_info.middle_name || ''}`.trim();
-                    studentIdNum = app.student_info.student_ticket_number || "N/A";
-                }
-                const appDate = new Date(app.application_date).toLocaleDateString('ru-RU', { year: '2-digit', month: '2-digit', day: '2-digit', hour: '2-digit', minute: '2-digit' });
-
-                let allocationInfo = '-';
-                let changeAllocationBtn = '';
-                if (app.status.toLowerCase() === 'allocated') {
-                    if (app.allocated_dorm_name && app.allocated_floor_number !== undefined && app.allocated_room_number !== undefined) {
-                        allocationInfo = `${app.allocated_dorm_name}, эт.${app.allocated_floor_number}, к.${app.allocated_room_number}`;
-                    } else {
-                        allocationInfo = `Комната не определена`;
-                    }
-                    changeAllocationBtn = `<button class="btn btn-sm btn-outline-info ms-2 change-allocation-btn" data-app-id="${app.id}" title="Изменить место заселения">
+            changeAllocationBtn = `<button class="btn btn-sm btn-outline-info ms-2 change-allocation-btn" data-app-id="${app.id}" title="Изменить место заселения">
                                         <i class="bi bi-pencil-square"></i> Изменить
                                     </button>`;
-                }
+        }
 
-                const { text: statusText, className: statusClassName } = getStatusTextAndClass(app.status);
+        const { text: statusText, className: statusClassName } = getStatusTextAndClass(app.status);
 
-                const row = appsTableBody.insertRow();
-                row.innerHTML = `
+        row.dataset.appId = app.id;
+        row.innerHTML = `
                 <td>${app.id}</td>
                 <td>${studentName}</td>
                 <td>${studentIdNum}</td>
@@ -547,18 +598,86 @@ document.addEventListener('DOMContentLoaded', function() {
                 <td>${allocationInfo} ${changeAllocationBtn}</td>
                 <td>${app.rejection_reason || '-'}</td>
             `;
-            });
+        applicationsById.set(app.id, app);
+    }
 
-            document.querySelectorAll('.change-allocation-btn').forEach(button => {
-                button.addEventListener('click', function() {
-                    currentApplicationIdForAllocation = this.dataset.appId;
-                    if (allocateModalTitle) allocateModalTitle.textContent = `Изменить место заселения студента с номером заявления: ${currentApplicationIdForAllocation}`;
-                    loadAvailableRooms();
-                    if (allocateModal) allocateModal.show();
-                });
-            });
+    function updateApplicationsCounter() {
+        if (appsCounter) {
+            appsCounter.textContent = `Показано ${applicationsShownCount} из ${applicationsTotalCount !== null ? `${applicationsTotalCount}${applicationsTotalExact ? '' : '+'}` : '?'}`;
+        }
+    }
+
+    function applyApplicationChange(app) {
+        if (!appsTableBody || !applicationsLoaded) return;
+        const previous = applicationsById.get(app.id);
+        if (previous) {
+            if (!app.student_info) app.student_info = previous.student_info;
+            const row = appsTableBody.querySelector(`tr[data-app-id="${app.id}"]`);
+            if (row) renderApplicationRow(row, app);
+            return;
+        }
+        const statusFilter = appsStatusFilter ? appsStatusFilter.value : '';
+        const newestShownId = Math.max(0, ...applicationsById.keys());
+        if (app.id <= newestShownId || (statusFilter && statusFilter.toLowerCase() !== app.status.toLowerCase())) return;
+        if (applicationsById.size === 0) appsTableBody.innerHTML = '';
+        renderApplicationRow(appsTableBody.insertRow(0), app);
+        applicationsShownCount += 1;
+        if (applicationsTotalCount !== null) applicationsTotalCount += 1;
+        updateApplicationsCounter();
+    }
+
+    if (appsTableBody) {
+        appsTableBody.addEventListener('click', function(e) {
+            const changeBtn = e.target.closest('.change-allocation-btn');
+            if (!changeBtn) return;
+            currentApplicationIdForAllocation = changeBtn.dataset.appId;
+            if (allocateModalTitle) allocateModalTitle.textContent = `Изменить место заселения студента с номером заявления: ${currentApplicationIdForAllocation}`;
+            loadAvailableRooms();
+            if (allocateModal) allocateModal.show();
+        });
+    }
+
+    async function loadApplications(append = false) {
+        if (!appsTableBody) return;
+        const params = new URLSearchParams({ limit: APPLICATIONS_PAGE_SIZE });
+        if (appsStatusFilter && appsStatusFilter.value) params.set('status', appsStatusFilter.value);
+        if (append && applicationsNextCursor) params.set('cursor', applicationsNextCursor);
+
+        if (!append) {
+            appsTableBody.innerHTML = '<tr><td colspan="7" class="text-center"><div class="spinner-border spinner-border-sm" role="status"><span class="visually-hidden">Загрузка...</span></div> Загрузка заявлений...</td></tr>';
+        }
+        if (loadMoreAppsBtn) loadMoreAppsBtn.disabled = true;
+        const { ok, data, headers } = await fetchAPI(`/staff/applications/?${params.toString()}`);
+        if (loadMoreAppsBtn) loadMoreAppsBtn.disabled = false;
+        if (ok && Array.isArray(data)) {
+            applicationsNextCursor = headers.get('X-Next-Cursor');
+            if (loadMoreAppsBtn) loadMoreAppsBtn.classList.toggle('d-none', !applicationsNextCursor);
+
+            if (!append) {
+                appsTableBody.innerHTML = '';
+                applicationsShownCount = 0;
+                applicationsById.clear();
+                if (data.length === 0) {
+                    appsTableBody.innerHTML = '<tr><td colspan="7" class="text-center">Поданных заявлений нет.</td></tr>';
+                }
+            }
+
+            data.forEach(app => renderApplicationRow(appsTableBody.insertRow(), app));
+
+            applicationsShownCount += data.length;
+            if (headers.get('X-Total-Count') !== null) {
+                applicationsTotalCount = parseInt(headers.get('X-Total-Count'));
+                applicationsTotalExact = headers.get('X-Total-Count-Exact') !== 'false';
+            } else if (!append) {
+                applicationsTotalCount = null;
+            }
+            applicationsLoaded = true;
+            updateApplicationsCounter();
 
         } else {
+            applicationsNextCursor = null;
+            applicationsLoaded = false;
+            if (loadMoreAppsBtn) loadMoreAppsBtn.classList.add('d-none');
             appsTableBody.innerHTML = `<tr><td colspan="7" class="text-center text-danger">Ошибка загрузки заявлений: ${data.detail || 'Неизвестная ошибка'}</td></tr>`;
         }
     }
@@ -634,8 +753,10 @@ document.addEventListener('DOMContentLoaded', function() {
             if (ok) {
                 displayAlert(allocateRoomResultDiv, `Место заселения для заявления ID <strong>${data.id}</strong> успешно изменено.`, 'success', true, true);
                 if (allocateModal) setTimeout(() => allocateModal.hide(), 2000);
-                loadApplications();
-                loadAndDisplayDormitories();
+                if (!liveUpdatesConnected) {
+                    loadApplications();
+                    loadAndDisplayDormitories();
+                }
             } else {
                 displayError(allocateRoomResultDiv, data);
             }
@@ -643,7 +764,13 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     if (viewAppsBtn) {
-        viewAppsBtn.addEventListener('click', loadApplications);
+        viewAppsBtn.addEventListener('click', () => loadApplications());
+    }
+    if (appsStatusFilter) {
+        appsStatusFilter.addEventListener('change', () => loadApplications());
+    }
+    if (loadMoreAppsBtn) {
+        loadMoreAppsBtn.addEventListener('click', () => loadApplications(true));
     }
 
     if (processAppsBtn) {
@@ -652,8 +779,10 @@ document.addEventListener('DOMContentLoaded', function() {
             const { ok, data } = await fetchAPI('/staff/applications/process_auto/', 'POST');
             if (ok) {
                 displayAlert(processAppsResultDiv, `Проверка завершена: <strong>${data.message}</strong>`, 'success', true, true);
-                loadApplications();
-                loadAndDisplayDormitories();
+                if (!liveUpdatesConnected) {
+                    loadApplications();
+                    loadAndDisplayDormitories();
+                }
             } else {
                 displayError(processAppsResultDiv, data);
             }
@@ -684,8 +813,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 const { text: updatedStatusText } = getStatusTextAndClass(data.status);
                 displayAlert(updateAppStatusResultDiv, `Статус заявления ID <strong>${data.id}</strong> успешно обновлен на "<strong>${updatedStatusText}</strong>".`, 'success', true, true);
                 updateAppStatusForm.reset();
-                loadApplications();
-                if (data.status.toLowerCase() === 'allocated' || (data.old_status_was_allocated && data.status.toLowerCase() !== 'allocated')) {
+                if (!liveUpdatesConnected) {
+                    loadApplications();
                     loadAndDisplayDormitories();
                 }
             } else {
@@ -708,12 +837,68 @@ document.addEventListener('DOMContentLoaded', function() {
         tabEl.addEventListener('shown.bs.tab', event => {
             const targetPaneId = event.target.getAttribute('data-bs-target');
             if (targetPaneId === '#dorms-tab-pane') {
-                loadAndDisplayDormitories();
-                loadDormitoriesForSelect();
+                if (!liveUpdatesConnected || !dormitoriesLoaded) {
+                    loadAndDisplayDormitories();
+                    loadDormitoriesForSelect();
+                }
             } else if (targetPaneId === '#applications-tab-pane') {
-                loadApplications();
+                if (!liveUpdatesConnected || !applicationsLoaded) loadApplications();
             }
         });
     });
 
-});
\ No newline at end of file
+
+    function upsertDormitoryOption(dorm) {
+        if (!structureDormIdSelect) return;
+        const option = structureDormIdSelect.querySelector(`option[value="${dorm.id}"]`);
+        if (option) {
+            option.textContent = dorm.name;
+        } else {
+            structureDormIdSelect.add(new Option(dorm.name, dorm.id));
+        }
+    }
+
+    function removeDormitoryOption(dormitoryId) {
+        if (!structureDormIdSelect) return;
+        const option = structureDormIdSelect.querySelector(`option[value="${dormitoryId}"]`);
+        if (option) option.remove();
+    }
+
+    function connectChangeFeed() {
+        if (!window.EventSource) return;
+        const changeFeed = new EventSource('/staff/events/');
+        changeFeed.addEventListener('open', () => { liveUpdatesConnected = true; });
+        changeFeed.addEventListener('error', () => { liveUpdatesConnected = false; });
+
+        changeFeed.addEventListener('application', event => {
+            applyApplicationChange(JSON.parse(event.data));
+        });
+        changeFeed.addEventListener('applications_reset', () => {
+            if (applicationsLoaded) loadApplications();
+        });
+        changeFeed.addEventListener('dormitory', event => {
+            const dorm = JSON.parse(event.data);
+            upsertDormitoryCard(dorm);
+            upsertDormitoryOption(dorm);
+        });
+        changeFeed.addEventListener('dormitory_occupancy', event => {
+            const { dormitory_id, occupancy_delta } = JSON.parse(event.data);
+            const dorm = dormitoriesById.get(dormitory_id);
+            if (dorm) upsertDormitoryCard({ ...dorm, occupancy: dorm.occupancy + occupancy_delta });
+        });
+        changeFeed.addEventListener('dormitory_deleted', event => {
+            const { id } = JSON.parse(event.data);
+            removeDormitoryCard(id);
+            removeDormitoryOption(id);
+        });
+        changeFeed.addEventListener('resync', () => {
+            if (dormitoriesLoaded) {
+                loadAndDisplayDormitories();
+                loadDormitoriesForSelect();
+            }
+            if (applicationsLoaded) loadApplications();
+        });
+    }
+
+    connectChangeFeed();
+});
@@ -0,0 +1,53 @@
+import pytest
+from app import database, models
+from app.room_index import free_room_index
+from app.student_cache import student_cache
+from tests.factories import add_applications, add_dormitories, add_students
+
+
+def _reset_sessionmakers():
+    database.SessionLocal_sqlite._sessionmaker = None
+    database.SessionLocal_postgres._sessionmaker = None
+
+
+@pytest.fixture
+def engines(tmp_path):
+    saved_engines = dict(database._engines)
+    sqlite_engine = database._create_sqlite_file_engine(f"sqlite:///{tmp_path / 'dormitory.db'}")
+    postgres_engine = database.create_postgres_standin_engine(f"sqlite:///{tmp_path / 'students.db'}")
+    models.Base_sqlite.metadata.create_all(sqlite_engine)
+    models.Base_postgres.metadata.create_all(postgres_engine)
+    database._engines.update(sqlite=sqlite_engine, postgres=postgres_engine)
+    _reset_sessionmakers()
+    student_cache.clear()
+    free_room_index.is_built = False
+    yield sqlite_engine, postgres_engine
+    database._engines.clear()
+    database._engines.update(saved_engines)
+    _reset_sessionmakers()
+    student_cache.clear()
+    free_room_index.is_built = False
+    sqlite_engine.dispose()
+    postgres_engine.dispose()
+
+
+@pytest.fixture
+def db_sqlite(engines):
+    with database.SessionLocal_sqlite() as db:
+        yield db
+
+
+@pytest.fixture
+def db_pg(engines):
+    with database.SessionLocal_postgres() as db:
+        yield db
+
+
+@pytest.fixture
+def campus(db_sqlite, db_pg):
+    def build(students: int = 20, dormitories: int = 2, floors: int = 2, rooms_per_floor: int = 3,
+              capacity: int = 2, foreign=lambda student_id: True):
+        add_students(db_pg, students, foreign=foreign)
+        add_dormitories(db_sqlite, dormitories, floors, rooms_per_floor, capacity)
+        return add_applications(db_sqlite, range(1, students + 1))
+    return build
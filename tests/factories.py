@@ -0,0 +1,44 @@
+import datetime
+from app import crud, models
+from app.room_index import free_room_index
+
+
+def add_students(db_pg, count: int, groups: int = 2, foreign=lambda student_id: True, start: int = 1):
+    if not db_pg.get(models.Faculty, 1):
+        db_pg.add(models.Faculty(id=1, name="Факультет"))
+        for group_id in range(1, groups + 1):
+            db_pg.add(models.Group(id=group_id, name=f"Группа {group_id}", faculty_id=1))
+        db_pg.flush()
+    db_pg.add_all(
+        models.Student(id=student_id, student_ticket_number=f"T{student_id}", last_name=f"Иванов{student_id}",
+                       first_name="Иван", birth_date=datetime.date(2004, 1, 1), is_foreign=foreign(student_id),
+                       city_of_residence="Город", group_id=1 + student_id % groups)
+        for student_id in range(start, start + count)
+    )
+    db_pg.commit()
+
+
+def add_dormitories(db_sqlite, count: int = 2, floors: int = 2, rooms_per_floor: int = 3, capacity: int = 2):
+    dormitories = []
+    for number in range(1, count + 1):
+        dormitory = models.Dormitory(name=f"Общежитие {number}", address=f"Улица {number}")
+        db_sqlite.add(dormitory)
+        db_sqlite.flush()
+        db_sqlite.add_all(
+            models.Room(dormitory_id=dormitory.id, floor_number=floor, room_number=f"{floor}{room:02d}",
+                        capacity=capacity, current_occupancy=0)
+            for floor in range(1, floors + 1) for room in range(1, rooms_per_floor + 1)
+        )
+        dormitories.append(dormitory)
+    db_sqlite.flush()
+    crud.refresh_occupancy_summary(db_sqlite)
+    db_sqlite.commit()
+    free_room_index.rebuild(db_sqlite)
+    return dormitories
+
+
+def add_applications(db_sqlite, student_ids):
+    applications = [models.Application(student_id=student_id) for student_id in student_ids]
+    db_sqlite.add_all(applications)
+    db_sqlite.commit()
+    return [application.id for application in applications]
@@ -0,0 +1,76 @@
+from collections import Counter
+import pytest
+from app.allocation import (ALLOCATION_STRATEGIES, Applicant, AllocationStrategy, BalancedDormitoryStrategy,
+                            FirstFitStrategy, GroupedFloorFillStrategy, RoomSlot, get_allocation_strategy)
+
+
+def build_rooms(dormitories: int = 2, floors: int = 2, rooms_per_floor: int = 3, capacity: int = 2, occupied=()):
+    rooms = []
+    for dormitory_id in range(1, dormitories + 1):
+        for floor in range(1, floors + 1):
+            for _ in range(rooms_per_floor):
+                room_id = len(rooms) + 1
+                rooms.append(RoomSlot(room_id, dormitory_id, floor, capacity, capacity if room_id in occupied else 0))
+    return rooms
+
+
+def build_applicants(count: int, groups: int = 3):
+    return [Applicant(application_id, application_id, 1 + application_id % groups, 1)
+            for application_id in range(1, count + 1)]
+
+
+def test_strategy_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        AllocationStrategy()
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        get_allocation_strategy("random")
+
+
+@pytest.mark.parametrize("name", ALLOCATION_STRATEGIES)
+@pytest.mark.parametrize("applicant_count", [5, 12, 30])
+def test_strategies_never_overbook_and_place_while_capacity_lasts(name, applicant_count):
+    rooms = build_rooms(occupied={2, 8})
+    free_slots = {room.id: room.free_slots for room in rooms}
+
+    assignments = get_allocation_strategy(name).assign(build_applicants(applicant_count), rooms)
+
+    assert len(assignments) == min(applicant_count, sum(free_slots.values()))
+    for room_id, placed in Counter(assignments.values()).items():
+        assert placed <= free_slots[room_id]
+
+
+def test_first_fit_fills_rooms_in_order():
+    assignments = FirstFitStrategy().assign(build_applicants(5), build_rooms(occupied={2}))
+    assert list(assignments.values()) == [1, 1, 3, 3, 4]
+
+
+def test_grouped_floor_fill_keeps_each_group_on_one_floor():
+    rooms = build_rooms(dormitories=2, floors=2, rooms_per_floor=3, capacity=2)
+    floors = {room.id: (room.dormitory_id, room.floor_number) for room in rooms}
+    applicants = build_applicants(12, groups=3)
+
+    assignments = GroupedFloorFillStrategy().assign(applicants, rooms)
+
+    for group_id in {applicant.group_id for applicant in applicants}:
+        group_floors = {floors[assignments[applicant.application_id]]
+                        for applicant in applicants if applicant.group_id == group_id}
+        assert len(group_floors) == 1
+    assert FirstFitStrategy().assign(applicants, build_rooms()) != assignments
+
+
+def test_balanced_strategy_spreads_load_across_dormitories():
+    rooms = build_rooms(dormitories=3, floors=1, rooms_per_floor=4, capacity=2, occupied={1, 2})
+    dormitories = {room.id: room.dormitory_id for room in rooms}
+
+    assignments = BalancedDormitoryStrategy().assign(build_applicants(10), rooms)
+
+    load = Counter(dormitories[room_id] for room_id in assignments.values())
+    load[1] += 4
+    assert max(load.values()) - min(load.values()) <= 1
+    first_fit_load = Counter(dormitories[room_id]
+                             for room_id in FirstFitStrategy().assign(build_applicants(10), build_rooms(
+                                 dormitories=3, floors=1, rooms_per_floor=4, capacity=2, occupied={1, 2})).values())
+    assert first_fit_load[3] == 0
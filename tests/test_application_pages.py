@@ -0,0 +1,25 @@
+from app import crud
+from tests.factories import add_applications
+
+
+def test_cursor_pages_walk_every_application_once(db_sqlite, db_pg):
+    application_ids = add_applications(db_sqlite, range(1, 26))
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor, total_count = crud.get_staff_application_rows(db_sqlite, db_pg, limit=7, cursor=cursor)
+        assert total_count == (25 if not seen else None)
+        seen.extend(row["id"] for row in rows)
+        if not cursor:
+            break
+    assert seen == sorted(application_ids, reverse=True)
+
+
+def test_total_count_stops_at_the_limit(db_sqlite, db_pg, monkeypatch):
+    monkeypatch.setattr(crud, "APPLICATION_COUNT_LIMIT", 10)
+    add_applications(db_sqlite, range(1, 26))
+
+    _, _, total_count = crud.get_staff_application_rows(db_sqlite, db_pg, limit=5)
+    assert total_count == 11
+    _, _, total_count = crud.get_all_applications(db_sqlite, limit=5)
+    assert total_count == 11
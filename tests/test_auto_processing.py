@@ -0,0 +1,14 @@
+from app import crud, models
+
+
+def test_auto_processing_reports_progress_after_each_chunk(campus, db_sqlite, db_pg, monkeypatch):
+    monkeypatch.setattr(crud, "APPLICATION_WRITE_CHUNK_SIZE", 4)
+    campus(students=10, foreign=lambda student_id: student_id % 3 != 0)
+    reports = []
+
+    crud.process_applications_auto(db_sqlite, db_pg, progress=lambda processed, total: reports.append((processed, total)))
+
+    assert reports == [(0, 10), (4, 10), (8, 10), (10, 10)]
+    assert not db_sqlite.query(models.Application).filter(
+        models.Application.status == models.ApplicationStatus.PENDING
+    ).count()
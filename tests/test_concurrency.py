@@ -0,0 +1,148 @@
+import threading
+import pytest
+from sqlalchemy import func
+from app import crud, database, models, schemas
+
+WORKERS = 8
+STRESS_WORKERS = 300
+
+
+def run_concurrently(action, count: int = WORKERS):
+    barrier = threading.Barrier(count)
+    outcomes = [None] * count
+
+    def worker(index):
+        with database.SessionLocal_sqlite() as db_sqlite, database.SessionLocal_postgres() as db_pg:
+            barrier.wait()
+            try:
+                outcomes[index] = action(db_sqlite, db_pg, index)
+            except Exception as e:
+                outcomes[index] = e
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def assert_no_unexpected_errors(outcomes):
+    unexpected = [outcome for outcome in outcomes
+                  if isinstance(outcome, Exception) and not isinstance(outcome, ValueError)]
+    assert not unexpected, f"{len(unexpected)} unexpected errors, first: {unexpected[0]!r}"
+
+
+def assert_occupancy_consistent(db_sqlite):
+    db_sqlite.rollback()
+    assert crud.reconcile_room_occupancy(db_sqlite).drifted_rooms == 0
+    assert not db_sqlite.query(models.Room).filter(models.Room.current_occupancy > models.Room.capacity).count()
+    summary = db_sqlite.query(func.sum(models.OccupancySummary.occupancy)).scalar()
+    assert summary == db_sqlite.query(func.sum(models.Room.current_occupancy)).scalar()
+
+
+def approve(application_id):
+    return lambda db_sqlite, db_pg, index: crud.update_application_status(
+        db_sqlite, db_pg, application_id, schemas.ApplicationStatusUpdate(status=models.ApplicationStatus.APPROVED)
+    )
+
+
+def test_concurrent_approvals_of_one_application_claim_one_slot(campus, db_sqlite):
+    application_id = campus(students=4)[0]
+
+    outcomes = run_concurrently(approve(application_id))
+
+    assert_no_unexpected_errors(outcomes)
+    assert any(isinstance(outcome, models.Application) for outcome in outcomes)
+    assert db_sqlite.query(func.sum(models.Room.current_occupancy)).scalar() == 1
+    assert_occupancy_consistent(db_sqlite)
+
+
+def test_concurrent_approvals_never_overbook_the_last_room(campus, db_sqlite):
+    application_ids = campus(students=WORKERS, dormitories=1, floors=1, rooms_per_floor=1, capacity=2)
+
+    outcomes = run_concurrently(lambda db_sqlite, db_pg, index: approve(application_ids[index])(db_sqlite, db_pg,
+                                                                                                index))
+
+    assert_no_unexpected_errors(outcomes)
+    statuses = [status for (status,) in db_sqlite.query(models.Application.status)]
+    assert statuses.count(models.ApplicationStatus.ALLOCATED) == 2
+    assert statuses.count(models.ApplicationStatus.APPROVED) == WORKERS - 2
+    assert_occupancy_consistent(db_sqlite)
+
+
+def test_concurrent_moves_keep_occupancy_consistent(campus, db_sqlite, db_pg):
+    campus(students=6, dormitories=2, floors=1, rooms_per_floor=3, capacity=2)
+    crud.process_applications_auto(db_sqlite, db_pg)
+    application_id = db_sqlite.query(models.Application.id).filter(
+        models.Application.status == models.ApplicationStatus.ALLOCATED
+    ).first()[0]
+    free_rooms = [room_id for (room_id,) in db_sqlite.query(models.Room.id).filter(
+        models.Room.current_occupancy < models.Room.capacity
+    )]
+
+    outcomes = run_concurrently(lambda db_sqlite, db_pg, index: crud.allocate_student_to_room(
+        db_sqlite, application_id, free_rooms[index % len(free_rooms)]
+    ))
+
+    assert_no_unexpected_errors(outcomes)
+    assert_occupancy_consistent(db_sqlite)
+
+
+def test_auto_processing_does_not_override_concurrent_decisions(campus, db_sqlite):
+    application_ids = campus(students=40, dormitories=2, floors=2, rooms_per_floor=3, capacity=2)
+    rejected_ids = application_ids[::5]
+    conflicts = set()
+
+    def action(db_sqlite, db_pg, index):
+        if index == 0:
+            return crud.process_applications_auto(db_sqlite, db_pg)
+        for application_id in rejected_ids[index - 1::WORKERS - 1]:
+            try:
+                crud.update_application_status(db_sqlite, db_pg, application_id, schemas.ApplicationStatusUpdate(
+                    status=models.ApplicationStatus.REJECTED, rejection_reason="Отклонено вручную."
+                ))
+            except ValueError:
+                conflicts.add(application_id)
+
+    assert_no_unexpected_errors(run_concurrently(action))
+
+    for application_id in rejected_ids:
+        application = db_sqlite.get(models.Application, application_id)
+        assert application.status == models.ApplicationStatus.REJECTED or application_id in conflicts
+        assert application.allocated_room_id is None or application.status == models.ApplicationStatus.ALLOCATED
+    assert_occupancy_consistent(db_sqlite)
+
+
+@pytest.fixture(params=["deferred", "immediate"])
+def begin_mode(request, monkeypatch):
+    monkeypatch.setattr(database, "SQLITE_BEGIN_MODE", request.param)
+
+
+def test_hundreds_of_concurrent_moves_into_one_room_never_overfill_it(begin_mode, campus, db_sqlite, db_pg):
+    campus(students=STRESS_WORKERS, dormitories=1, floors=1, rooms_per_floor=1, capacity=STRESS_WORKERS)
+    crud.process_applications_auto(db_sqlite, db_pg)
+    target_room = models.Room(dormitory_id=1, floor_number=2, room_number="201", capacity=3, current_occupancy=0)
+    db_sqlite.add(target_room)
+    db_sqlite.commit()
+    crud.refresh_occupancy_summary(db_sqlite)
+    db_sqlite.commit()
+    application_ids = [application_id for (application_id,) in db_sqlite.query(models.Application.id).filter(
+        models.Application.status == models.ApplicationStatus.ALLOCATED
+    )]
+    assert len(application_ids) == STRESS_WORKERS
+
+    outcomes = run_concurrently(lambda db_sqlite, db_pg, index: crud.allocate_student_to_room(
+        db_sqlite, application_ids[index], target_room.id
+    ), STRESS_WORKERS)
+
+    assert_no_unexpected_errors(outcomes)
+    moved = [outcome for outcome in outcomes if isinstance(outcome, models.Application)]
+    assert len(moved) == target_room.capacity
+    db_sqlite.rollback()
+    allocated_in_room = db_sqlite.query(models.Application).filter(
+        models.Application.allocated_room_id == target_room.id,
+        models.Application.status == models.ApplicationStatus.ALLOCATED
+    ).count()
+    assert db_sqlite.get(models.Room, target_room.id).current_occupancy == target_room.capacity == allocated_in_room
+    assert_occupancy_consistent(db_sqlite)
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from app.events import RESYNC_EVENT, ChangeBroker, format_sse, change_broker
+from app.http_cache import resource_versions
+
+
+def subscribe(broker, last_event_id):
+    async def run():
+        subscription, backlog = broker.subscribe(last_event_id)
+        broker.unsubscribe(subscription)
+        return [(change_id, event_type) for change_id, event_type, _ in backlog]
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def broker():
+    broker = ChangeBroker(history_size=3, queue_size=10)
+    for number in range(5):
+        broker.publish("application", {"id": number})
+    return broker
+
+
+def test_reconnect_replays_the_missed_changes(broker):
+    assert subscribe(broker, broker.event_id(3)) == [(4, "application"), (5, "application")]
+    assert subscribe(broker, broker.event_id(5)) == []
+    assert subscribe(broker, None) == []
+
+
+def test_reconnect_past_the_history_is_resynced(broker):
+    assert subscribe(broker, broker.event_id(1)) == [(5, RESYNC_EVENT)]
+    assert subscribe(broker, broker.event_id(9)) == [(5, RESYNC_EVENT)]
+
+
+@pytest.mark.parametrize("last_event_id", ["3", "0badf00d-3", "-3", "abc"])
+def test_ids_from_another_instance_are_resynced(broker, last_event_id):
+    assert subscribe(broker, last_event_id) == [(5, RESYNC_EVENT)]
+
+
+def test_reconnect_without_history_is_resynced():
+    broker = ChangeBroker(history_size=0, queue_size=10)
+    assert subscribe(broker, broker.event_id(0)) == []
+    broker.publish("application", {})
+    assert subscribe(broker, broker.event_id(0)) == [(1, RESYNC_EVENT)]
+
+
+def test_event_ids_use_the_etag_instance_token():
+    assert resource_versions.instance == change_broker.instance
+    assert format_sse((7, "application", {})).startswith(f"id: {change_broker.instance}-7\n")
+    assert resource_versions.etag((1,)).startswith(f'"{change_broker.instance}-')
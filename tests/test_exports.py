@@ -0,0 +1,36 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import staff_api
+from tests.factories import add_dormitories
+
+
+@pytest.fixture
+def client(engines):
+    app = FastAPI()
+    app.include_router(staff_api.router)
+    app.dependency_overrides[staff_api.verify_ip] = lambda: None
+    return TestClient(app)
+
+
+def test_structure_export_does_not_open_the_student_database(client, db_sqlite, monkeypatch):
+    add_dormitories(db_sqlite, count=1, floors=1, rooms_per_floor=2)
+    opened = []
+    monkeypatch.setattr(staff_api, "SessionLocal_postgres", lambda: opened.append(True))
+
+    response = client.get("/staff/dormitories/structure/export/stream/")
+
+    assert response.status_code == 200
+    assert [json.loads(line)["room_number"] for line in response.text.splitlines()] == ["101", "102"]
+    assert not opened
+
+
+def test_application_export_reads_students(client, campus):
+    campus(students=3)
+
+    response = client.get("/staff/applications/export/")
+
+    assert response.status_code == 200
+    assert sorted(json.loads(line)["student_ticket_number"] for line in response.text.splitlines()) == \
+        ["T1", "T2", "T3"]
@@ -0,0 +1,64 @@
+import datetime
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from app import crud, fast_json, models, schemas
+from app.routers import staff_api
+
+
+@pytest.fixture
+def staff(engines):
+    app = FastAPI()
+    app.include_router(staff_api.router)
+    app.dependency_overrides[staff_api.verify_ip] = lambda: None
+    return TestClient(app)
+
+
+def fetch_both(staff, monkeypatch, url):
+    monkeypatch.setattr(staff_api, "FAST_JSON_ENABLED", False)
+    model_response = staff.get(url)
+    monkeypatch.setattr(staff_api, "FAST_JSON_ENABLED", True)
+    fast_response = staff.get(url)
+    return model_response, fast_response
+
+
+def test_fast_application_page_matches_the_response_model_bytes(staff, campus, db_sqlite, db_pg, monkeypatch):
+    application_ids = campus(students=12, dormitories=1, floors=1, rooms_per_floor=2, capacity=2,
+                             foreign=lambda student_id: student_id % 4 != 0)
+    crud.process_applications_auto(db_sqlite, db_pg)
+    crud.update_application_status(db_sqlite, db_pg, application_ids[0], schemas.ApplicationStatusUpdate(
+        status=models.ApplicationStatus.REJECTED, rejection_reason="Причина «отказа»"
+    ))
+    db_sqlite.query(models.Application).filter(models.Application.id == application_ids[1]).update(
+        {"application_date": datetime.datetime(2024, 5, 6, 7, 8, 9, 123456)}, synchronize_session=False
+    )
+    db_sqlite.add(models.Application(student_id=999))
+    db_sqlite.commit()
+
+    for url in ("/staff/applications/?limit=50", "/staff/applications/?limit=5",
+                "/staff/applications/?status=allocated"):
+        model_response, fast_response = fetch_both(staff, monkeypatch, url)
+        assert model_response.status_code == fast_response.status_code == 200
+        assert fast_response.content == model_response.content
+        for header in ("X-Total-Count", "X-Next-Cursor"):
+            assert fast_response.headers.get(header) == model_response.headers.get(header)
+
+    rows = json.loads(fast_response.content)
+    assert {row["status"] for row in rows} == {"allocated"}
+    assert list(rows[0]) == list(schemas.StaffApplicationResponse.model_fields)
+
+
+def test_fast_dumps_matches_the_json_response_encoding():
+    content = [{"date": "2024-05-06", "status": models.ApplicationStatus.PENDING.value, "reason": None,
+                "name": "Иванов", "floor": 3}]
+    assert fast_json.FastJSONResponse(content).body == JSONResponse(content).body
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    content = {"date": datetime.date(2004, 1, 1), "moment": datetime.datetime(2024, 5, 6, 7, 8, 9, 123456),
+               "status": models.ApplicationStatus.ALLOCATED, "reason": None, "name": "Иванов"}
+    expected = fast_json.dumps(content)
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert fast_json.dumps(content) == expected
@@ -0,0 +1,36 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import crud, models
+from app.http_cache import RESOURCE_OCCUPANCY, RESOURCE_STUDENTS, resource_versions
+from app.routers import staff_api
+
+
+def client():
+    app = FastAPI()
+    app.include_router(staff_api.router)
+    app.dependency_overrides[staff_api.verify_ip] = lambda: None
+    return TestClient(app)
+
+
+def test_move_inside_one_dormitory_invalidates_available_rooms(campus, db_sqlite, db_pg):
+    campus(students=2, dormitories=1, floors=1, rooms_per_floor=3, capacity=2)
+    crud.process_applications_auto(db_sqlite, db_pg)
+    staff = client()
+    first = staff.get("/staff/applications/available_rooms/")
+    assert staff.get("/staff/applications/available_rooms/",
+                     headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    application_id = db_sqlite.query(models.Application.id).first()[0]
+    versions = resource_versions.snapshot([RESOURCE_OCCUPANCY])
+    crud.allocate_student_to_room(db_sqlite, application_id, 3)
+
+    assert resource_versions.snapshot([RESOURCE_OCCUPANCY]) != versions
+    second = staff.get("/staff/applications/available_rooms/", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert {room["id"]: room["current_occupancy"] for room in second.json()} == {1: 1, 2: 0, 3: 1}
+
+
+def test_warming_the_student_cache_bumps_the_students_version(engines):
+    versions = resource_versions.snapshot([RESOURCE_STUDENTS])
+    assert client().post("/staff/student_cache/warm/").status_code == 200
+    assert resource_versions.snapshot([RESOURCE_STUDENTS]) != versions
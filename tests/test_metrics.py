@@ -0,0 +1,40 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import metrics
+from app.routers import staff_api
+
+
+def test_route_metrics_are_labelled_with_the_method(engines, monkeypatch):
+    registry = metrics.MetricsRegistry()
+    monkeypatch.setattr(metrics, "metrics_registry", registry)
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(staff_api.router)
+    app.dependency_overrides[staff_api.verify_ip] = lambda: None
+    client = TestClient(app)
+    assert client.post("/staff/dormitories/", json={"name": "Новое", "address": "Улица"}).status_code == 201
+    assert client.get("/staff/dormitories/").status_code == 200
+
+    assert {(method, route) for method, route, _ in registry._engines} == {
+        ("POST", "/staff/dormitories/"), ("GET", "/staff/dormitories/")}
+    assert {(method, route) for method, route in registry._serialization} <= {
+        ("POST", "/staff/dormitories/"), ("GET", "/staff/dormitories/")}
+    rendered = registry.render()
+    assert 'dormitory_db_statements_total{method="POST",route="/staff/dormitories/",engine="sqlite"}' in rendered
+    assert 'dormitory_db_statements_total{method="GET",route="/staff/dormitories/",engine="sqlite"}' in rendered
+
+
+def test_failed_statements_do_not_leave_a_start_time_behind(engines):
+    token = metrics._current_request.set(metrics.RequestMetrics(record_queries=False))
+    try:
+        with engines[0].connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+            assert not connection.info.get("query_started")
+            connection.execute(text("SELECT 1"))
+            assert not connection.info.get("query_started")
+    finally:
+        metrics._current_request.reset(token)
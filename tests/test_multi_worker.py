@@ -0,0 +1,155 @@
+import multiprocessing
+import random
+import threading
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.exc import OperationalError
+from app import crud, database, jobs, models, schemas
+from app.room_index import free_room_index
+from tests.factories import add_applications, add_dormitories, add_students
+
+WORKER_PROCESSES = 4
+
+
+@pytest.fixture
+def immediate_engines(monkeypatch, tmp_path):
+    monkeypatch.setattr(database, "SQLITE_BEGIN_MODE", "immediate")
+    return tmp_path
+
+
+def test_read_transactions_do_not_take_the_write_lock(immediate_engines, engines, db_sqlite):
+    add_dormitories(db_sqlite, count=1)
+    with database.SessionLocal_sqlite() as reader:
+        assert reader.query(models.Dormitory).count() == 1
+        assert reader.in_transaction()
+
+        finished = threading.Event()
+
+        def write():
+            crud.create_dormitory(db_sqlite, schemas.DormitoryCreate(name="Общежитие 9", address="Улица 9"))
+            finished.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join(timeout=2)
+        assert finished.is_set()
+        assert reader.query(models.Dormitory).count() == 1
+    assert db_sqlite.query(models.Dormitory).count() == 2
+
+
+def test_write_transactions_take_the_write_lock_up_front(immediate_engines, engines, db_sqlite):
+    database.begin_write(db_sqlite)
+    with engines[0].connect() as other:
+        other.exec_driver_sql("PRAGMA busy_timeout = 0")
+        with pytest.raises(OperationalError):
+            other.exec_driver_sql("BEGIN IMMEDIATE")
+    db_sqlite.rollback()
+
+
+def test_job_recovery_runs_once_per_server_run(db_sqlite):
+    db_sqlite.add(models.Job(kind="import", status=models.JobStatus.RUNNING, processed=0))
+    db_sqlite.commit()
+    assert jobs.fail_interrupted_jobs(db_sqlite, "host:100")
+
+    db_sqlite.add(models.Job(kind="import", status=models.JobStatus.RUNNING, processed=0))
+    db_sqlite.commit()
+    assert not jobs.fail_interrupted_jobs(db_sqlite, "host:100")
+    assert db_sqlite.query(models.Job).filter(models.Job.status == models.JobStatus.RUNNING).count() == 1
+
+    assert jobs.fail_interrupted_jobs(db_sqlite, "host:200")
+    assert db_sqlite.query(models.Job).filter(models.Job.status == models.JobStatus.RUNNING).count() == 0
+
+
+def test_server_run_id_changes_on_every_launch(monkeypatch):
+    assert jobs.new_server_run_id(False) != jobs.new_server_run_id(False)
+
+    monkeypatch.setattr(jobs.os, "getppid", lambda: 1)
+    assert jobs.new_server_run_id(True) == jobs.new_server_run_id(True)
+    first_launch = jobs.new_server_run_id(True)
+    monkeypatch.setattr(jobs, "_process_start_time", lambda pid: "987654321")
+    assert jobs.new_server_run_id(True) != first_launch
+
+
+def test_jobs_interrupted_before_a_container_restart_are_failed(db_sqlite, monkeypatch):
+    monkeypatch.setattr(jobs.os, "getppid", lambda: 1)
+    monkeypatch.setattr(jobs, "_process_start_time", lambda pid: "100")
+    assert jobs.fail_interrupted_jobs(db_sqlite, jobs.new_server_run_id(True))
+
+    db_sqlite.add(models.Job(kind="import", status=models.JobStatus.RUNNING, processed=0))
+    db_sqlite.commit()
+    monkeypatch.setattr(jobs, "_process_start_time", lambda pid: "200")
+    assert jobs.fail_interrupted_jobs(db_sqlite, jobs.new_server_run_id(True))
+    assert db_sqlite.query(models.Job).filter(models.Job.status == models.JobStatus.RUNNING).count() == 0
+
+
+def test_first_free_room_falls_back_to_the_database_without_the_index(db_sqlite, monkeypatch):
+    add_dormitories(db_sqlite, count=2, floors=1, rooms_per_floor=1, capacity=1)
+    monkeypatch.setattr(free_room_index, "enabled", False)
+
+    assert crud.claim_first_free_room(db_sqlite) == 1
+    db_sqlite.commit()
+    assert crud.claim_first_free_room(db_sqlite) == 2
+    db_sqlite.commit()
+    assert crud.claim_first_free_room(db_sqlite) is None
+
+
+def run_worker(directory: str, application_ids, student_ids, results):
+    database.SQLITE_BEGIN_MODE = "immediate"
+    database._engines.update(
+        sqlite=database._create_sqlite_file_engine(f"sqlite:///{directory}/dormitory.db"),
+        postgres=database.create_postgres_standin_engine(f"sqlite:///{directory}/students.db"),
+    )
+    free_room_index.disable()
+    random.shuffle(application_ids)
+    random.shuffle(student_ids)
+    errors = []
+    with database.SessionLocal_sqlite() as db_sqlite, database.SessionLocal_postgres() as db_pg:
+        for application_id in application_ids:
+            try:
+                crud.update_application_status(db_sqlite, db_pg, application_id, schemas.ApplicationStatusUpdate(
+                    status=models.ApplicationStatus.APPROVED
+                ))
+            except ValueError:
+                pass
+            except OperationalError as e:
+                errors.append(str(e))
+        for student_id in student_ids:
+            try:
+                crud.create_application(db_sqlite, db_pg, schemas.ApplicationCreate(
+                    student_ticket_number=f"T{student_id}", last_name=f"Иванов{student_id}"
+                ))
+            except ValueError:
+                db_sqlite.rollback()
+            except OperationalError as e:
+                errors.append(str(e))
+    results.put(errors)
+
+
+def test_workers_sharing_the_sqlite_file_keep_data_consistent(immediate_engines, engines, db_sqlite, db_pg):
+    add_students(db_pg, 60)
+    add_dormitories(db_sqlite, count=2, floors=2, rooms_per_floor=3, capacity=2)
+    application_ids = add_applications(db_sqlite, range(1, 41))
+    db_sqlite.close()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=run_worker, args=(str(immediate_engines), application_ids, list(range(35, 61)),
+                                                        results))
+               for _ in range(WORKER_PROCESSES)]
+    for worker in workers:
+        worker.start()
+    errors = [error for _ in workers for error in results.get(timeout=120)]
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    assert errors == []
+    assert crud.reconcile_room_occupancy(db_sqlite).drifted_rooms == 0
+    assert db_sqlite.query(func.sum(models.Room.current_occupancy)).scalar() == 24
+    assert db_sqlite.query(func.sum(models.OccupancySummary.occupancy)).scalar() == 24
+    active_per_student = db_sqlite.execute(text(
+        "SELECT student_id, COUNT(*) FROM applications WHERE status IN ('PENDING', 'APPROVED', 'ALLOCATED') "
+        "GROUP BY student_id HAVING COUNT(*) > 1"
+    )).all()
+    assert active_per_student == []
+    assert db_sqlite.query(models.Application).count() == 60
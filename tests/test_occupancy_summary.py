@@ -0,0 +1,68 @@
+from sqlalchemy import func
+from app import crud, models, schemas
+
+
+def room_totals(db_sqlite):
+    return {
+        (row.dormitory_id, row.floor_number): (row.rooms, row.capacity, row.occupancy)
+        for row in db_sqlite.query(
+            models.Room.dormitory_id, models.Room.floor_number, func.count(models.Room.id).label("rooms"),
+            func.sum(models.Room.capacity).label("capacity"), func.sum(models.Room.current_occupancy).label("occupancy")
+        ).group_by(models.Room.dormitory_id, models.Room.floor_number)
+    }
+
+
+def summary_totals(db_sqlite):
+    return {
+        (row.dormitory_id, row.floor_number): (row.rooms, row.capacity, row.occupancy)
+        for row in db_sqlite.query(models.OccupancySummary)
+    }
+
+
+def assert_summary_matches_rooms(db_sqlite):
+    db_sqlite.expire_all()
+    assert summary_totals(db_sqlite) == room_totals(db_sqlite)
+    rooms = room_totals(db_sqlite).values()
+    summary = crud.get_occupancy_summary(db_sqlite)
+    assert (summary.rooms, summary.capacity, summary.occupancy) == tuple(map(sum, zip((0, 0, 0), *rooms)))
+
+
+def test_summary_follows_claims_releases_and_structure_edits(campus, db_sqlite, db_pg):
+    application_ids = campus(students=12, dormitories=2, floors=2, rooms_per_floor=3, capacity=2)
+    assert_summary_matches_rooms(db_sqlite)
+
+    crud.process_applications_auto(db_sqlite, db_pg)
+    assert_summary_matches_rooms(db_sqlite)
+
+    crud.update_application_status(db_sqlite, db_pg, application_ids[0], schemas.ApplicationStatusUpdate(
+        status=models.ApplicationStatus.REJECTED, rejection_reason="Отказ."
+    ))
+    assert_summary_matches_rooms(db_sqlite)
+
+    moved_id = application_ids[1]
+    free_room_id = db_sqlite.query(models.Room.id).filter(
+        models.Room.dormitory_id == 2, models.Room.current_occupancy < models.Room.capacity
+    ).first()[0]
+    crud.allocate_student_to_room(db_sqlite, moved_id, free_room_id)
+    assert_summary_matches_rooms(db_sqlite)
+
+    occupied_rooms = [schemas.RoomCreate(floor_number=room.floor_number, room_number=room.room_number,
+                                         capacity=room.capacity)
+                      for room in crud.get_dormitory_rooms(db_sqlite, 2) if room.current_occupancy]
+    crud.define_dormitory_structure(db_sqlite, 2, occupied_rooms + [
+        schemas.RoomCreate(floor_number=3, room_number="301", capacity=4),
+        schemas.RoomCreate(floor_number=3, room_number="302", capacity=1),
+    ])
+    assert_summary_matches_rooms(db_sqlite)
+
+    crud.import_dormitories_structure(db_sqlite, schemas.DormitoryStructureExport(dormitories=[
+        schemas.DormitoryStructure(name="Общежитие 3", address="Улица 3", rooms=[
+            schemas.RoomCreate(floor_number=1, room_number="101", capacity=3)
+        ])
+    ]))
+    assert_summary_matches_rooms(db_sqlite)
+
+    crud.delete_dormitory(db_sqlite, 3)
+    assert_summary_matches_rooms(db_sqlite)
+
+    assert crud.reconcile_room_occupancy(db_sqlite).drifted_rooms == 0
@@ -0,0 +1,311 @@
+import asyncio
+import pytest
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app import async_crud, crud, database, metrics, models, schemas
+from app.allocation import ALLOCATION_STRATEGIES
+from app.room_index import free_room_index
+from app.student_cache import student_cache
+from tests.factories import add_applications, add_dormitories, add_students
+
+DRIVEN_FUNCTIONS = set()
+
+
+@pytest.fixture(autouse=True, params=["deferred", "immediate"])
+def begin_mode(request, monkeypatch):
+    monkeypatch.setattr(database, "SQLITE_BEGIN_MODE", request.param)
+    return request.param
+
+
+def drives(*functions):
+    DRIVEN_FUNCTIONS.update(f"{function.__module__}.{function.__qualname__}" for function in functions)
+    return lambda test: test
+
+
+@pytest.fixture
+def budgets(monkeypatch):
+    monkeypatch.setattr(metrics, "QUERY_BUDGET_MODE", "raise")
+    checked = {}
+    check_query_budget = metrics._check_query_budget
+
+    def record(frame):
+        limits = {name: frame.limit(name) for name in {*frame.limits, *frame.per_chunk}}
+        checked.setdefault(frame.function_name, []).append((dict(frame.statements), limits, frame.chunks))
+        check_query_budget(frame)
+
+    monkeypatch.setattr(metrics, "_check_query_budget", record)
+    return checked
+
+
+def assert_checked(budgets, *functions):
+    for function in functions:
+        function_name = f"{function.__module__}.{function.__qualname__}"
+        assert function_name in budgets, f"{function_name} was not checked against its budget"
+        for statements, limits, _ in budgets[function_name]:
+            assert all(count <= limits[name] for name, count in statements.items() if name in limits), \
+                f"{function_name}: {statements} over {limits}"
+
+
+@pytest.fixture
+def allocated_campus(campus, db_sqlite, db_pg):
+    application_ids = campus(students=10, dormitories=2, floors=2, rooms_per_floor=2, capacity=2)
+    crud.process_applications_auto(db_sqlite, db_pg)
+    student_cache.clear()
+    free_room_index.is_built = False
+    return application_ids
+
+
+def approve(db_sqlite, db_pg, application_id):
+    return crud.update_application_status(db_sqlite, db_pg, application_id, schemas.ApplicationStatusUpdate(
+        status=models.ApplicationStatus.APPROVED
+    ))
+
+
+def fill_rooms_behind_the_index(engine, room_ids):
+    with engine.begin() as connection:
+        connection.execute(update(models.Room).where(models.Room.id.in_(room_ids)).values(
+            current_occupancy=models.Room.capacity
+        ))
+
+
+def test_every_budgeted_function_is_driven():
+    assert DRIVEN_FUNCTIONS == set(metrics.QUERY_BUDGETS)
+
+
+def test_budget_is_checked_before_the_write_commits(budgets, campus, db_sqlite, db_pg, monkeypatch):
+    application_ids = campus(students=2, dormitories=1, floors=1, rooms_per_floor=2)
+    monkeypatch.setattr(metrics, "QUERY_BUDGETS", dict(metrics.QUERY_BUDGETS))
+    monkeypatch.setattr(crud, "publish_application_change", lambda *args: pytest.fail("published past the budget"))
+
+    @metrics.query_budget(sqlite=1)
+    def reject_within_one_statement():
+        return crud.update_application_status(db_sqlite, db_pg, application_ids[0], schemas.ApplicationStatusUpdate(
+            status=models.ApplicationStatus.REJECTED, rejection_reason="Отказ"
+        ))
+
+    with pytest.raises(metrics.QueryBudgetExceeded):
+        reject_within_one_statement()
+    db_sqlite.rollback()
+    assert db_sqlite.get(models.Application, application_ids[0]).status == models.ApplicationStatus.PENDING
+
+
+def test_begin_statements_are_not_counted(budgets, engines, db_sqlite):
+    executed = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engines[0], "after_cursor_execute", capture)
+    try:
+        crud.create_dormitory(db_sqlite, schemas.DormitoryCreate(name="Новое", address="Улица"))
+    finally:
+        event.remove(engines[0], "after_cursor_execute", capture)
+    assert any(statement.startswith("BEGIN") for statement in executed) == (database.SQLITE_BEGIN_MODE == "immediate")
+    assert budgets["app.crud.create_dormitory"][-1][0]["sqlite"] == \
+        len([statement for statement in executed if not statement.startswith("BEGIN")])
+
+
+@drives(crud.create_application, crud.get_application_status_by_student_details)
+def test_application_budgets(budgets, campus, db_sqlite, db_pg):
+    campus(students=3, dormitories=1, floors=1, rooms_per_floor=1)
+    db_sqlite.query(models.Application).delete()
+    db_sqlite.commit()
+    crud.create_application(db_sqlite, db_pg, schemas.ApplicationCreate(student_ticket_number="T1",
+                                                                       last_name="Иванов1"))
+    with pytest.raises(ValueError):
+        crud.create_application(db_sqlite, db_pg, schemas.ApplicationCreate(student_ticket_number="T1",
+                                                                           last_name="Иванов1"))
+    crud.get_application_status_by_student_details(db_sqlite, db_pg, "T1", "Иванов1")
+    crud.get_application_status_by_student_details(db_sqlite, db_pg, "T2", "Иванов2")
+    assert_checked(budgets, crud.create_application, crud.get_application_status_by_student_details)
+
+
+@drives(crud.get_all_applications, crud.get_staff_application_rows)
+def test_application_page_budgets(budgets, allocated_campus, db_sqlite, db_pg):
+    _, cursor, _ = crud.get_all_applications(db_sqlite, limit=3)
+    crud.get_all_applications(db_sqlite, limit=3, cursor=cursor, status=models.ApplicationStatus.ALLOCATED)
+    _, cursor, _ = crud.get_staff_application_rows(db_sqlite, db_pg, limit=3)
+    crud.get_staff_application_rows(db_sqlite, db_pg, limit=3, cursor=cursor, dormitory_id=1)
+    assert_checked(budgets, crud.get_all_applications, crud.get_staff_application_rows)
+
+
+@drives(crud.create_dormitory, crud.delete_dormitory, crud.get_dormitory_by_id)
+def test_dormitory_write_budgets(budgets, allocated_campus, db_sqlite):
+    dormitory = crud.create_dormitory(db_sqlite, schemas.DormitoryCreate(name="Новое", address="Улица"))
+    crud.get_dormitory_by_id(db_sqlite, dormitory.id)
+    crud.delete_dormitory(db_sqlite, dormitory.id)
+    with pytest.raises(ValueError):
+        crud.delete_dormitory(db_sqlite, 1)
+    assert crud.delete_dormitory(db_sqlite, 999) is None
+    assert_checked(budgets, crud.create_dormitory, crud.delete_dormitory, crud.get_dormitory_by_id)
+
+
+@drives(crud.get_dormitory_summaries, crud.get_dormitory_summary_rows, crud.get_dormitory_rooms,
+        crud.get_structure_export_data, crud.get_occupancy_summary, crud.get_available_rooms,
+        crud.get_dormitory_details_data)
+def test_dormitory_read_budgets(budgets, allocated_campus, db_sqlite, db_pg):
+    crud.get_dormitory_summaries(db_sqlite)
+    crud.get_dormitory_summary_rows(db_sqlite)
+    crud.get_dormitory_rooms(db_sqlite, 1)
+    crud.get_structure_export_data(db_sqlite)
+    crud.get_occupancy_summary(db_sqlite)
+    crud.get_available_rooms(db_sqlite)
+    crud.get_dormitory_details_data(db_sqlite, db_pg, 1)
+    crud.get_dormitory_details_data(db_sqlite, db_pg, 1, floor=2)
+    assert_checked(budgets, crud.get_dormitory_summaries, crud.get_dormitory_summary_rows, crud.get_dormitory_rooms,
+                   crud.get_structure_export_data, crud.get_occupancy_summary, crud.get_available_rooms,
+                   crud.get_dormitory_details_data)
+
+
+@drives(crud.reconcile_room_occupancy)
+def test_reconciliation_budget(budgets, allocated_campus, engines, db_sqlite):
+    crud.reconcile_room_occupancy(db_sqlite)
+    fill_rooms_behind_the_index(engines[0], [7, 8])
+    assert crud.reconcile_room_occupancy(db_sqlite, fix=True).rooms
+    assert_checked(budgets, crud.reconcile_room_occupancy)
+
+
+@drives(crud.update_application_status)
+def test_status_update_budgets(budgets, allocated_campus, db_sqlite, db_pg):
+    application_ids = allocated_campus
+    approve(db_sqlite, db_pg, application_ids[-1])
+    approve(db_sqlite, db_pg, application_ids[0])
+    crud.update_application_status(db_sqlite, db_pg, application_ids[1], schemas.ApplicationStatusUpdate(
+        status=models.ApplicationStatus.REJECTED, rejection_reason="Отказ"
+    ))
+    assert crud.update_application_status(db_sqlite, db_pg, 999, schemas.ApplicationStatusUpdate(
+        status=models.ApplicationStatus.REJECTED
+    )) is None
+    assert_checked(budgets, crud.update_application_status)
+
+
+@pytest.mark.parametrize("strategy", ["grouped_floor_fill", "balanced_dormitories"])
+def test_status_update_budgets_for_group_aware_strategies(budgets, allocated_campus, db_sqlite, db_pg, monkeypatch,
+                                                          strategy):
+    monkeypatch.setattr(crud, "get_allocation_strategy", lambda: ALLOCATION_STRATEGIES[strategy]())
+    approve(db_sqlite, db_pg, allocated_campus[0])
+    approve(db_sqlite, db_pg, allocated_campus[-1])
+    assert_checked(budgets, crud.update_application_status)
+
+
+def test_status_update_budget_holds_when_every_room_claim_is_lost(budgets, campus, engines, db_sqlite, db_pg):
+    application_ids = campus(students=1, dormitories=1, floors=1, rooms_per_floor=crud.ROOM_ALLOCATION_RETRIES + 1)
+    free_room_index.ensure_built(db_sqlite)
+    fill_rooms_behind_the_index(engines[0], range(1, crud.ROOM_ALLOCATION_RETRIES + 1))
+    assert approve(db_sqlite, db_pg, application_ids[0]).status == models.ApplicationStatus.APPROVED
+    assert_checked(budgets, crud.update_application_status)
+
+
+def test_status_update_budget_holds_when_a_room_claim_is_lost_while_moving(budgets, allocated_campus, engines,
+                                                                          db_sqlite, db_pg):
+    free_room_index.ensure_built(db_sqlite)
+    fill_rooms_behind_the_index(engines[0], [6])
+    assert approve(db_sqlite, db_pg, allocated_campus[0]).status == models.ApplicationStatus.ALLOCATED
+    assert_checked(budgets, crud.update_application_status)
+
+
+@drives(crud.allocate_student_to_room)
+def test_room_move_budgets(budgets, allocated_campus, db_sqlite):
+    application = db_sqlite.get(models.Application, allocated_campus[0])
+    target_room_id = 8 if application.allocated_room_id != 8 else 7
+    crud.allocate_student_to_room(db_sqlite, application.id, target_room_id)
+    crud.allocate_student_to_room(db_sqlite, application.id, target_room_id)
+    with pytest.raises(ValueError):
+        crud.allocate_student_to_room(db_sqlite, allocated_campus[4], 2)
+    assert crud.allocate_student_to_room(db_sqlite, 999, 1) is None
+    assert_checked(budgets, crud.allocate_student_to_room)
+
+
+@pytest.fixture
+def async_sessions(engines, tmp_path):
+    sqlite_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dormitory.db'}")
+    postgres_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'students.db'}")
+    database.configure_sqlite_engine(sqlite_engine.sync_engine)
+    database.configure_sqlite_engine(postgres_engine.sync_engine)
+    event.listen(postgres_engine.sync_engine, "connect", database.register_standin_functions)
+    database._engines.update(async_sqlite=sqlite_engine.sync_engine, async_postgres=postgres_engine.sync_engine)
+    yield (async_sessionmaker(sqlite_engine, autoflush=False, expire_on_commit=False),
+           async_sessionmaker(postgres_engine, autoflush=False, expire_on_commit=False))
+
+    async def dispose():
+        await sqlite_engine.dispose()
+        await postgres_engine.dispose()
+    asyncio.run(dispose())
+
+
+@drives(async_crud.create_application, async_crud.get_application_status_by_student_details,
+        async_crud.get_staff_applications_page, async_crud.get_staff_application_rows_page)
+def test_async_budgets(budgets, allocated_campus, async_sessions):
+    sqlite_sessions, postgres_sessions = async_sessions
+
+    async def drive():
+        async with sqlite_sessions() as db_sqlite, sqlite_sessions() as db_count, postgres_sessions() as db_pg:
+            with pytest.raises(ValueError):
+                await async_crud.create_application(db_sqlite, db_pg, schemas.ApplicationCreate(
+                    student_ticket_number="T1", last_name="Иванов1"
+                ))
+            await async_crud.get_application_status_by_student_details(db_sqlite, db_pg, "T1", "Иванов1")
+            _, cursor, _ = await async_crud.get_staff_applications_page(db_sqlite, db_count, db_pg, limit=3)
+            await async_crud.get_staff_applications_page(db_sqlite, db_count, db_pg, limit=3, cursor=cursor)
+            _, cursor, _ = await async_crud.get_staff_application_rows_page(db_sqlite, db_count, db_pg, limit=3)
+            await async_crud.get_staff_application_rows_page(db_sqlite, db_count, db_pg, limit=3, cursor=cursor)
+            await db_sqlite.execute(update(models.Application).where(models.Application.student_id == 1).values(
+                status=models.ApplicationStatus.REJECTED
+            ))
+            await db_sqlite.commit()
+            await async_crud.create_application(db_sqlite, db_pg, schemas.ApplicationCreate(
+                student_ticket_number="T1", last_name="Иванов1"
+            ))
+
+    asyncio.run(drive())
+    assert_checked(budgets, async_crud.create_application, async_crud.get_application_status_by_student_details,
+                   async_crud.get_staff_applications_page, async_crud.get_staff_application_rows_page)
+
+
+@drives(crud.process_applications_auto)
+def test_auto_processing_issues_the_same_statements_per_chunk(budgets, db_sqlite, db_pg, monkeypatch):
+    for name in ("STUDENT_LOOKUP_CHUNK_SIZE", "ROOM_WRITE_CHUNK_SIZE", "APPLICATION_WRITE_CHUNK_SIZE"):
+        monkeypatch.setattr(crud, name, 10)
+    add_students(db_pg, 1010)
+    add_dormitories(db_sqlite, 1, floors=10, rooms_per_floor=101, capacity=1)
+
+    def process(student_ids):
+        add_applications(db_sqlite, student_ids)
+        student_cache.clear()
+        crud.process_applications_auto(db_sqlite, db_pg)
+        return budgets["app.crud.process_applications_auto"][-1]
+
+    fixed_statements, _, _ = process([])
+    per_chunk = []
+    for student_ids in (range(1, 11), range(11, 1011)):
+        statements, _, chunks = process(student_ids)
+        assert chunks
+        per_chunk.append({name: (count - fixed_statements.get(name, 0)) / chunks for name, count in statements.items()})
+    assert per_chunk[0] == per_chunk[1]
+    assert db_sqlite.query(models.Application).filter(
+        models.Application.status == models.ApplicationStatus.ALLOCATED).count() == 1010
+    assert_checked(budgets, crud.process_applications_auto)
+
+
+@drives(crud.import_structure_rows, crud.iter_structure_export_rows)
+def test_structure_import_and_export_budgets(budgets, db_sqlite, monkeypatch):
+    monkeypatch.setattr(crud, "ROOM_WRITE_CHUNK_SIZE", 3)
+
+    def structure(names, rooms):
+        return schemas.DormitoryStructureExport(dormitories=[schemas.DormitoryStructure(
+            name=name, address=f"Улица {name}", rooms=[schemas.RoomCreate(floor_number=1 + room % 2,
+                                                                         room_number=str(100 + room), capacity=2)
+                                                      for room in range(rooms)]
+        ) for name in names])
+
+    crud.import_dormitories_structure(db_sqlite, structure(["А", "Б", "В"], 10))
+    crud.import_dormitories_structure(db_sqlite, structure(["А", "Б", "Г"], 4))
+    assert len(list(crud.iter_structure_export_rows(db_sqlite, chunk_size=2))) == 3 * 4 + 10
+    assert_checked(budgets, crud.import_structure_rows, crud.iter_structure_export_rows)
+
+
+@drives(crud.iter_application_export_rows)
+def test_application_export_budget(budgets, allocated_campus, db_sqlite, db_pg):
+    student_cache.clear()
+    assert len(list(crud.iter_application_export_rows(db_sqlite, db_pg, chunk_size=3))) == len(allocated_campus)
+    assert_checked(budgets, crud.iter_application_export_rows)
@@ -0,0 +1,124 @@
+import pytest
+from sqlalchemy import event
+from app import crud, models, schemas
+from app.student_cache import student_cache
+
+
+def query_plans(engine, call):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as connection:
+        return [
+            (statement, [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)])
+            for statement, parameters in statements
+        ]
+
+
+def plan_details(plans):
+    return [detail for _, plan in plans for detail in plan]
+
+
+def assert_no_full_scans(plans):
+    for statement, plan in plans:
+        full_scans = [detail for detail in plan
+                      if detail.startswith("SCAN ") and " INDEX " not in detail and not detail.startswith("SCAN anon_")]
+        assert not full_scans, f"{full_scans} in plan of {' '.join(statement.split())}"
+
+
+@pytest.fixture
+def allocated_campus(campus, db_sqlite, db_pg):
+    campus(students=40, dormitories=3, floors=3, rooms_per_floor=4)
+    crud.process_applications_auto(db_sqlite, db_pg)
+    student_cache.clear()
+
+
+def test_active_application_check_searches_student_status_index(allocated_campus, engines, db_sqlite, db_pg):
+    def create_duplicate():
+        with pytest.raises(ValueError):
+            crud.create_application(db_sqlite, db_pg, schemas.ApplicationCreate(student_ticket_number="T3",
+                                                                               last_name="Иванов3"))
+
+    plans = query_plans(engines[0], create_duplicate)
+    assert_no_full_scans(plans)
+    assert "SEARCH applications USING INDEX ix_applications_student_status_date (student_id=? AND status=?)" \
+        in plan_details(plans)
+
+
+def test_status_check_searches_student_status_index(allocated_campus, engines, db_sqlite, db_pg):
+    plans = query_plans(engines[0], lambda: crud.get_application_status_by_student_details(db_sqlite, db_pg, "T3",
+                                                                                           "Иванов3"))
+    assert_no_full_scans(plans)
+    assert any(detail.startswith("SEARCH applications USING INDEX ix_applications_student_status_date")
+               for detail in plan_details(plans))
+
+
+def test_dormitory_details_search_rooms_and_occupants_by_index(allocated_campus, engines, db_sqlite, db_pg):
+    plans = query_plans(engines[0], lambda: crud.get_dormitory_details_data(db_sqlite, db_pg, 1))
+    assert_no_full_scans(plans)
+    details = plan_details(plans)
+    assert any(detail.startswith("SEARCH rooms USING INDEX sqlite_autoindex_rooms_") and "(dormitory_id=?)" in detail
+               for detail in details)
+    assert "SEARCH applications USING INDEX ix_applications_room_status (allocated_room_id=? AND status=?)" in details
+    assert "USE TEMP B-TREE FOR ORDER BY" not in details
+
+
+def test_available_rooms_walk_the_free_space_index(allocated_campus, engines, db_sqlite):
+    plans = query_plans(engines[0], lambda: crud.get_available_rooms(db_sqlite))
+    assert_no_full_scans(plans)
+    details = plan_details(plans)
+    assert "SCAN rooms USING INDEX ix_rooms_free_dormitory_floor_room" in details
+    assert "USE TEMP B-TREE FOR ORDER BY" not in details
+
+
+def test_application_page_walks_the_date_index_without_sorting(allocated_campus, engines, db_sqlite, db_pg):
+    plans = query_plans(engines[0], lambda: crud.get_staff_application_rows(db_sqlite, db_pg, limit=10))
+    assert_no_full_scans(plans)
+    details = plan_details(plans)
+    assert "SCAN applications USING INDEX ix_applications_date_id" in details
+    assert "USE TEMP B-TREE FOR ORDER BY" not in details
+
+
+def test_dormitory_filtered_application_page_searches_by_room(allocated_campus, engines, db_sqlite, db_pg):
+    plans = query_plans(engines[0], lambda: crud.get_staff_application_rows(db_sqlite, db_pg, limit=10,
+                                                                            dormitory_id=1))
+    assert_no_full_scans(plans)
+    assert any(detail.startswith("SEARCH applications USING INDEX ix_applications_room_status")
+               for detail in plan_details(plans))
+
+
+def test_pending_applications_search_status_index(allocated_campus, engines, db_sqlite):
+    plans = query_plans(engines[0], lambda: crud.get_pending_applications(db_sqlite))
+    assert_no_full_scans(plans)
+    assert any(detail.startswith("SEARCH applications USING") and "(status=?)" in detail
+               for detail in plan_details(plans))
+
+
+def test_status_filtered_application_page_searches_status_date_index(allocated_campus, engines, db_sqlite, db_pg):
+    plans = query_plans(engines[0], lambda: crud.get_staff_application_rows(
+        db_sqlite, db_pg, limit=10, status=models.ApplicationStatus.ALLOCATED
+    ))
+    assert_no_full_scans(plans)
+    details = plan_details(plans)
+    assert any(detail.startswith("SEARCH applications USING COVERING INDEX ix_applications_status_date_id (status=?")
+               or detail.startswith("SEARCH applications USING INDEX ix_applications_status_date_id (status=?")
+               for detail in details)
+    assert "USE TEMP B-TREE FOR ORDER BY" not in details
+
+
+def test_cursor_page_seeks_the_date_index(allocated_campus, engines, db_sqlite, db_pg):
+    _, cursor, _ = crud.get_staff_application_rows(db_sqlite, db_pg, limit=10)
+    plans = query_plans(engines[0], lambda: crud.get_staff_application_rows(db_sqlite, db_pg, limit=10, cursor=cursor))
+    assert_no_full_scans(plans)
+    details = plan_details(plans)
+    assert any("ix_applications_date_id (application_date<?)" in detail for detail in details)
+    assert "USE TEMP B-TREE FOR ORDER BY" not in details
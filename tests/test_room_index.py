@@ -0,0 +1,32 @@
+from app import crud
+from app.room_index import free_room_index
+from tests.factories import add_dormitories
+
+
+def test_claims_reach_the_index_only_after_commit(db_sqlite):
+    add_dormitories(db_sqlite, count=1, floors=1, rooms_per_floor=1, capacity=1)
+    room_id = free_room_index.first()
+
+    assert crud.claim_room_slots(db_sqlite, room_id)
+    assert free_room_index.free_slots(room_id) == 1
+    db_sqlite.rollback()
+    assert free_room_index.first() == room_id
+
+    assert crud.claim_room_slots(db_sqlite, room_id)
+    db_sqlite.commit()
+    assert free_room_index.first() is None
+
+
+def test_releases_reach_the_index_only_after_commit(db_sqlite):
+    add_dormitories(db_sqlite, count=1, floors=1, rooms_per_floor=1, capacity=1)
+    room_id = free_room_index.first()
+    crud.claim_room_slots(db_sqlite, room_id)
+    db_sqlite.commit()
+
+    crud.release_room_slot(db_sqlite, room_id)
+    db_sqlite.rollback()
+    assert free_room_index.first() is None
+
+    crud.release_room_slot(db_sqlite, room_id)
+    db_sqlite.commit()
+    assert free_room_index.free_slots(room_id) == 1
@@ -0,0 +1,62 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import metrics
+from app.routers import staff_api, student_api
+from app.student_cache import student_cache
+
+ROUTE_BUDGETS = {
+    ("POST", "/staff/applications/process_auto/"): {"sqlite": 5, "postgres": 1},
+    ("GET", "/staff/applications/"): {"sqlite": 2, "postgres": 1},
+    ("PUT", "/staff/applications/{application_id}/status/"): {"sqlite": 3, "postgres": 1},
+    ("POST", "/student/applications/status_by_details/"): {"sqlite": 1, "postgres": 1},
+    ("GET", "/staff/dormitories/"): {"sqlite": 1},
+    ("GET", "/staff/dormitories/{dormitory_id}/details/"): {"sqlite": 4, "postgres": 1},
+    ("GET", "/staff/applications/export/"): {"sqlite": 1, "postgres": 1},
+}
+
+
+@pytest.fixture
+def client(engines, monkeypatch):
+    monkeypatch.setattr(metrics, "QUERY_BUDGET_MODE", "raise")
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(student_api.router)
+    app.include_router(staff_api.router)
+    app.dependency_overrides[staff_api.verify_ip] = lambda: None
+    return TestClient(app)
+
+
+@pytest.fixture
+def route_statements(client, monkeypatch):
+    measured = set()
+
+    def request(method, url, **kwargs):
+        registry = metrics.MetricsRegistry()
+        monkeypatch.setattr(metrics, "metrics_registry", registry)
+        student_cache.clear()
+        response = client.request(method, url, **kwargs)
+        assert response.status_code < 400, response.text
+        (route,) = {route for request_method, route, _ in registry._engines if request_method == method}
+        statements = {name: totals.statements for (_, _, name), totals in registry._engines.items()}
+        budget = ROUTE_BUDGETS[(method, route)]
+        assert all(count <= budget.get(name, 0) for name, count in statements.items()), \
+            f"{method} {route}: {statements} over {budget}"
+        measured.add((method, route))
+        return statements
+
+    yield request
+    assert measured == set(ROUTE_BUDGETS)
+
+
+def test_routes_stay_within_their_statement_budgets(route_statements, campus, db_sqlite):
+    application_ids = campus(students=30, dormitories=2, floors=2, rooms_per_floor=2, capacity=2)
+    route_statements("POST", "/staff/applications/process_auto/")
+    assert route_statements("GET", "/staff/applications/?limit=5") == \
+        route_statements("GET", "/staff/applications/?limit=50")
+    route_statements("PUT", f"/staff/applications/{application_ids[-1]}/status/", json={"status": "approved"})
+    route_statements("POST", "/student/applications/status_by_details/",
+                     json={"student_ticket_number": "T3", "last_name": "Иванов3"})
+    route_statements("GET", "/staff/dormitories/")
+    route_statements("GET", "/staff/dormitories/1/details/")
+    route_statements("GET", "/staff/applications/export/")
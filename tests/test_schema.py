@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.exc import IntegrityError
+from app import database, models
+from tests.factories import add_dormitories
+
+OLD_ROOMS_TABLE = (
+    "CREATE TABLE rooms (id INTEGER PRIMARY KEY, dormitory_id INTEGER, floor_number INTEGER, "
+    "room_number VARCHAR, capacity INTEGER, current_occupancy INTEGER)"
+)
+
+
+def test_room_numbers_are_unique_within_a_floor(db_sqlite):
+    add_dormitories(db_sqlite, count=1, floors=1, rooms_per_floor=1)
+    db_sqlite.add(models.Room(dormitory_id=1, floor_number=1, room_number="101", capacity=2, current_occupancy=0))
+    with pytest.raises(IntegrityError):
+        db_sqlite.commit()
+
+
+def legacy_engine(tmp_path, rooms):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(OLD_ROOMS_TABLE)
+        for room_id, room_number in enumerate(rooms, start=1):
+            connection.exec_driver_sql(f"INSERT INTO rooms VALUES ({room_id}, 1, 1, '{room_number}', 2, 0)")
+    models.Base_sqlite.metadata.create_all(engine)
+    return engine
+
+
+def test_missing_unique_index_is_added_to_existing_rooms_table(tmp_path):
+    engine = legacy_engine(tmp_path, ["101", "102"])
+
+    assert database.create_missing_indexes(engine, models.Base_sqlite.metadata) == []
+    assert database.create_missing_indexes(engine, models.Base_sqlite.metadata) == []
+
+    unique_indexes = [index["name"] for index in inspect(engine).get_indexes("rooms") if index["unique"]]
+    assert unique_indexes == ["uq_rooms_dormitory_floor_room"]
+    engine.dispose()
+
+
+def test_duplicate_rooms_are_reported_instead_of_failing_startup(tmp_path):
+    engine = legacy_engine(tmp_path, ["101", "101"])
+
+    warnings = database.create_missing_indexes(engine, models.Base_sqlite.metadata)
+
+    assert len(warnings) == 1 and "uq_rooms_dormitory_floor_room" in warnings[0]
+    engine.dispose()
+
+
+def test_fresh_schema_gets_no_extra_unique_index(engines):
+    assert database.create_missing_indexes(engines[0], models.Base_sqlite.metadata) == []
+    assert not [index for index in inspect(engines[0]).get_indexes("rooms") if index["unique"]]
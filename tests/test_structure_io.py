@@ -0,0 +1,85 @@
+import io
+import json
+import pytest
+from app import structure_io
+
+STRUCTURE = {
+    "exported_at": "2024-05-06",
+    "dormitories": [
+        {"name": "Общежитие 1", "address": "Улица 1", "rooms": [
+            {"floor_number": 1, "room_number": "101", "capacity": 2},
+            {"floor_number": 2, "room_number": "201", "capacity": 3},
+        ]},
+        {"name": "Общежитие 2", "address": "Улица \"2\"", "rooms": []},
+    ],
+}
+EXPECTED_ROWS = [
+    {"dormitory_name": "Общежитие 1", "dormitory_address": "Улица 1"},
+    {"dormitory_name": "Общежитие 1", "dormitory_address": "Улица 1", "floor_number": 1, "room_number": "101",
+     "capacity": 2},
+    {"dormitory_name": "Общежитие 1", "dormitory_address": "Улица 1", "floor_number": 2, "room_number": "201",
+     "capacity": 3},
+    {"dormitory_name": "Общежитие 2", "dormitory_address": "Улица \"2\""},
+]
+
+
+def read_rows(content: str, import_format: str) -> list:
+    return list(structure_io.iter_structure_rows(io.BytesIO(content.encode("utf-8")), import_format))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_json_is_read_across_chunk_boundaries(monkeypatch, chunk_size):
+    monkeypatch.setattr(structure_io, "JSON_READ_CHUNK_SIZE", chunk_size)
+    assert read_rows(json.dumps(STRUCTURE, ensure_ascii=False, indent=2), "json") == EXPECTED_ROWS
+
+
+@pytest.mark.parametrize("content", ["{}", " { \"dormitories\" : [ ] } \n"])
+def test_json_without_dormitories_has_no_rows(monkeypatch, content):
+    monkeypatch.setattr(structure_io, "JSON_READ_CHUNK_SIZE", 1)
+    assert read_rows(content, "json") == []
+
+
+@pytest.mark.parametrize("content", [
+    json.dumps(STRUCTURE) + "}",
+    json.dumps(STRUCTURE) + " {\"dormitories\": []}",
+    "{} x",
+    "{\"dormitories\": [}",
+    "{\"dormitories\": []",
+])
+def test_malformed_json_is_rejected(monkeypatch, content):
+    monkeypatch.setattr(structure_io, "JSON_READ_CHUNK_SIZE", 1)
+    with pytest.raises(ValueError):
+        read_rows(content, "json")
+
+
+def test_ndjson_rows_are_read_line_by_line():
+    content = "\n".join(json.dumps(row, ensure_ascii=False) for row in EXPECTED_ROWS) + "\n\n"
+    assert read_rows(content, "ndjson") == EXPECTED_ROWS
+
+
+def test_malformed_ndjson_line_is_reported_by_number():
+    content = json.dumps(EXPECTED_ROWS[0], ensure_ascii=False) + "\n{\"dormitory_name\": \n"
+    with pytest.raises(ValueError, match="строке 2"):
+        read_rows(content, "ndjson")
+
+
+def test_csv_rows_keep_empty_cells_as_missing_values():
+    content = ("﻿dormitory_name,dormitory_address,floor_number,room_number,capacity\n"
+               "Общежитие 1,Улица 1,,,\n"
+               "Общежитие 1,Улица 1,1,101,2\n")
+    assert read_rows(content, "csv") == [
+        {"dormitory_name": "Общежитие 1", "dormitory_address": "Улица 1", "floor_number": None,
+         "room_number": None, "capacity": None},
+        {"dormitory_name": "Общежитие 1", "dormitory_address": "Улица 1", "floor_number": "1",
+         "room_number": "101", "capacity": "2"},
+    ]
+
+
+def test_csv_without_required_columns_is_rejected():
+    with pytest.raises(ValueError, match="dormitory_address"):
+        read_rows("dormitory_name,room_number\nОбщежитие 1,101\n", "csv")
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        read_rows("{}", "xml")
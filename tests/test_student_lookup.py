@@ -0,0 +1,25 @@
+from sqlalchemy import text
+from app import crud, models
+from tests.factories import add_students
+
+
+def test_lookup_is_exact_and_case_insensitive_for_cyrillic(db_pg):
+    add_students(db_pg, 3)
+
+    student = crud.get_student_by_ticket_number_and_lastname(db_pg, "T2", "  иВАНОВ2 ")
+    assert student is not None and student.id == 2
+    assert crud.get_student_by_ticket_number_and_lastname(db_pg, "T2", "Иванов%") is None
+    assert crud.get_student_by_ticket_number_and_lastname(db_pg, "T2", "Иванов_") is None
+
+
+def test_unicode_lower_is_registered_only_on_the_standin(db_sqlite, db_pg):
+    assert db_pg.execute(text("SELECT unicode_lower('ИВАНОВ')")).scalar() == "иванов"
+    assert db_sqlite.execute(text("SELECT lower('ИВАНОВ')")).scalar() == "ИВАНОВ"
+
+
+def test_lookup_searches_the_unique_ticket_number_index(db_pg):
+    add_students(db_pg, 50)
+    query = db_pg.query(models.Student.id).filter(*crud.student_ticket_criteria("T7", "Иванов7"))
+    statement = query.statement.compile(db_pg.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = [row[-1] for row in db_pg.execute(text(f"EXPLAIN QUERY PLAN {statement}"))]
+    assert plan == ["SEARCH students USING INDEX ix_students_student_ticket_number (student_ticket_number=?)"]